@@ -1,6 +1,6 @@
 from django.contrib import admin
-from .models import Studentprofile, Companyprofile  
+from .models import StudentProfile, CompanyProfile  
 
 # Register your models here.
-admin.site.register(Studentprofile)
-admin.site.register(Companyprofile) 
\ No newline at end of file
+admin.site.register(StudentProfile)
+admin.site.register(CompanyProfile) 
\ No newline at end of file
@@ -1,3 +1,42 @@
+from django import forms
 from django.contrib import admin
+from django.core.exceptions import ValidationError
 
-# Register your models here.
+from .bulk import FINAL_STATUSES, free_positions
+from .models import Application
+
+
+class ApplicationAdminForm(forms.ModelForm):
+    class Meta:
+        model = Application
+        fields = '__all__'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        previous = getattr(self.instance, '_loaded_status', None)
+        status = cleaned_data.get('status')
+        internship = cleaned_data.get('internship')
+        if previous in FINAL_STATUSES and status != previous:
+            raise ValidationError({'status': f'Cannot change a {previous} application.'})
+        # Application.save re-checks this with the counter update, which rolls the save back if it fails
+        if status == 'accepted' and previous != 'accepted' and internship is not None:
+            if free_positions([internship.pk]).get(internship.pk, 0) <= 0:
+                raise ValidationError({'status': 'No positions left on this internship.'})
+        return cleaned_data
+
+
+@admin.register(Application)
+class ApplicationAdmin(admin.ModelAdmin):
+    """
+    Status changes go through Application.save, so the counters, the capacity check and the queued effects apply
+    """
+    form = ApplicationAdminForm
+    list_display = ['id', 'student', 'internship', 'status', 'admin_approved', 'updated_at']
+    list_filter = ['status', 'admin_approved']
+    list_select_related = ['student__user', 'internship']
+    raw_id_fields = ['student', 'internship']
+
+    def delete_queryset(self, request, queryset):
+        # One by one, so the delete signals update the counters
+        for application in queryset:
+            application.delete()
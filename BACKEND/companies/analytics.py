@@ -0,0 +1,316 @@
+# companies/analytics.py
+"""
+Placement analytics rollups
+
+Two summary tables answer the cross-student / cross-company questions
+without GROUP BYs over every application at read time:
+
+- PlacementRollup: per institution, course and year of study, how many
+  students there are, how many applied, how many were placed, and their
+  applications by status.
+- MarketTrendRollup: applications by status per month (of applied_at),
+  company industry and internship location.
+
+Per-internship funnels need no table of their own: InternshipApplicationStats
+(counters.py) already holds them and is kept current on every write.
+
+refresh() brings the rollups up to date incrementally. Applications and
+students whose updated_at is past the stored watermark name the groups
+that may have changed, and only those groups are recomputed with the same
+live_* aggregation a full rebuild() uses. The window starts OVERLAP before
+the watermark, so rows committed late by a long transaction are still
+picked up; recomputing a group twice is harmless. A student who moves to
+another institution, course or year only names the new group, so saving
+one also records the group it left as a StalePlacementGroup (see
+note_placement_group()), which the next refresh recomputes too. Changes
+that don't touch updated_at or go through Student.save (deletes, bulk
+updates, an internship's location or a company's industry being edited)
+wait for the next rebuild().
+"""
+import datetime
+from datetime import timedelta
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, DateField, F, Q
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from students.models import Student
+
+from .counters import STATUSES, status_aggregates
+from .models import Application, MarketTrendRollup, PlacementRollup, RollupWatermark, StalePlacementGroup
+
+
+WATERMARK = 'analytics'
+OVERLAP = timedelta(minutes=5)
+# Groups recomputed per query
+KEY_BATCH_SIZE = 200
+
+PLACEMENT_KEY = ['institution_id', 'course', 'year_of_study']
+TREND_KEY = ['month', 'industry', 'location']
+
+
+def live_placements(students=None):
+    """
+    PlacementRollup rows computed from students and their applications
+    """
+    students = Student.objects.all() if students is None else students
+    aggregates = {
+        'students': Count('pk', distinct=True),
+        'applicants': Count('applications__student_id', distinct=True),
+        'placed': Count('applications__student_id', filter=Q(applications__status='accepted'), distinct=True),
+        'total': Count('applications'),
+    }
+    for value in STATUSES:
+        aggregates[value] = Count('applications', filter=Q(applications__status=value))
+    return students.values(*PLACEMENT_KEY).annotate(**aggregates).order_by()
+
+
+def live_trends(applications=None):
+    """
+    MarketTrendRollup rows computed from applications
+    """
+    applications = Application.objects.all() if applications is None else applications
+    return _with_trend_key(applications).values(*TREND_KEY).annotate(**status_aggregates()).order_by()
+
+
+def _with_trend_key(applications):
+    return applications.annotate(
+        month=TruncMonth('applied_at', output_field=DateField()),
+        industry=F('internship__company__industry'),
+        location=F('internship__location'),
+    )
+
+
+def live_funnels(applications=None):
+    """
+    Per-internship status counts, as InternshipApplicationStats stores them
+    """
+    applications = Application.objects.all() if applications is None else applications
+    return applications.values('internship_id').annotate(**status_aggregates()).order_by()
+
+
+def _month_range(month):
+    start = datetime.datetime(month.year, month.month, 1, tzinfo=timezone.get_current_timezone())
+    end = (start + timedelta(days=32)).replace(day=1)
+    return start, end
+
+
+def _placement_filter(keys):
+    # A coarse filter the indexes can serve; _keep() drops groups outside `keys`
+    institution_ids, courses, years = zip(*keys)
+    return Q(institution_id__in=set(institution_ids), course__in=set(courses), year_of_study__in=set(years))
+
+
+def _trend_filter(keys):
+    months, industries, locations = zip(*keys)
+    start, _ = _month_range(min(months))
+    _, end = _month_range(max(months))
+    return Q(
+        applied_at__gte=start, applied_at__lt=end,
+        internship__company__industry__in=set(industries), internship__location__in=set(locations),
+    )
+
+
+def _keep(rows, key_fields, keys):
+    keys = set(keys)
+    return [row for row in rows if tuple(row[field] for field in key_fields) in keys]
+
+
+def _batches(keys):
+    keys = sorted(keys)
+    for start in range(0, len(keys), KEY_BATCH_SIZE):
+        yield keys[start:start + KEY_BATCH_SIZE]
+
+
+def _replace(model, key_fields, keys, rows):
+    """
+    Delete the rollup rows for `keys` and insert `rows` (group dicts) in their place
+    """
+    condition = Q()
+    for key in keys:
+        condition |= Q(**dict(zip(key_fields, key)))
+    model.objects.filter(condition).delete()
+    model.objects.bulk_create([model(**row) for row in rows], batch_size=1000)
+
+
+def recompute_placements(keys):
+    for batch in _batches(keys):
+        rows = _keep(live_placements(Student.objects.filter(_placement_filter(batch))), PLACEMENT_KEY, batch)
+        _replace(PlacementRollup, PLACEMENT_KEY, batch, rows)
+
+
+def recompute_trends(keys):
+    for batch in _batches(keys):
+        rows = _keep(live_trends(Application.objects.filter(_trend_filter(batch))), TREND_KEY, batch)
+        _replace(MarketTrendRollup, TREND_KEY, batch, rows)
+
+
+def note_placement_group(student, using=None, update_fields=None):
+    """
+    Before a student is saved: record the placement group it is leaving, if any
+    """
+    fields = {'institution', *PLACEMENT_KEY}
+    if student._state.adding or (update_fields is not None and not fields & set(update_fields)):
+        return
+    stored = Student.objects.using(using).filter(pk=student.pk).values_list(*PLACEMENT_KEY).first()
+    if stored is not None and stored != tuple(getattr(student, field) for field in PLACEMENT_KEY):
+        StalePlacementGroup.objects.using(using).create(**dict(zip(PLACEMENT_KEY, stored)))
+
+
+def _stale_placement_groups():
+    """
+    (ids, keys) of the recorded StalePlacementGroups, so only these are deleted once recomputed
+    """
+    rows = StalePlacementGroup.objects.values_list('pk', *PLACEMENT_KEY)
+    return [row[0] for row in rows], {row[1:] for row in rows}
+
+
+def rebuild(now=None):
+    """
+    Recompute every rollup row from scratch and reset the watermark
+
+    Returns a summary dict.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        stale_ids, _ = _stale_placement_groups()
+        PlacementRollup.objects.all().delete()
+        MarketTrendRollup.objects.all().delete()
+        PlacementRollup.objects.bulk_create(
+            [PlacementRollup(**row) for row in live_placements()], batch_size=1000
+        )
+        MarketTrendRollup.objects.bulk_create(
+            [MarketTrendRollup(**row) for row in live_trends()], batch_size=1000
+        )
+        StalePlacementGroup.objects.filter(pk__in=stale_ids).delete()
+        RollupWatermark.objects.update_or_create(name=WATERMARK, defaults={'changed_before': now})
+    return {
+        'rebuilt': True,
+        'placement_groups': PlacementRollup.objects.count(),
+        'trend_groups': MarketTrendRollup.objects.count(),
+    }
+
+
+def refresh(now=None):
+    """
+    Recompute the rollup groups touched by changes since the watermark
+
+    Rebuilds instead if there is no watermark yet. Returns a summary dict.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        # Serializes concurrent refreshes
+        watermark = RollupWatermark.objects.select_for_update().filter(name=WATERMARK).first()
+        if watermark is None:
+            return rebuild(now)
+
+        window = {'updated_at__gt': watermark.changed_before - OVERLAP, 'updated_at__lte': now}
+        # order_by(): the default ordering would otherwise leak into the DISTINCT
+        changed = Application.objects.filter(**window).order_by()
+
+        placement_keys = set(changed.values_list(
+            'student__institution_id', 'student__course', 'student__year_of_study'
+        ).distinct())
+        placement_keys.update(
+            Student.objects.filter(**window).order_by().values_list(*PLACEMENT_KEY).distinct()
+        )
+        # Groups students have moved out of
+        stale_ids, stale_keys = _stale_placement_groups()
+        placement_keys.update(stale_keys)
+        trend_keys = set(_with_trend_key(changed).values_list(*TREND_KEY).distinct())
+
+        recompute_placements(placement_keys)
+        recompute_trends(trend_keys)
+        StalePlacementGroup.objects.filter(pk__in=stale_ids).delete()
+
+        watermark.changed_before = now
+        watermark.save()
+    return {
+        'rebuilt': False,
+        'placement_groups': len(placement_keys),
+        'trend_groups': len(trend_keys),
+    }
+
+
+def last_refreshed():
+    """
+    The watermark: every change before it is in the rollups (None before the first refresh)
+    """
+    return RollupWatermark.objects.filter(name=WATERMARK).values_list('changed_before', flat=True).first()
+
+
+def _id_param(params, name):
+    value = params.get(name)
+    if value and not str(value).isdigit():
+        raise ValidationError(f'{name} must be an id')
+    return int(value) if value else None
+
+
+def _month_param(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        parsed = parse_date(f'{value}-01') if len(str(value)) == 7 else None
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError(f'{name} must be a YYYY-MM month')
+    return parsed
+
+
+def filter_placements(params):
+    """
+    PlacementRollup rows matching `params`: institution (id), course, year_of_study
+
+    Raises ValidationError for malformed values.
+    """
+    rollups = PlacementRollup.objects.all()
+    institution_id = _id_param(params, 'institution')
+    if institution_id:
+        rollups = rollups.filter(institution_id=institution_id)
+    year_of_study = _id_param(params, 'year_of_study')
+    if year_of_study:
+        rollups = rollups.filter(year_of_study=year_of_study)
+    if params.get('course'):
+        rollups = rollups.filter(course=params['course'])
+    return rollups.order_by(*PLACEMENT_KEY)
+
+
+def filter_trends(params):
+    """
+    MarketTrendRollup rows matching `params`: industry, location, month_from / month_to (YYYY-MM)
+
+    Raises ValidationError for malformed values.
+    """
+    rollups = MarketTrendRollup.objects.all()
+    for name in ('industry', 'location'):
+        if params.get(name):
+            rollups = rollups.filter(**{name: params[name]})
+    month_from = _month_param(params, 'month_from')
+    if month_from:
+        rollups = rollups.filter(month__gte=month_from)
+    month_to = _month_param(params, 'month_to')
+    if month_to:
+        rollups = rollups.filter(month__lte=month_to)
+    return rollups.order_by(*TREND_KEY)
+
+
+def filter_funnels(params, internships):
+    """
+    `internships` narrowed by `params`: company (id), is_active (true/false)
+
+    Raises ValidationError for malformed values.
+    """
+    company_id = _id_param(params, 'company')
+    if company_id:
+        internships = internships.filter(company_id=company_id)
+    is_active = params.get('is_active')
+    if is_active:
+        if is_active not in ('true', 'false'):
+            raise ValidationError('is_active must be true or false')
+        internships = internships.filter(is_active=is_active == 'true')
+    return internships.order_by('-created_at', '-id')
@@ -0,0 +1,170 @@
+# companies/async_views.py
+"""
+Async versions of the read-only catalogue endpoints, for ASGI servers
+
+Served from /api/async/ alongside the sync views and returning the same
+payloads. Under uvicorn (internship_system.asgi) a worker keeps accepting
+requests while earlier ones wait on the database, instead of holding a
+thread per request. Queries go through the async ORM (aiterator, acount,
+aget); everything else (filters, query planning, serializers, the
+fast path, the response cache) is shared with views.py.
+
+DRF's @api_view has no async support, so async_api_view below does the
+parts of it these views need: session and bearer token (tokens.py)
+authentication, the IsAuthenticated check, throttle_classes (through the
+throttles' aallow_request), 404/405 handling and JSON rendering.
+"""
+from functools import wraps
+
+from django.core.paginator import Paginator
+from django.http import Http404
+from django.shortcuts import aget_object_or_404
+from rest_framework import status
+from rest_framework.decorators import throttle_classes
+from rest_framework.exceptions import Throttled
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from . import fastpath, tokens
+from .cache import async_cache_response, internship_scope
+from .fastpath import FastJSONRenderer
+from .models import Company, Internship
+from .pagination import CursorError, apaginate_by_cursor, is_cursor_request
+from .planner import plan_queryset
+from .routers import read_from_replica
+from .serializers import CompanySerializer, InternshipDetailSerializer, InternshipListingSerializer
+from .throttling import CatalogueRateThrottle
+from .views import filter_companies, filter_internships
+
+
+def _render(response):
+    response.accepted_renderer = FastJSONRenderer()
+    response.accepted_media_type = response.accepted_renderer.media_type
+    response.renderer_context = {}
+    return response.render()
+
+
+def async_api_view(view):
+    """
+    Authenticated, GET-only async view returning a DRF Response
+    """
+    @wraps(view)
+    async def wrapped(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return _render(Response(
+                {'detail': f'Method "{request.method}" not allowed.'},
+                status=status.HTTP_405_METHOD_NOT_ALLOWED,
+            ))
+
+        # Session, then bearer token authentication, as in REST_FRAMEWORK's defaults
+        user = await request.auser()
+        if not user.is_authenticated:
+            try:
+                token = tokens.bearer_token(request)
+                if token is not None:
+                    user, _ = await tokens.aauthenticate_token(token)
+            except tokens.InvalidToken as exc:
+                return _render(Response({'detail': str(exc)}, status=status.HTTP_403_FORBIDDEN))
+        if not user.is_authenticated:
+            return _render(Response(
+                {'detail': 'Authentication credentials were not provided.'},
+                status=status.HTTP_403_FORBIDDEN,
+            ))
+
+        # query_params etc. for the shared helpers; the user is already known
+        drf_request = Request(request)
+        drf_request.user = user
+        for throttle_class in getattr(view, 'throttle_classes', ()):
+            throttle = throttle_class()
+            try:
+                if not await throttle.aallow_request(drf_request, view):
+                    raise Throttled(throttle.wait())
+            except Throttled as exc:
+                return _render(Response(
+                    {'detail': exc.detail},
+                    status=exc.status_code,
+                    headers={'Retry-After': str(exc.wait)} if exc.wait is not None else None,
+                ))
+        try:
+            response = await view(drf_request, *args, **kwargs)
+        except Http404 as exc:
+            response = Response({'detail': str(exc)}, status=status.HTTP_404_NOT_FOUND)
+        return _render(response)
+    return wrapped
+
+
+async def paginate_by_page(queryset, request):
+    """
+    The page-number pagination of the sync list views: (the page's queryset, count/page fields)
+    """
+    paginator = Paginator(queryset, request.query_params.get('page_size', 10))
+    # Counted here so get_page() doesn't run a sync COUNT
+    paginator.count = await queryset.acount()
+    page_obj = paginator.get_page(request.query_params.get('page', 1))
+    return page_obj.object_list, {
+        'count': paginator.count,
+        'total_pages': paginator.num_pages,
+        'current_page': page_obj.number,
+    }
+
+
+async def _list_response(queryset, request, serializer_class):
+    # Pagination (keyset mode with ?cursor=, page numbers otherwise)
+    if is_cursor_request(request):
+        try:
+            rows, next_cursor = await apaginate_by_cursor(queryset, request)
+        except CursorError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'next_cursor': next_cursor, 'results': serializer_class(rows, many=True).data})
+
+    rows, page = await paginate_by_page(queryset, request)
+    return Response({**page, 'results': await fastpath.aserialize(serializer_class, rows)})
+
+
+@async_api_view
+@throttle_classes([CatalogueRateThrottle])
+@async_cache_response
+@read_from_replica
+async def company_list(request):
+    """
+    Async company_list
+    """
+    return await _list_response(filter_companies(request), request, CompanySerializer)
+
+
+@async_api_view
+@async_cache_response
+@read_from_replica
+async def company_detail(request, pk):
+    """
+    Async company_detail
+    """
+    company = await aget_object_or_404(Company, pk=pk, is_approved=True)
+    return Response(CompanySerializer(company).data)
+
+
+@async_api_view
+@throttle_classes([CatalogueRateThrottle])
+@async_cache_response
+@read_from_replica
+async def internship_list(request):
+    """
+    Async internship_list
+    """
+    return await _list_response(filter_internships(request), request, InternshipListingSerializer)
+
+
+@async_api_view
+@async_cache_response(scopes=lambda request, pk: [internship_scope(pk)])
+@read_from_replica
+async def internship_detail(request, pk):
+    """
+    Async internship_detail
+    """
+    internship = await aget_object_or_404(
+        plan_queryset(Internship.objects.all(), InternshipDetailSerializer),
+        pk=pk,
+        is_active=True,
+        company__is_approved=True
+    )
+    return Response(InternshipDetailSerializer(internship).data)
@@ -0,0 +1,209 @@
+# companies/benchmarking.py
+"""
+Helpers shared by the benchmark_* management commands
+"""
+import asyncio
+import os
+import statistics
+import time
+from datetime import date, timedelta
+
+from urllib.parse import parse_qsl, urlsplit
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.mail.backends import locmem
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from . import listings
+from .models import Company, Internship
+
+
+WORDS = (
+    'python django backend frontend react data analyst engineer marketing '
+    'finance accounting design mobile android cloud devops security network '
+    'research sales support operations logistics nursing teaching'
+).split()
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def call_path(path, user, method='get', data=None, headers=None):
+    """
+    Resolve `path` and call its view directly, skipping the middleware stack
+    """
+    parts = urlsplit(path)
+    match = resolve(parts.path)
+    factory = APIRequestFactory()
+    if method == 'get':
+        request = factory.get(parts.path, dict(parse_qsl(parts.query)), headers=headers)
+    else:
+        request = getattr(factory, method)(parts.path, data, format='json', headers=headers)
+    force_authenticate(request, user=user)
+    response = match.func(request, *match.args, **match.kwargs)
+    if hasattr(response, 'render'):
+        response.render()
+    return response
+
+
+def measure(func, iterations):
+    """
+    Call `func` repeatedly; return latency samples in ms and the query count of one call
+    """
+    with CaptureQueriesContext(connection) as queries:
+        func()
+
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples, len(queries)
+
+
+def summarize(samples):
+    return {
+        'p50': round(statistics.median(samples), 3),
+        'p90': round(percentile(samples, 90), 3),
+        'p99': round(percentile(samples, 99), 3),
+        'mean': round(statistics.fmean(samples), 3),
+    }
+
+
+def format_summary(samples):
+    summary = summarize(samples)
+    return f"p50={summary['p50']:.2f}ms p99={summary['p99']:.2f}ms"
+
+
+def current_rss_kb():
+    """
+    Resident set size of this process in KB (peak RSS where /proc is unavailable)
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') // 1024
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+async def _http_get(host, port, path, headers, connection):
+    """
+    One HTTP/1.1 GET over `connection` ([reader, writer], reopened as needed)
+    """
+    if connection[1] is None:
+        connection[:] = await asyncio.open_connection(host, port)
+    reader, writer = connection
+    lines = [f'GET {path} HTTP/1.1', f'Host: {host}:{port}']
+    lines += [f'{name}: {value}' for name, value in headers.items()]
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode())
+    await writer.drain()
+
+    head = await reader.readuntil(b'\r\n\r\n')
+    status_line, *header_lines = head.decode('latin-1').split('\r\n')
+    response_headers = dict(
+        line.lower().split(': ', 1) for line in header_lines if ': ' in line
+    )
+    if 'content-length' in response_headers:
+        await reader.readexactly(int(response_headers['content-length']))
+    elif response_headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if not size:
+                break
+    else:
+        await reader.read()
+        response_headers['connection'] = 'close'
+
+    if response_headers.get('connection') == 'close':
+        writer.close()
+        connection[:] = [None, None]
+    return int(status_line.split()[1])
+
+
+async def http_load(host, port, paths, headers, concurrency):
+    """
+    GET every path in `paths` with `concurrency` keep-alive clients
+
+    Returns (latency samples in ms, status code counts, elapsed seconds).
+    """
+    queue = iter(paths)
+    samples = []
+    statuses = {}
+
+    async def client():
+        connection = [None, None]
+        for path in queue:
+            started = time.perf_counter()
+            try:
+                code = await _http_get(host, port, path, headers, connection)
+            except (OSError, asyncio.IncompleteReadError):
+                code = 'error'
+                connection[:] = [None, None]
+            samples.append((time.perf_counter() - started) * 1000)
+            statuses[code] = statuses.get(code, 0) + 1
+        if connection[1] is not None:
+            connection[1].close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*[client() for _ in range(concurrency)])
+    return samples, statuses, time.perf_counter() - started
+
+
+class DelayedEmailBackend(locmem.EmailBackend):
+    """
+    In-memory email backend that waits BENCHMARK_EMAIL_DELAY_MS per send, like a remote SMTP server
+    """
+    def send_messages(self, messages):
+        time.sleep(getattr(settings, 'BENCHMARK_EMAIL_DELAY_MS', 0) / 1000)
+        return super().send_messages(messages)
+
+
+def seed_internships(count, name='Benchmark Ltd'):
+    """
+    bulk_create `count` synthetic internships under one approved company
+
+    Their listing rows are written too; the search index is left to the caller.
+    """
+    user = User.objects.create(username=f'benchmark-{User.objects.count()}')
+    company = Company.objects.create(
+        user=user,
+        company_name=name,
+        email=f'{user.username}@example.com',
+        phone='000',
+        address='-',
+        industry='Technology',
+        description='-',
+        is_approved=True,
+    )
+
+    today = date.today()
+    internships = []
+    for n in range(count):
+        # Two catalogue keywords per posting, padded with filler vocabulary
+        words = [WORDS[n % len(WORDS)], WORDS[(n * 7 + 3) % len(WORDS)]]
+        words += ['term%d' % ((n * 31 + k * 17) % 5000) for k in range(40)]
+        internships.append(Internship(
+            company=company,
+            title=' '.join(words[:3]).title(),
+            description=' '.join(words),
+            requirements=' '.join(reversed(words[:15])),
+            placement_type='internship',
+            duration_months=3,
+            positions_available=2,
+            location='Nairobi',
+            application_deadline=today + timedelta(days=n % 90),
+            start_date=today + timedelta(days=120),
+        ))
+    Internship.objects.bulk_create(internships, batch_size=1000)
+    listings.refresh_company(company.pk)
+    return company
@@ -0,0 +1,307 @@
+# companies/blobs.py
+"""
+Reference counts, garbage collection and downloads for stored blobs
+
+A Blob row per file in ContentAddressedStorage (see storage.py) counts the
+OWNER_FIELDS values naming it. signals.py keeps the counts as students and
+companies are saved and deleted: retain() the names a save stores,
+release() the ones it replaces or a delete drops. Bulk writes that bypass
+the signals leave the counts wrong until recount(), which `manage.py
+collect_blobs` runs first. Listing rows copy their company's logo names
+and aren't counted; a replaced logo lives out its grace period while the
+listings catch up.
+
+collect_garbage() removes the blob files nothing references once they
+have been unreferenced (and untouched on disk) for the grace period. The
+wait covers uploads whose row isn't committed yet: storage.py refreshes
+a blob's mtime whenever an upload lands on it.
+
+serve() answers a download with a FileResponse of the open file, which
+WSGI servers with a file wrapper (gunicorn) send with sendfile(). Single
+byte ranges are honoured, also through sendfile, as a window of the
+file. With BLOB_ACCEL_REDIRECT set (an nginx `internal` location aliasing
+MEDIA_ROOT), the web server sends the file and handles ranges itself.
+"""
+import mimetypes
+import os
+import re
+import time
+from collections import Counter
+from datetime import timedelta
+from urllib.parse import quote
+
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models import F, Q
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils import timezone
+
+from students.models import Student
+
+from .models import Blob, Company
+from .storage import BLOB_DIRS, blob_storage, digest_of
+
+
+# Fields whose values are counted as references
+OWNER_FIELDS = [(Student, 'resume'), (Company, 'logo'), (Company, 'logo_thumbnail'), (Company, 'logo_webp')]
+
+DEFAULT_GRACE = timedelta(days=1)
+
+RANGE_RE = re.compile(r'bytes=(\d*)-(\d*)')
+
+
+def owner_fields(instance):
+    return [field for model, field in OWNER_FIELDS if isinstance(instance, model)]
+
+
+def names_of(instance, fields=None):
+    """
+    The blob names an instance's owner fields (or `fields` of them) hold
+    """
+    names = []
+    for field in owner_fields(instance) if fields is None else fields:
+        name = getattr(instance, field).name
+        if digest_of(name):
+            names.append(name)
+    return names
+
+
+def _size(name):
+    # Both storages share MEDIA_ROOT, so either finds any blob
+    try:
+        return blob_storage.size(name)
+    except FileNotFoundError:
+        return 0
+
+
+def retain(names, using=None):
+    counts = Counter(name for name in names if digest_of(name))
+    if not counts:
+        return
+    using = using or router.db_for_write(Blob)
+    manager = Blob.objects.db_manager(using)
+    manager.bulk_create([Blob(name=name, size=_size(name)) for name in counts], ignore_conflicts=True)
+    for count, group in _by_count(counts).items():
+        manager.filter(name__in=group).update(references=F('references') + count, released_at=None)
+
+
+def release(names, using=None):
+    counts = Counter(name for name in names if digest_of(name))
+    if not counts:
+        return
+    manager = Blob.objects.db_manager(using or router.db_for_write(Blob))
+    for count, group in _by_count(counts).items():
+        manager.filter(name__in=group).update(references=F('references') - count)
+    manager.filter(name__in=counts, references__lte=0, released_at__isnull=True).update(released_at=timezone.now())
+
+
+def _by_count(counts):
+    groups = {}
+    for name, count in counts.items():
+        groups.setdefault(count, []).append(name)
+    return groups
+
+
+def remember(instance, using=None, update_fields=None):
+    """
+    Before a save: note the blob names the saved fields hold now, to release whichever the save replaces
+    """
+    fields = owner_fields(instance)
+    if update_fields is not None:
+        fields = [field for field in fields if field in update_fields]
+    stored = None
+    if fields and not instance._state.adding:
+        stored = type(instance).objects.using(using).filter(pk=instance.pk).values_list(*fields).first()
+    instance._stored_blobs = (fields, [name for name in stored or () if digest_of(name)])
+
+
+def saved(instance, using=None):
+    """
+    After a save: count the new names and release the replaced ones
+    """
+    fields, stored = getattr(instance, '_stored_blobs', (owner_fields(instance), []))
+    stored, current = Counter(stored), Counter(names_of(instance, fields))
+    retain((current - stored).elements(), using)
+    release((stored - current).elements(), using)
+
+
+def recount(apply=True):
+    """
+    Compare every Blob's references with the owner fields and optionally fix them
+
+    Returns the names whose counts were wrong or missing.
+    """
+    expected = Counter()
+    for model, field in OWNER_FIELDS:
+        in_blob_dirs = Q()
+        for directory in BLOB_DIRS:
+            in_blob_dirs |= Q(**{f'{field}__startswith': f'{directory}/'})
+        expected.update(
+            name for name in model.objects.filter(in_blob_dirs)
+            .values_list(field, flat=True).iterator(chunk_size=5000)
+            if digest_of(name)
+        )
+    stored = dict(Blob.objects.values_list('name', 'references').iterator(chunk_size=5000))
+    wrong = sorted(
+        name for name in set(expected) | set(stored)
+        if expected.get(name, 0) != stored.get(name, 0)
+    )
+    if apply and wrong:
+        now = timezone.now()
+        Blob.objects.bulk_create(
+            [Blob(name=name, size=_size(name)) for name in wrong if name not in stored], ignore_conflicts=True,
+        )
+        for name in wrong:
+            Blob.objects.filter(name=name).update(
+                references=expected.get(name, 0), released_at=None if expected.get(name) else now,
+            )
+    return wrong
+
+
+def collect_garbage(grace=DEFAULT_GRACE, apply=True):
+    """
+    Remove the blob files nothing has referenced for `grace`, and their rows
+
+    Returns (names removed, bytes freed). Temporary files left by interrupted
+    uploads go once they are older than `grace` too.
+    """
+    cutoff = time.time() - grace.total_seconds()
+    released_before = timezone.now() - grace
+    referenced = set(Blob.objects.filter(references__gt=0).values_list('name', flat=True).iterator(chunk_size=5000))
+    recently_released = set(
+        Blob.objects.filter(references__lte=0, released_at__gt=released_before)
+        .values_list('name', flat=True).iterator(chunk_size=5000)
+    )
+
+    removed, freed = [], 0
+    temp_root = blob_storage.temp_dir()
+    for root in BLOB_DIRS:
+        for directory, _, files in os.walk(blob_storage.path(root)):
+            in_temp = os.path.commonpath([directory, temp_root]) == temp_root
+            for filename in files:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, blob_storage.location).replace(os.sep, '/')
+                if not in_temp and (not digest_of(name) or name in referenced or name in recently_released):
+                    continue
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                if stat.st_mtime > cutoff:
+                    continue
+                if apply:
+                    os.remove(path)
+                removed.append(name)
+                freed += stat.st_size
+
+    if apply:
+        with transaction.atomic():
+            # Rows of removed files, and unreferenced rows whose file is gone
+            Blob.objects.filter(name__in=removed, references__lte=0).delete()
+            orphans = [
+                name for name in Blob.objects.filter(references__lte=0, released_at__lte=released_before)
+                .values_list('name', flat=True)
+                if not blob_storage.exists(name)
+            ]
+            Blob.objects.filter(name__in=orphans).delete()
+    return removed, freed
+
+
+class FileRange:
+    """
+    `length` bytes of an open file from its current position
+
+    fileno() is the file's own, so sendfile() starts at that position and
+    the server stops after Content-Length bytes.
+    """
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size) if size else b''
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    (start, end) inclusive of a single-range Range header; None to send the whole file, False if unsatisfiable
+    """
+    match = RANGE_RE.fullmatch((header or '').replace(' ', ''))
+    if not match or not any(match.groups()):
+        # Absent, malformed or multiple ranges: a full response is always allowed
+        return None
+    first, last = match.groups()
+    if not first:
+        length = int(last)
+        if not length:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return False
+    return start, end
+
+
+def serve(request, field_file, filename=None, max_age=3600):
+    """
+    Download response for a stored file, with Range support
+    """
+    name = field_file.name
+    if not name:
+        raise Http404
+    filename = filename or os.path.basename(name)
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    digest = digest_of(name)
+    etag = f'"{digest}"' if digest else None
+
+    accel = getattr(settings, 'BLOB_ACCEL_REDIRECT', None)
+    if accel:
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = accel + quote(name)
+        response['Content-Disposition'] = f"attachment; filename*=UTF-8''{quote(filename)}"
+    elif etag and request.headers.get('If-None-Match') == etag:
+        response = HttpResponse(status=304)
+    else:
+        try:
+            file = field_file.storage.open(name, 'rb')
+        except FileNotFoundError:
+            raise Http404
+        size = os.fstat(file.fileno()).st_size
+        byte_range = None
+        # A blob's ETag is its content, so If-Range only fails against another file's
+        if request.headers.get('If-Range', etag) == etag:
+            byte_range = parse_range(request.headers.get('Range'), size)
+        if byte_range is False:
+            file.close()
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+        elif byte_range:
+            start, end = byte_range
+            file.seek(start)
+            response = FileResponse(
+                FileRange(file, end - start + 1), status=206, content_type=content_type,
+                as_attachment=True, filename=filename,
+            )
+            response['Content-Length'] = end - start + 1
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        else:
+            response = FileResponse(file, content_type=content_type, as_attachment=True, filename=filename)
+
+    response['Accept-Ranges'] = 'bytes'
+    # Private: these are per-user downloads, never for shared caches
+    response['Cache-Control'] = f'private, max-age={max_age}'
+    if etag:
+        response['ETag'] = etag
+    return response
@@ -0,0 +1,247 @@
+# companies/bulk.py
+"""
+Batch application submission and status transitions
+
+Both operations validate the whole batch up front with a fixed number of
+queries, write every valid item in one bulk statement inside a single
+transaction and report a result per item, in request order. bulk_create
+and bulk_update skip Application.save() and its signals, so the status
+counters and the internship_detail cache are maintained here.
+"""
+from django.db import router, transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from . import cache, counters, tasks
+from .models import Application, Internship
+
+
+MAX_BATCH_SIZE = 500
+
+# Statuses a company or admin may move an application to
+REVIEW_STATUSES = ['under_review', 'accepted', 'rejected']
+# Statuses an application can no longer leave
+FINAL_STATUSES = ['withdrawn']
+
+
+class SubmissionItemSerializer(serializers.Serializer):
+    internship = serializers.IntegerField(min_value=1)
+    cover_letter = serializers.CharField()
+
+
+class TransitionItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField(min_value=1)
+    status = serializers.ChoiceField(choices=REVIEW_STATUSES)
+    company_feedback = serializers.CharField(required=False, allow_blank=True)
+    admin_notes = serializers.CharField(required=False, allow_blank=True)
+
+
+class BatchSerializer(serializers.Serializer):
+    """
+    Checks the envelope only; items are validated one by one so a bad item
+    doesn't reject the rest of the batch
+    """
+    items = serializers.ListField(
+        child=serializers.DictField(), allow_empty=False, max_length=MAX_BATCH_SIZE
+    )
+
+
+def _shape_errors(item_serializer_class, items):
+    """
+    Validate the shape of every item; returns (valid {index: data}, errors {index: errors})
+    """
+    valid, errors = {}, {}
+    for index, item in enumerate(items):
+        serializer = item_serializer_class(data=item)
+        if serializer.is_valid():
+            valid[index] = serializer.validated_data
+        else:
+            errors[index] = serializer.errors
+    return valid, errors
+
+
+def _results(count, errors, succeeded):
+    return [
+        {'index': index, 'ok': False, 'errors': errors[index]} if index in errors
+        else {'index': index, 'ok': True, 'id': succeeded[index]}
+        for index in range(count)
+    ]
+
+
+def submit_applications(student, items):
+    """
+    Apply `student` to every internship in `items`
+
+    Two lookups cover the whole batch: the requested internships and the
+    student's existing applications to them. Returns a result per item.
+    """
+    valid, errors = _shape_errors(SubmissionItemSerializer, items)
+
+    internship_ids = {data['internship'] for data in valid.values()}
+    internships = Internship.objects.in_bulk(internship_ids)
+    already_applied = set(Application.objects.filter(
+        student=student, internship_id__in=internship_ids
+    ).values_list('internship_id', flat=True))
+
+    today = timezone.now().date()
+    seen = set()
+    pending = {}
+    for index, data in valid.items():
+        internship = internships.get(data['internship'])
+        if internship is None:
+            errors[index] = {'internship': ['Internship not found.']}
+        elif internship.pk in already_applied or internship.pk in seen:
+            errors[index] = {'non_field_errors': ['You have already applied for this internship.']}
+        elif not internship.is_active:
+            errors[index] = {'non_field_errors': ['This internship is no longer accepting applications.']}
+        elif internship.application_deadline < today:
+            errors[index] = {'non_field_errors': ['The application deadline has passed.']}
+        else:
+            seen.add(internship.pk)
+            pending[index] = Application(
+                student=student, internship=internship, cover_letter=data['cover_letter']
+            )
+
+    succeeded = {}
+    if pending:
+        using = router.db_for_write(Application)
+        with transaction.atomic(using=using):
+            Application.objects.using(using).bulk_create(pending.values())
+            counters.apply_transitions([
+                (application.student_id, application.internship_id, None, application.status)
+                for application in pending.values()
+            ], using)
+            tasks.enqueue_transition_effects([
+                (application.pk, None, application.status, application.updated_at)
+                for application in pending.values()
+            ], using)
+        succeeded = {index: application.pk for index, application in pending.items()}
+        for internship_id in seen:
+            cache.invalidate(cache.internship_scope(internship_id))
+        # The lists show applications_count too
+        cache.invalidate()
+
+    return _results(len(items), errors, succeeded)
+
+
+def reviewable_applications(user):
+    """
+    Applications `user` may review: all of them for staff, their own postings' for a company
+    """
+    if user.is_staff:
+        return Application.objects.all()
+    if hasattr(user, 'company'):
+        return Application.objects.filter(internship__company=user.company)
+    return Application.objects.none()
+
+
+def transition_applications(user, items):
+    """
+    Move a batch of applications to a review status with a single bulk_update
+
+    One lookup loads and locks every referenced application `user` may
+    review, inside the write transaction, so the status each transition
+    starts from is the stored one until the commit. One more reads the free
+    positions of the internships being accepted into. Acceptances beyond an
+    internship's free positions fail individually. If a concurrent
+    acceptance fills an internship between that check and the write
+    (counters.PositionsFilled), the batch is re-read and retried with that
+    internship marked full. Returns a result per item.
+    """
+    valid, shape_errors = _shape_errors(TransitionItemSerializer, items)
+    using = router.db_for_write(Application)
+    full = set()
+    while True:
+        errors = dict(shape_errors)
+        try:
+            with transaction.atomic(using=using):
+                changed = _plan_transitions(user, valid, errors, full, using)
+                _write_transitions(user, changed, using)
+        except counters.PositionsFilled as exc:
+            full.update(exc.internship_ids)
+            continue
+        for application, _ in changed.values():
+            application._loaded_status = application.status
+        succeeded = {index: application.pk for index, (application, _) in changed.items()}
+        return _results(len(items), errors, succeeded)
+
+
+def free_positions(internship_ids, using=None):
+    """
+    Positions still open on each internship, from the denormalized accepted counter
+    """
+    rows = Internship.objects.using(using).filter(pk__in=internship_ids).values_list(
+        'pk', 'positions_available', 'application_stats__accepted'
+    )
+    return {pk: positions - (accepted or 0) for pk, positions, accepted in rows}
+
+
+def _plan_transitions(user, valid, errors, full, using):
+    # Locked, so no concurrent review can change a status between this read and the write
+    applications = reviewable_applications(user).using(using).select_for_update(of=('self',)).only(
+        'pk', 'student_id', 'internship_id', 'status', 'company_feedback', 'admin_notes'
+    ).in_bulk({data['id'] for data in valid.values()})
+
+    accepting = {
+        application.internship_id for application in applications.values()
+        if application.status != 'accepted'
+    }
+    free = free_positions(accepting, using) if accepting else {}
+
+    seen = set()
+    changed = {}
+    for index, data in valid.items():
+        application = applications.get(data['id'])
+        if application is None:
+            errors[index] = {'id': ['Application not found.']}
+            continue
+        if application.pk in seen:
+            errors[index] = {'id': ['Application appears more than once in this batch.']}
+            continue
+        if application.status in FINAL_STATUSES:
+            errors[index] = {'status': [f'Cannot change a {application.status} application.']}
+            continue
+
+        internship_id = application.internship_id
+        if data['status'] == 'accepted' and application.status != 'accepted':
+            if internship_id in full or free.get(internship_id, 0) <= 0:
+                errors[index] = {'status': ['No positions left on this internship.']}
+                continue
+            free[internship_id] -= 1
+        elif application.status == 'accepted' and data['status'] != 'accepted':
+            free[internship_id] = free.get(internship_id, 0) + 1
+
+        seen.add(application.pk)
+        changed[index] = (application, data)
+    return changed
+
+
+def _write_transitions(user, changed, using):
+    if not changed:
+        return
+
+    now = timezone.now()
+    transitions = []
+    changes = []
+    for application, data in changed.values():
+        transitions.append(
+            (application.student_id, application.internship_id, application.status, data['status'])
+        )
+        changes.append((application.pk, application.status, data['status'], now))
+        application.status = data['status']
+        application.updated_at = now
+        for field in ('company_feedback', 'admin_notes'):
+            if field in data:
+                setattr(application, field, data[field])
+
+    fields = ['status', 'updated_at', 'company_feedback', 'admin_notes']
+    if not user.is_staff:
+        # Companies give feedback; only admins write notes
+        fields.remove('admin_notes')
+    # Runs in transition_applications' transaction, which holds the rows' locks
+    Application.objects.using(using).bulk_update(
+        [application for application, _ in changed.values()], fields
+    )
+    # Raises PositionsFilled, rolling back the update, if an internship filled up meanwhile
+    counters.apply_transitions(transitions, using)
+    tasks.enqueue_transition_effects(changes, using)
@@ -0,0 +1,249 @@
+# companies/cache.py
+"""
+Versioned response cache for the public catalogue endpoints
+
+Cached entries are keyed on a generation number plus the view and its
+normalized query parameters. Company/Internship saves and deletes bump the
+generation (see signals.py), once right away and once when their
+transaction commits, so older entries simply stop being looked up
+and expire on their own. internship_detail also depends on a per-internship
+generation, bumped when an application is created or deleted, because it
+shows applications_count.
+
+With DATABASE_REPLICAS, invalidate() also marks the catalogue as recently
+written for DATABASE_REPLICA_LAG_SECONDS, and routers.read_from_replica
+sends the views' reads to the primary meanwhile, so the misses that
+refill the cache right after a write don't read a replica that hasn't
+caught up yet.
+
+The cache alias and timeout come from CATALOGUE_CACHE_ALIAS (default
+'default') and CATALOGUE_CACHE_TIMEOUT (seconds, default 300; 0 disables).
+"""
+import hashlib
+import json
+import time
+from collections import Counter
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+
+CATALOGUE_SCOPE = 'catalogue'
+RECENT_WRITE_KEY = 'catalogue:recent-write'
+DEFAULT_REPLICA_LAG = 5
+
+# Hit/miss counters for benchmarks and diagnostics
+stats = Counter()
+
+
+def get_cache():
+    return caches[getattr(settings, 'CATALOGUE_CACHE_ALIAS', 'default')]
+
+
+def get_timeout():
+    return getattr(settings, 'CATALOGUE_CACHE_TIMEOUT', 300)
+
+
+def _generation_key(scope):
+    return f'{scope}:generation'
+
+
+def _new_generation():
+    # Never reuse a number, even if the counter itself was evicted
+    return time.time_ns()
+
+
+def get_generations(*scopes):
+    cache = get_cache()
+    keys = [_generation_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, _new_generation(), None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def get_replica_lag():
+    return getattr(settings, 'DATABASE_REPLICA_LAG_SECONDS', DEFAULT_REPLICA_LAG)
+
+
+def invalidate(scope=CATALOGUE_SCOPE):
+    """
+    Make every entry cached under `scope` unreachable
+    """
+    cache = get_cache()
+    key = _generation_key(scope)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _new_generation(), None)
+    if getattr(settings, 'DATABASE_REPLICAS', []) and get_replica_lag() > 0:
+        cache.set(RECENT_WRITE_KEY, True, get_replica_lag())
+
+
+def recently_written():
+    """
+    Whether the catalogue was invalidated within the last DATABASE_REPLICA_LAG_SECONDS
+    """
+    return bool(get_cache().get(RECENT_WRITE_KEY))
+
+
+async def arecently_written():
+    return bool(await get_cache().aget(RECENT_WRITE_KEY))
+
+
+def invalidate_on_commit(scope=CATALOGUE_SCOPE, using=None):
+    """
+    invalidate() now, and again once the writing transaction commits
+
+    A request that misses in between still reads the data from before the
+    commit and caches it; the second bump makes that entry unreachable too.
+    Outside a transaction both happen at once.
+    """
+    invalidate(scope)
+    transaction.on_commit(lambda: invalidate(scope), using=using)
+
+
+def internship_scope(pk):
+    return f'internship:{pk}'
+
+
+def normalize_params(query_params):
+    return urlencode(sorted(
+        (key, value) for key in query_params for value in query_params.getlist(key)
+    ))
+
+
+def make_etag(data):
+    payload = json.dumps(data, cls=JSONEncoder, sort_keys=True).encode()
+    return '"%s"' % hashlib.md5(payload).hexdigest()
+
+
+def etag_matches(request, etag):
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    candidates = [tag.strip().removeprefix('W/') for tag in header.split(',')]
+    return '*' in candidates or etag in candidates
+
+
+def response_key(view_name, generations, kwargs, query_params):
+    raw_key = '|'.join([
+        view_name,
+        ':'.join(str(generation) for generation in generations),
+        urlencode(sorted(kwargs.items())),
+        normalize_params(query_params),
+    ])
+    return 'catalogue:response:' + hashlib.md5(raw_key.encode()).hexdigest()
+
+
+def with_etag(request, response, etag):
+    if etag_matches(request, etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    response['ETag'] = etag
+    return response
+
+
+def cache_response(view=None, *, scopes=None):
+    """
+    Cache a GET catalogue view's successful responses
+
+    Goes under @api_view/@permission_classes, so authentication and
+    permission checks still run on every request. `scopes(request, **kwargs)`
+    may return extra generation scopes the response depends on.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            timeout = get_timeout()
+            if not timeout:
+                response = view(request, *args, **kwargs)
+                if response.status_code == status.HTTP_200_OK:
+                    response['ETag'] = make_etag(response.data)
+                return response
+
+            extra = scopes(request, *args, **kwargs) if scopes else []
+            generations = get_generations(CATALOGUE_SCOPE, *extra)
+            key = response_key(view.__name__, generations, kwargs, request.query_params)
+
+            cache = get_cache()
+            entry = cache.get(key)
+            if entry is None:
+                stats['miss'] += 1
+                response = view(request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                etag = make_etag(response.data)
+                cache.set(key, (etag, response.data), timeout)
+            else:
+                stats['hit'] += 1
+                etag, data = entry
+                response = Response(data)
+
+            return with_etag(request, response, etag)
+        return wrapped
+
+    if view is not None:
+        return decorator(view)
+    return decorator
+
+
+async def aget_generations(*scopes):
+    cache = get_cache()
+    keys = [_generation_key(scope) for scope in scopes]
+    found = await cache.aget_many(keys)
+    for key in keys:
+        if key not in found:
+            await cache.aadd(key, _new_generation(), None)
+            found[key] = await cache.aget(key)
+    return [found[key] for key in keys]
+
+
+def async_cache_response(view=None, *, scopes=None):
+    """
+    cache_response for the async catalogue views, through the cache's async API
+
+    Entries are shared with the sync views: the key is built from the view
+    name, so an async view with the same name reads the same entries.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapped(request, *args, **kwargs):
+            timeout = get_timeout()
+            if not timeout:
+                response = await view(request, *args, **kwargs)
+                if response.status_code == status.HTTP_200_OK:
+                    response['ETag'] = make_etag(response.data)
+                return response
+
+            extra = scopes(request, *args, **kwargs) if scopes else []
+            generations = await aget_generations(CATALOGUE_SCOPE, *extra)
+            key = response_key(view.__name__, generations, kwargs, request.query_params)
+
+            cache = get_cache()
+            entry = await cache.aget(key)
+            if entry is None:
+                stats['miss'] += 1
+                response = await view(request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                etag = make_etag(response.data)
+                await cache.aset(key, (etag, response.data), timeout)
+            else:
+                stats['hit'] += 1
+                etag, data = entry
+                response = Response(data)
+
+            return with_etag(request, response, etag)
+        return wrapped
+
+    if view is not None:
+        return decorator(view)
+    return decorator
@@ -0,0 +1,174 @@
+# companies/counters.py
+"""
+Per-student and per-internship application status counters
+
+Every Application write is reduced to a (student, internship, old status,
+new status) transition and applied with F() increments, inside the same
+transaction as the write. A missing row means "no applications yet", so
+rows are only created when an application is.
+
+The per-internship `accepted` increment doubles as the capacity check: it
+is a conditional UPDATE that only matches while the internship still has
+free positions, so concurrent acceptances can never overbook a posting.
+"""
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+
+from . import listings
+from .models import (
+    Application,
+    ApplicationStatusCounts,
+    Internship,
+    InternshipApplicationStats,
+    StudentApplicationStats,
+)
+
+
+COUNTER_FIELDS = ApplicationStatusCounts.COUNTER_FIELDS
+STATUSES = [value for value, _ in Application.STATUS_CHOICES]
+
+
+class PositionsFilled(Exception):
+    """
+    Accepting would take an internship past positions_available
+    """
+    def __init__(self, internship_ids):
+        self.internship_ids = sorted(internship_ids)
+        super().__init__(f'No positions left on internship(s) {", ".join(map(str, self.internship_ids))}')
+
+
+def empty_counts():
+    return dict.fromkeys(COUNTER_FIELDS, 0)
+
+
+def status_aggregates():
+    """
+    Conditional COUNTs for every status, for aggregate() or annotate()
+    """
+    aggregates = {'total': Count('pk')}
+    for value in STATUSES:
+        aggregates[value] = Count('pk', filter=Q(status=value))
+    return aggregates
+
+
+def aggregate_counts(applications):
+    """
+    Count an Application queryset per status in a single query
+    """
+    return applications.aggregate(**status_aggregates())
+
+
+def apply_transitions(transitions, using=None):
+    """
+    Apply (student_id, internship_id, old_status, new_status) transitions
+
+    old_status is None for a new application, new_status None for a deleted one.
+    Raises PositionsFilled (leaving the enclosing transaction to roll back)
+    if the accepted applications would exceed an internship's positions.
+    """
+    deltas = {
+        StudentApplicationStats: defaultdict(Counter),
+        InternshipApplicationStats: defaultdict(Counter),
+    }
+    created = {StudentApplicationStats: set(), InternshipApplicationStats: set()}
+
+    for student_id, internship_id, old, new in transitions:
+        if old == new:
+            continue
+        for model, key in ((StudentApplicationStats, student_id), (InternshipApplicationStats, internship_id)):
+            delta = deltas[model][key]
+            if old is None:
+                delta['total'] += 1
+                created[model].add(key)
+            else:
+                delta[old] -= 1
+            if new is None:
+                delta['total'] -= 1
+            else:
+                delta[new] += 1
+
+    for model, model_deltas in deltas.items():
+        _apply(model, model_deltas, created[model], using)
+    # The catalogue read model carries each internship's total
+    listings.add_applications(
+        {pk: delta['total'] for pk, delta in deltas[InternshipApplicationStats].items()}, using
+    )
+
+
+def _apply(model, deltas, created, using):
+    manager = model.objects.db_manager(using)
+    if created:
+        manager.bulk_create([model(pk=key) for key in created], ignore_conflicts=True)
+
+    # One UPDATE per distinct delta, covering every row that shares it
+    groups = defaultdict(list)
+    for key, delta in deltas.items():
+        delta = tuple(sorted((field, change) for field, change in delta.items() if change))
+        if delta:
+            groups[delta].append(key)
+
+    full = []
+    for delta, keys in groups.items():
+        queryset = manager.filter(pk__in=keys)
+        increments = {field: F(field) + change for field, change in delta}
+        accepted = dict(delta).get('accepted', 0)
+        if model is not InternshipApplicationStats or accepted <= 0:
+            queryset.update(**increments)
+            continue
+
+        has_room = Q(accepted__lte=_positions_available() - accepted)
+        try:
+            with transaction.atomic(using=using):
+                if queryset.filter(has_room).update(**increments) < len(keys):
+                    raise _NoRoom
+        except _NoRoom:
+            # Rolled back to the savepoint, so the stored counts tell which rows lacked room
+            full.extend(queryset.exclude(has_room).values_list('pk', flat=True))
+    if full:
+        raise PositionsFilled(full)
+
+
+class _NoRoom(Exception):
+    pass
+
+
+def _positions_available():
+    return Subquery(Internship.objects.filter(pk=OuterRef('pk')).values('positions_available'))
+
+
+def student_counts(student):
+    """
+    Dashboard counts for one student: a single primary-key row read
+    """
+    stats = StudentApplicationStats.objects.filter(pk=student.pk).first()
+    return stats.as_dict() if stats else empty_counts()
+
+
+def rebuild(model, apply=True):
+    """
+    Compare stored counters with live aggregates and optionally rewrite them
+
+    Returns the keys whose stored counts were wrong (including missing rows).
+    """
+    key = 'student' if model is StudentApplicationStats else 'internship'
+    live = {
+        row.pop(key): row
+        for row in Application.objects.values(key).annotate(**status_aggregates()).order_by()
+    }
+    stored = {row.pop('pk'): row for row in model.objects.values('pk', *COUNTER_FIELDS)}
+
+    wrong = [pk for pk, counts in live.items() if stored.get(pk) != counts]
+    stale = [pk for pk, counts in stored.items() if pk not in live and any(counts.values())]
+
+    if apply:
+        model.objects.filter(pk__in=stale).delete()
+        model.objects.bulk_create(
+            [model(pk=pk, **live[pk]) for pk in wrong],
+            update_conflicts=True,
+            unique_fields=[key],
+            update_fields=COUNTER_FIELDS,
+            batch_size=1000,
+        )
+    return wrong + stale
@@ -0,0 +1,232 @@
+# companies/expiry.py
+"""
+Deadline-based expiry of internships
+
+sweep() runs from `manage.py sweep_internships` (e.g. from cron) or, with
+EXPIRY_SWEEP_INTERVAL set, from a thread that the WSGI/ASGI entry points
+start. Each run:
+
+1. deactivates active internships whose application deadline has passed.
+   It uses batched UPDATEs over the partial index of active postings by
+   deadline, and drops the listing rows of those internships.
+2. if EXPIRY_ARCHIVE_AFTER_DAYS (or archive_after) is set, moves inactive
+   internships that many days past their deadline into the Archived* cold
+   tables. Their applications and those applications' events go with
+   them, and the rows are deleted from the live tables.
+
+Every batch is its own transaction, so an interrupted run keeps what it
+did and the next one carries on. Concurrent runs (one thread per server
+worker) are safe: deactivation is a conditional UPDATE, and archive
+batches are locked before they are copied. Each run is recorded as a
+SweepRun row, which the metrics endpoint reports.
+
+Archived applications leave the student counters at once. They leave the
+analytics rollups at the next rebuild.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connections, router, transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from . import cache, counters, search
+from .models import (
+    Application,
+    ApplicationEvent,
+    ArchivedApplication,
+    ArchivedInternship,
+    Internship,
+    InternshipApplicationStats,
+    InternshipListing,
+    SweepRun,
+)
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+
+INTERNSHIP_COLUMNS = [field.attname for field in Internship._meta.concrete_fields]
+APPLICATION_COLUMNS = [field.attname for field in Application._meta.concrete_fields]
+
+
+def deactivate_expired(today=None, batch_size=DEFAULT_BATCH_SIZE, using=None):
+    """
+    Set is_active = False on active internships with a deadline before `today`
+
+    Returns the number of internships deactivated.
+    """
+    today = today or timezone.localdate()
+    using = using or router.db_for_write(Internship)
+    expired = Internship.objects.using(using).filter(is_active=True, application_deadline__lt=today)
+    deactivated = 0
+    while True:
+        with transaction.atomic(using=using):
+            ids = list(expired.order_by('application_deadline', 'id').values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            # Still filtered on is_active, so rows another sweep just took are not counted twice
+            deactivated += expired.filter(pk__in=ids).update(is_active=False, updated_at=timezone.now())
+            # The update skips the save signals that maintain the listing
+            InternshipListing.objects.using(using).filter(pk__in=ids).delete()
+    return deactivated
+
+
+def _events_by_application(application_ids, using):
+    events = defaultdict(list)
+    rows = ApplicationEvent.objects.using(using).filter(application_id__in=application_ids).values(
+        'application_id', 'from_status', 'to_status', 'occurred_at',
+    ).order_by('occurred_at', 'id')
+    for row in rows:
+        events[row.pop('application_id')].append({**row, 'occurred_at': row['occurred_at'].isoformat()})
+    return events
+
+
+def archive(before, batch_size=DEFAULT_BATCH_SIZE, using=None):
+    """
+    Move inactive internships with a deadline before `before` into the cold tables
+
+    Returns (internships, applications) archived.
+    """
+    using = using or router.db_for_write(Internship)
+    candidates = Internship.objects.using(using).filter(is_active=False, application_deadline__lt=before)
+    archived_internships = archived_applications = 0
+    while True:
+        with transaction.atomic(using=using):
+            batch = candidates.order_by('pk')
+            if connections[using].features.has_select_for_update_skip_locked:
+                batch = batch.select_for_update(skip_locked=True)
+            internships = list(batch.values(*INTERNSHIP_COLUMNS)[:batch_size])
+            if not internships:
+                break
+            ids = [row['id'] for row in internships]
+            applications = list(
+                Application.objects.using(using).filter(internship_id__in=ids).values(*APPLICATION_COLUMNS)
+            )
+            events = _events_by_application([row['id'] for row in applications], using)
+
+            ArchivedInternship.objects.using(using).bulk_create(
+                [ArchivedInternship(**row) for row in internships], batch_size=500, ignore_conflicts=True,
+            )
+            ArchivedApplication.objects.using(using).bulk_create(
+                [ArchivedApplication(events=events.get(row['id'], []), **row) for row in applications],
+                batch_size=500, ignore_conflicts=True,
+            )
+
+            # What the per-row delete signals would do, for the whole batch at once
+            counters.apply_transitions([
+                (row['student_id'], row['internship_id'], row['status'], None) for row in applications
+            ], using)
+            search.remove_internships(ids, using)
+            ApplicationEvent.objects.using(using).filter(application__internship_id__in=ids).delete()
+            Application.objects.using(using).filter(internship_id__in=ids)._raw_delete(using)
+            InternshipApplicationStats.objects.using(using).filter(pk__in=ids).delete()
+            InternshipListing.objects.using(using).filter(pk__in=ids).delete()
+            Internship.objects.using(using).filter(pk__in=ids)._raw_delete(using)
+
+            archived_internships += len(internships)
+            archived_applications += len(applications)
+    return archived_internships, archived_applications
+
+
+def sweep(today=None, archive_after=None, batch_size=DEFAULT_BATCH_SIZE, using=None):
+    """
+    Deactivate expired internships, archive old ones, and record the run
+
+    archive_after defaults to EXPIRY_ARCHIVE_AFTER_DAYS; None skips
+    archiving. Returns the SweepRun.
+    """
+    started_at = timezone.now()
+    started = time.perf_counter()
+    today = today or timezone.localdate()
+    if archive_after is None:
+        archive_after = getattr(settings, 'EXPIRY_ARCHIVE_AFTER_DAYS', None)
+
+    deactivated = deactivate_expired(today, batch_size, using)
+    internships = applications = 0
+    if archive_after is not None:
+        internships, applications = archive(today - timedelta(days=archive_after), batch_size, using)
+    if deactivated or internships:
+        cache.invalidate()
+
+    return SweepRun.objects.db_manager(using or router.db_for_write(SweepRun)).create(
+        started_at=started_at,
+        duration_seconds=time.perf_counter() - started,
+        deactivated=deactivated,
+        archived_internships=internships,
+        archived_applications=applications,
+    )
+
+
+class Sweeper(threading.Thread):
+    """
+    Daemon thread calling sweep() every `interval` seconds until stop()
+    """
+
+    def __init__(self, interval):
+        super().__init__(name='expiry-sweeper', daemon=True)
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                run = sweep()
+                logger.info('Expiry sweep: %d deactivated, %d internships archived',
+                            run.deactivated, run.archived_internships)
+            except Exception:
+                logger.exception('Expiry sweep failed')
+            finally:
+                close_old_connections()
+
+    def stop(self):
+        self.stopped.set()
+
+
+def start_sweeper(interval=None):
+    """
+    Start a Sweeper if EXPIRY_SWEEP_INTERVAL (or `interval`) is set; returns it or None
+    """
+    interval = interval or getattr(settings, 'EXPIRY_SWEEP_INTERVAL', None)
+    if not interval:
+        return None
+    sweeper = Sweeper(interval)
+    sweeper.start()
+    return sweeper
+
+
+def metrics_text():
+    """
+    Sweep totals and the last run, in the Prometheus text format
+    """
+    totals = SweepRun.objects.aggregate(
+        runs=Count('pk'),
+        deactivated=Sum('deactivated'),
+        archived_internships=Sum('archived_internships'),
+        archived_applications=Sum('archived_applications'),
+    )
+    last = SweepRun.objects.order_by('-started_at').first()
+    metrics = [
+        ('internship_sweep_runs_total', 'counter', 'Expiry sweeps run', totals['runs']),
+        ('internship_sweep_deactivated_total', 'counter', 'Internships deactivated past their deadline',
+         totals['deactivated'] or 0),
+        ('internship_sweep_archived_internships_total', 'counter', 'Internships moved to the archive',
+         totals['archived_internships'] or 0),
+        ('internship_sweep_archived_applications_total', 'counter', 'Applications moved to the archive',
+         totals['archived_applications'] or 0),
+        ('internship_sweep_last_run_timestamp_seconds', 'gauge', 'Start of the last sweep',
+         last.started_at.timestamp() if last else 0),
+        ('internship_sweep_last_duration_seconds', 'gauge', 'Duration of the last sweep',
+         last.duration_seconds if last else 0),
+        ('internship_sweep_last_deactivated', 'gauge', 'Internships deactivated by the last sweep',
+         last.deactivated if last else 0),
+    ]
+    lines = []
+    for name, kind, help_text, value in metrics:
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}', f'{name} {value:g}']
+    return '\n'.join(lines) + '\n'
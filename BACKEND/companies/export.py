@@ -0,0 +1,149 @@
+# companies/export.py
+"""
+Streaming application / placement roster export
+
+Rows are read with a values_list projection through QuerySet.iterator(),
+which uses a server-side cursor on PostgreSQL and fetchmany() elsewhere,
+and are encoded a chunk at a time. Memory use therefore depends on
+`chunk_size`, not on how many rows are exported.
+"""
+import csv
+import io
+import json
+from datetime import date
+
+from django.core.exceptions import ValidationError
+from django.utils.dateparse import parse_date
+
+from .models import Application
+
+
+# (header, lookup) pairs, in output order
+COLUMNS = [
+    ('application_id', 'pk'),
+    ('status', 'status'),
+    ('admin_approved', 'admin_approved'),
+    ('applied_at', 'applied_at'),
+    ('updated_at', 'updated_at'),
+    ('student_id', 'student__student_id'),
+    ('first_name', 'student__first_name'),
+    ('last_name', 'student__last_name'),
+    ('email', 'student__email'),
+    ('course', 'student__course'),
+    ('year_of_study', 'student__year_of_study'),
+    ('institution_code', 'student__institution__code'),
+    ('institution_name', 'student__institution__name'),
+    ('internship_id', 'internship_id'),
+    ('internship_title', 'internship__title'),
+    ('placement_type', 'internship__placement_type'),
+    ('location', 'internship__location'),
+    ('start_date', 'internship__start_date'),
+    ('duration_months', 'internship__duration_months'),
+    ('company_name', 'internship__company__company_name'),
+    ('company_email', 'internship__company__email'),
+]
+HEADERS = [header for header, _ in COLUMNS]
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def filter_applications(params):
+    """
+    Applications matching the export filters in `params` (a dict or QueryDict)
+
+    institution, company: ids; status: comma-separated statuses;
+    applied_after / applied_before: ISO dates, inclusive.
+    Raises ValidationError for malformed values.
+    """
+    applications = Application.objects.all()
+
+    for param, lookup in (('institution', 'student__institution_id'), ('company', 'internship__company_id')):
+        value = params.get(param)
+        if value:
+            if not str(value).isdigit():
+                raise ValidationError(f'{param} must be an id')
+            applications = applications.filter(**{lookup: int(value)})
+
+    statuses = params.get('status')
+    if statuses:
+        statuses = [status for status in str(statuses).split(',') if status]
+        valid = {value for value, _ in Application.STATUS_CHOICES}
+        unknown = sorted(set(statuses) - valid)
+        if unknown:
+            raise ValidationError(f'Unknown status: {", ".join(unknown)}')
+        applications = applications.filter(status__in=statuses)
+
+    for param, lookup in (('applied_after', 'applied_at__date__gte'), ('applied_before', 'applied_at__date__lte')):
+        value = params.get(param)
+        if value:
+            parsed = value if isinstance(value, date) else parse_date(str(value))
+            if parsed is None:
+                raise ValidationError(f'{param} must be a YYYY-MM-DD date')
+            applications = applications.filter(**{lookup: parsed})
+
+    return applications
+
+
+def export_rows(applications, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Stream the projected columns of `applications` as tuples
+    """
+    return applications.order_by('pk').values_list(
+        *[lookup for _, lookup in COLUMNS]
+    ).iterator(chunk_size=chunk_size)
+
+
+def _chunks(rows, chunk_size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def encode_csv(rows, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    CSV text, the header first and then one string per chunk of rows
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(HEADERS)
+    yield buffer.getvalue()
+
+    for chunk in _chunks(rows, chunk_size):
+        buffer.seek(0)
+        buffer.truncate()
+        # Dates and datetimes are written with str(), e.g. 2025-01-31 09:30:00+00:00
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+
+
+def encode_ndjson(rows, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    One JSON object per line, one string per chunk of rows
+    """
+    for chunk in _chunks(rows, chunk_size):
+        yield ''.join(
+            json.dumps(dict(zip(HEADERS, row)), default=str) + '\n' for row in chunk
+        )
+
+
+ENCODERS = {
+    'csv': encode_csv,
+    'ndjson': encode_ndjson,
+}
+
+
+def stream(applications, export_format, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Encoded export of `applications` as an iterator of strings
+    """
+    return ENCODERS[export_format](export_rows(applications, chunk_size), chunk_size)
@@ -0,0 +1,250 @@
+# companies/fastpath.py
+"""
+Fast path for high-volume list responses
+
+With FAST_SERIALIZERS = True, the list views build their rows with
+serialize() instead of serializer_class(page, many=True).data. serialize()
+compiles a serializer class once into a plan:
+
+- the values_list() paths its fields read, nested serializers included
+- a converter per field: nothing for the fields whose DRF representation
+  of a database value is the value itself (text, integers, booleans, ids);
+  the field's own to_representation() for the rest (dates, decimals,
+  choices); the storage URL for files
+
+Rows are then built from the tuples of one values_list() query: no model
+instances, no per-row field lookups. A SerializerMethodField is supported
+when the serializer's Meta names the paths the method reads:
+
+    class Meta:
+        fast_methods = {'student_name': ['student__first_name', 'student__last_name']}
+
+and its method is called with an object holding just those attributes.
+Serializers the plan can't express raise Unsupported when compiled.
+serialize() uses no serializer context, as the list views don't, so file
+URLs are relative.
+
+FastJSONRenderer renders with orjson when it is installed (and the setting
+is on), falling back to JSONRenderer otherwise. Both produce the same
+bytes for these payloads (text, numbers, booleans, nulls). The exception
+is non-finite floats, which orjson writes as null; no list serializer
+returns floats.
+"""
+import threading
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import FileField
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from .profiling import serializing
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Fields whose representation of a value loaded from the database is the value
+IDENTITY_FIELDS = (
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.BooleanField,
+    serializers.PrimaryKeyRelatedField,
+    serializers.ReadOnlyField,
+)
+
+
+class Unsupported(Exception):
+    pass
+
+
+def is_enabled():
+    return getattr(settings, 'FAST_SERIALIZERS', False)
+
+
+def _model_field(model, source):
+    """
+    The model field at the end of a dotted `source`, or None if it isn't one
+    """
+    names = source.split('.')
+    for name in names[:-1]:
+        try:
+            model = model._meta.get_field(name).related_model
+        except FieldDoesNotExist:
+            return None
+        if model is None:
+            return None
+    try:
+        return model._meta.get_field(names[-1])
+    except FieldDoesNotExist:
+        return None
+
+
+def _file_url(storage):
+    def convert(name):
+        return storage.url(name) if name else None
+    return convert
+
+
+def _method_getter(method, paths, indexes):
+    """
+    Call a SerializerMethodField's method with an object holding `paths` (e.g. student__first_name)
+    """
+    def get(row):
+        obj = SimpleNamespace()
+        for path, index in zip(paths, indexes):
+            *parents, leaf = path.split('__')
+            target = obj
+            for parent in parents:
+                if not hasattr(target, parent):
+                    setattr(target, parent, SimpleNamespace())
+                target = getattr(target, parent)
+            setattr(target, leaf, row[index])
+        return method(obj)
+    return get
+
+
+def _value_getter(index, convert):
+    if convert is None:
+        return lambda row: row[index]
+
+    def get(row):
+        value = row[index]
+        # As Serializer.to_representation: None is never passed to the field
+        return None if value is None else convert(value)
+    return get
+
+
+def _nested_getter(pk_index, build):
+    def get(row):
+        return None if row[pk_index] is None else build(row)
+    return get
+
+
+def _compile(serializer_class, prefix, columns):
+    """
+    Append the values_list() paths `serializer_class` reads to `columns`; returns a row -> dict function
+    """
+    def column(path):
+        columns.append(prefix + path)
+        return len(columns) - 1
+
+    serializer = serializer_class()
+    meta = serializer.Meta
+    model = meta.model
+    getters = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        label = f'{serializer_class.__name__}.{name}'
+        if isinstance(field, serializers.SerializerMethodField):
+            paths = getattr(meta, 'fast_methods', {}).get(name)
+            if paths is None:
+                raise Unsupported(f'{label}: no Meta.fast_methods entry')
+            indexes = [column(path) for path in paths]
+            getters.append((name, _method_getter(getattr(serializer, field.method_name), paths, indexes)))
+            continue
+
+        if isinstance(field, serializers.ListSerializer) or field.source == '*':
+            raise Unsupported(label)
+
+        if isinstance(field, serializers.BaseSerializer):
+            relation = _model_field(model, field.source)
+            if relation is None or not relation.is_relation:
+                raise Unsupported(label)
+            path = field.source.replace('.', '__')
+            pk_index = column(f'{path}__pk')
+            build = _compile(type(field), f'{prefix}{path}__', columns)
+            getters.append((name, _nested_getter(pk_index, build)))
+            continue
+
+        model_field = _model_field(model, field.source)
+        if model_field is None:
+            # A plain class attribute, such as InternshipListing.is_active
+            value = getattr(model, field.source, None)
+            if not isinstance(value, (bool, int, str)):
+                raise Unsupported(label)
+            constant = field.to_representation(value)
+            getters.append((name, lambda row, constant=constant: constant))
+            continue
+
+        if isinstance(model_field, FileField):
+            convert = _file_url(model_field.storage)
+        elif isinstance(field, IDENTITY_FIELDS):
+            convert = None
+        else:
+            convert = field.to_representation
+        getters.append((name, _value_getter(column(field.source.replace('.', '__')), convert)))
+
+    def build(row):
+        return {name: get(row) for name, get in getters}
+    return build
+
+
+class Plan:
+    def __init__(self, serializer_class):
+        self.columns = []
+        self.build = _compile(serializer_class, '', self.columns)
+
+    def rows(self, queryset):
+        return queryset.values_list(*self.columns)
+
+
+_plans = {}
+_plans_lock = threading.Lock()
+
+
+def get_plan(serializer_class):
+    plan = _plans.get(serializer_class)
+    if plan is None:
+        with _plans_lock:
+            plan = _plans.get(serializer_class)
+            if plan is None:
+                plan = _plans[serializer_class] = Plan(serializer_class)
+    return plan
+
+
+def serialize(serializer_class, queryset):
+    """
+    serializer_class(queryset, many=True).data, from a values_list() projection when FAST_SERIALIZERS is on
+    """
+    if not is_enabled():
+        return serializer_class(queryset, many=True).data
+    plan = get_plan(serializer_class)
+    # Timed like serializer.data is (see profiling.py)
+    with serializing():
+        return [plan.build(row) for row in plan.rows(queryset)]
+
+
+async def aserialize(serializer_class, queryset):
+    if not is_enabled():
+        return serializer_class([row async for row in queryset.aiterator()], many=True).data
+    plan = get_plan(serializer_class)
+    with serializing():
+        return [plan.build(row) async for row in plan.rows(queryset)]
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer, through orjson when it is installed and FAST_SERIALIZERS is on
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or data is None or not is_enabled()
+            or self.ensure_ascii or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            # Datetimes go through DRF's encoder, for its format
+            content = orjson.dumps(data, default=self.encoder_class().default,
+                                   option=orjson.OPT_PASSTHROUGH_DATETIME)
+        except TypeError:
+            # e.g. non-string dict keys, which json.dumps converts
+            return super().render(data, accepted_media_type, renderer_context)
+        # As JSONRenderer does, so the output is also valid JavaScript
+        return content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
@@ -0,0 +1,327 @@
+# companies/importer.py
+"""
+Chunked, resumable CSV import of students and internships
+
+The file is read a chunk at a time. Each chunk is validated row by row for
+shape, then checked against the database with a fixed number of set-based
+lookups (institutions, existing students/users or companies/internships)
+and upserted with bulk_create(update_conflicts=True) in its own
+transaction.
+
+Rejected rows go to an error report (line, field, message). After every
+committed chunk a checkpoint records how many rows are done and how long
+the error report is, so an interrupted import resumes at the next chunk
+instead of row zero.
+"""
+import csv
+import json
+import os
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Q
+from rest_framework import serializers
+
+from institution.models import Institution
+from students.models import Student
+
+from . import cache, listings, search
+from .models import Company, Internship, StalePlacementGroup
+
+
+DEFAULT_CHUNK_SIZE = 1000
+ERROR_HEADERS = ['line', 'field', 'message']
+
+
+class StudentRowSerializer(serializers.Serializer):
+    student_id = serializers.CharField(max_length=20)
+    first_name = serializers.CharField(max_length=100)
+    last_name = serializers.CharField(max_length=100)
+    email = serializers.EmailField()
+    phone = serializers.CharField(max_length=15)
+    institution_code = serializers.CharField(max_length=20)
+    course = serializers.CharField(max_length=200)
+    year_of_study = serializers.IntegerField(min_value=1, max_value=10)
+    is_approved = serializers.BooleanField(required=False, default=False)
+    username = serializers.CharField(max_length=150, required=False)
+
+
+class InternshipRowSerializer(serializers.Serializer):
+    id = serializers.IntegerField(min_value=1, required=False)
+    company_email = serializers.EmailField()
+    title = serializers.CharField(max_length=200)
+    description = serializers.CharField()
+    requirements = serializers.CharField()
+    placement_type = serializers.ChoiceField(choices=Internship.PLACEMENT_TYPE)
+    duration_months = serializers.IntegerField(min_value=1)
+    positions_available = serializers.IntegerField(min_value=0)
+    location = serializers.CharField(max_length=200)
+    stipend = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    application_deadline = serializers.DateField()
+    start_date = serializers.DateField()
+    is_active = serializers.BooleanField(required=False, default=True)
+
+
+class StudentImporter:
+    """
+    Upserts students keyed on student_id; new students get a user named
+    after `username` (default: the student_id) with an unusable password
+    """
+    row_serializer = StudentRowSerializer
+    update_fields = ['first_name', 'last_name', 'email', 'phone', 'institution', 'course',
+                     'year_of_study', 'is_approved', 'updated_at']
+
+    def resolve(self, rows, errors):
+        """
+        Turn validated rows into Student instances; three lookups per chunk
+        """
+        institutions = dict(Institution.objects.filter(
+            code__in={data['institution_code'] for _, data in rows}
+        ).values_list('code', 'id'))
+        existing = {}
+        owners = {}
+        # Placement groups (analytics.PLACEMENT_KEY) the existing students are in now
+        groups = {}
+        for student_id, email, user_id, *group in Student.objects.filter(
+            Q(student_id__in={data['student_id'] for _, data in rows})
+            | Q(email__in={data['email'] for _, data in rows})
+        ).values_list('student_id', 'email', 'user_id', 'institution_id', 'course', 'year_of_study'):
+            existing[student_id] = user_id
+            owners[email] = student_id
+            groups[student_id] = tuple(group)
+
+        new_usernames = {
+            data.get('username') or data['student_id']
+            for _, data in rows if data['student_id'] not in existing
+        }
+        taken_usernames = set(User.objects.filter(
+            username__in=new_usernames
+        ).values_list('username', flat=True))
+
+        seen = {}
+        accepted = []
+        for line, data in rows:
+            student_id, email = data['student_id'], data['email']
+            if data['institution_code'] not in institutions:
+                errors.append((line, 'institution_code', f'Unknown institution {data["institution_code"]}'))
+            elif owners.get(email, student_id) != student_id:
+                errors.append((line, 'email', f'{email} belongs to student {owners[email]}'))
+            elif student_id in seen or email in seen:
+                errors.append((line, 'student_id', f'Duplicate of line {seen.get(student_id) or seen[email]}'))
+            elif student_id not in existing and (data.get('username') or student_id) in taken_usernames:
+                errors.append((line, 'username', f'Username {data.get("username") or student_id} is taken'))
+            else:
+                seen[student_id] = seen[email] = line
+                accepted.append(data)
+
+        # Unusable either way; one random suffix per chunk rather than per user
+        password = make_password(None)
+        new_users = [
+            User(username=data.get('username') or data['student_id'], email=data['email'],
+                 first_name=data['first_name'], last_name=data['last_name'], password=password)
+            for data in accepted if data['student_id'] not in existing
+        ]
+        students = [
+            Student(
+                user_id=existing.get(data['student_id']),
+                student_id=data['student_id'],
+                first_name=data['first_name'],
+                last_name=data['last_name'],
+                email=data['email'],
+                phone=data['phone'],
+                institution_id=institutions[data['institution_code']],
+                course=data['course'],
+                year_of_study=data['year_of_study'],
+                is_approved=data['is_approved'],
+            )
+            for data in accepted
+        ]
+        # bulk_create skips the pre_save receiver that records the groups students leave
+        left_groups = {
+            groups[student.student_id] for student in students
+            if student.student_id in groups
+            and groups[student.student_id] != (student.institution_id, student.course, student.year_of_study)
+        }
+        return new_users, students, sum(1 for data in accepted if data['student_id'] in existing), left_groups
+
+    def write(self, resolved):
+        new_users, students, updated, left_groups = resolved
+        if new_users:
+            User.objects.bulk_create(new_users)
+            user_ids = dict(User.objects.filter(
+                username__in=[user.username for user in new_users]
+            ).values_list('username', 'id'))
+            by_email = {user.email: user_ids[user.username] for user in new_users}
+            for student in students:
+                if student.user_id is None:
+                    student.user_id = by_email[student.email]
+        if students:
+            Student.objects.bulk_create(
+                students, update_conflicts=True, unique_fields=['student_id'], update_fields=self.update_fields,
+            )
+            StalePlacementGroup.objects.bulk_create([
+                StalePlacementGroup(institution_id=institution_id, course=course, year_of_study=year_of_study)
+                for institution_id, course, year_of_study in left_groups
+            ])
+        return len(students) - updated, updated
+
+
+class InternshipImporter:
+    """
+    Creates internships, or updates them when an existing `id` is given
+    """
+    row_serializer = InternshipRowSerializer
+    update_fields = ['company', 'title', 'description', 'requirements', 'placement_type',
+                     'duration_months', 'positions_available', 'location', 'stipend',
+                     'application_deadline', 'start_date', 'is_active', 'updated_at']
+
+    def resolve(self, rows, errors):
+        """
+        Turn validated rows into Internship instances; two lookups per chunk
+        """
+        companies = dict(Company.objects.filter(
+            email__in={data['company_email'] for _, data in rows}
+        ).values_list('email', 'id'))
+        existing = set(Internship.objects.filter(
+            pk__in={data['id'] for _, data in rows if 'id' in data}
+        ).values_list('pk', flat=True))
+
+        seen = {}
+        internships = []
+        for line, data in rows:
+            pk = data.get('id')
+            if data['company_email'] not in companies:
+                errors.append((line, 'company_email', f'Unknown company {data["company_email"]}'))
+            elif pk is not None and pk not in existing:
+                errors.append((line, 'id', f'Internship {pk} does not exist'))
+            elif pk is not None and pk in seen:
+                errors.append((line, 'id', f'Duplicate of line {seen[pk]}'))
+            else:
+                if pk is not None:
+                    seen[pk] = line
+                fields = {name: value for name, value in data.items() if name not in ('id', 'company_email')}
+                internships.append(Internship(pk=pk, company_id=companies[data['company_email']], **fields))
+        return internships, len(seen)
+
+    def write(self, resolved):
+        internships, updated = resolved
+        if internships:
+            Internship.objects.bulk_create(
+                internships, update_conflicts=True, unique_fields=['id'], update_fields=self.update_fields,
+            )
+            # bulk_create skips the signals that maintain these
+            search.index_internships(internship.pk for internship in internships)
+            listings.refresh_internships(internship.pk for internship in internships)
+            cache.invalidate_on_commit()
+        return len(internships) - updated, updated
+
+
+IMPORTERS = {
+    'students': StudentImporter,
+    'internships': InternshipImporter,
+}
+
+
+def validate_rows(serializer_class, rows):
+    """
+    Split (line, raw row) pairs into validated (line, data) pairs and (line, field, message) errors
+    """
+    valid, errors = [], []
+    # One instance for the whole chunk: building a serializer deep-copies its
+    # fields, which costs more than validating a row
+    serializer = serializer_class()
+    for line, raw in rows:
+        # Blank cells count as missing, so optional columns can be left empty
+        data = {key: value for key, value in raw.items() if value not in ('', None)}
+        try:
+            valid.append((line, serializer.run_validation(data)))
+        except serializers.ValidationError as exc:
+            for field, messages in exc.detail.items():
+                errors.extend((line, field, str(message)) for message in messages)
+    return valid, errors
+
+
+def read_checkpoint(path, kind, source):
+    """
+    Saved progress for this source file, or None to start from the beginning
+    """
+    if not path or not os.path.exists(path):
+        return None
+    with open(path) as checkpoint_file:
+        checkpoint = json.load(checkpoint_file)
+    if checkpoint.get('kind') != kind or checkpoint.get('source') != os.path.abspath(source):
+        return None
+    return checkpoint
+
+
+def write_checkpoint(path, checkpoint):
+    # Write-then-rename, so a crash never leaves a half-written checkpoint
+    partial = f'{path}.tmp'
+    with open(partial, 'w') as checkpoint_file:
+        json.dump(checkpoint, checkpoint_file)
+    os.replace(partial, path)
+
+
+def run_import(kind, source, chunk_size=DEFAULT_CHUNK_SIZE, checkpoint_path=None, error_path=None,
+               on_chunk=None):
+    """
+    Import the CSV file at `source`, resuming from `checkpoint_path` if it matches
+
+    Returns the final checkpoint dict: rows, created, updated and failed
+    counts. The checkpoint file is removed once the whole file is imported.
+    `on_chunk(checkpoint)` is called after every committed chunk.
+    """
+    importer = IMPORTERS[kind]()
+    checkpoint = read_checkpoint(checkpoint_path, kind, source) or {
+        'kind': kind, 'source': os.path.abspath(source),
+        'rows': 0, 'created': 0, 'updated': 0, 'failed': 0, 'error_bytes': 0,
+    }
+
+    error_file = None
+    if error_path:
+        # Drop anything written after the last checkpoint; that chunk is redone
+        error_file = open(error_path, 'a+', newline='')
+        error_file.truncate(checkpoint['error_bytes'])
+        error_file.seek(0, os.SEEK_END)
+        if not checkpoint['error_bytes']:
+            csv.writer(error_file).writerow(ERROR_HEADERS)
+    try:
+        with open(source, newline='') as source_file:
+            reader = csv.DictReader(source_file)
+            for _ in islice(reader, checkpoint['rows']):
+                pass
+
+            while True:
+                chunk = []
+                for raw in islice(reader, chunk_size):
+                    chunk.append((reader.line_num, raw))
+                if not chunk:
+                    break
+
+                valid, errors = validate_rows(importer.row_serializer, chunk)
+                with transaction.atomic():
+                    resolved = importer.resolve(valid, errors) if valid else None
+                    created, updated = importer.write(resolved) if resolved else (0, 0)
+
+                failed_lines = {line for line, _, _ in errors}
+                checkpoint['rows'] += len(chunk)
+                checkpoint['created'] += created
+                checkpoint['updated'] += updated
+                checkpoint['failed'] += len(failed_lines)
+                if error_file:
+                    csv.writer(error_file).writerows(sorted(errors))
+                    error_file.flush()
+                    checkpoint['error_bytes'] = error_file.tell()
+                if checkpoint_path:
+                    write_checkpoint(checkpoint_path, checkpoint)
+                if on_chunk:
+                    on_chunk(checkpoint)
+    finally:
+        if error_file:
+            error_file.close()
+
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return checkpoint
@@ -0,0 +1,241 @@
+# companies/jobs.py
+"""
+Database-backed background job queue
+
+Side effects that don't have to finish inside a request (emails, audit
+entries) are registered with @task and queued with enqueue(). The job row
+is inserted in the caller's transaction, so a job exists exactly when the
+write that queued it commits, and no broker is needed. `manage.py run_jobs`
+claims due jobs and runs them on a thread pool.
+
+Delivery is at least once: a job whose worker dies is claimed again once
+its lease expires, so tasks must be safe to repeat. Jobs queued with the
+same idempotency key are only stored once. A failing job is retried with
+exponential backoff (retry_delay) until max_attempts, then left as
+'failed' with the error text.
+
+Succeeded jobs are kept for JOBS_RETENTION_SECONDS (default a week), while
+their idempotency keys still keep a duplicate out, then prune() deletes
+them. The worker loop prunes every PRUNE_INTERVAL seconds, so the table
+holds only recent jobs. Failed jobs stay until someone looks at them.
+
+With JOBS_EAGER = True jobs run as soon as they are queued, in the
+caller's transaction, without touching the table.
+"""
+import os
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connections, router, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+
+DEFAULT_MAX_ATTEMPTS = 5
+BACKOFF_BASE_SECONDS = 5
+BACKOFF_MAX_SECONDS = 3600
+# A running job not finished within this many seconds is claimed again
+LEASE_SECONDS = 300
+ENQUEUE_BATCH_SIZE = 500
+DEFAULT_RETENTION_SECONDS = 7 * 24 * 3600
+PRUNE_INTERVAL = 3600
+PRUNE_BATCH_SIZE = 1000
+
+# name -> (function, max_attempts)
+TASKS = {}
+
+
+def task(name, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """
+    Register the decorated function as task `name`; it is called with the payload as keyword arguments
+    """
+    def decorator(func):
+        TASKS[name] = (func, max_attempts)
+        return func
+    return decorator
+
+
+def is_eager():
+    return getattr(settings, 'JOBS_EAGER', False)
+
+
+def retry_delay(attempts):
+    """
+    Seconds to wait before the next try, after `attempts` failed ones
+    """
+    return min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS)
+
+
+def enqueue(name, payload, key=None, delay=0, using=None):
+    """
+    Queue one job; see enqueue_many
+    """
+    enqueue_many([(name, payload, key)], delay, using)
+
+
+def enqueue_many(jobs, delay=0, using=None):
+    """
+    Queue (name, payload, idempotency key or None) jobs with bulk inserts
+
+    Jobs whose key is already queued (or was run) are skipped.
+    """
+    if is_eager():
+        for name, payload, _ in jobs:
+            TASKS[name][0](**payload)
+        return
+
+    using = using or router.db_for_write(Job)
+    run_after = timezone.now() + timedelta(seconds=delay)
+    Job.objects.using(using).bulk_create([
+        Job(task=name, payload=payload, idempotency_key=key, run_after=run_after,
+            max_attempts=TASKS[name][1])
+        for name, payload, key in jobs
+    ], batch_size=ENQUEUE_BATCH_SIZE, ignore_conflicts=True)
+
+
+def default_worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim(worker, limit, using=None):
+    """
+    Lock up to `limit` due jobs for `worker` and return them
+
+    Due jobs are queued ones whose run_after has passed, and running ones
+    whose lease has expired. Rows are taken with a conditional UPDATE, so
+    two workers never claim the same job; PostgreSQL also skips rows
+    locked by other claims.
+    """
+    using = using or router.db_for_write(Job)
+    now = timezone.now()
+    due = Q(status='queued', run_after__lte=now) | Q(
+        status='running', locked_at__lt=now - timedelta(seconds=LEASE_SECONDS)
+    )
+    jobs = Job.objects.using(using)
+    with transaction.atomic(using=using):
+        candidates = jobs.filter(due).order_by('run_after', 'pk')
+        if connections[using].features.has_select_for_update_skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+        ids = list(candidates.values_list('pk', flat=True)[:limit])
+        if not ids:
+            return []
+        jobs.filter(due, pk__in=ids).update(
+            status='running', locked_by=worker, locked_at=now, attempts=F('attempts') + 1, updated_at=now,
+        )
+    return list(jobs.filter(pk__in=ids, locked_by=worker, locked_at=now).order_by('run_after', 'pk'))
+
+
+def run_job(job, using=None):
+    """
+    Run a claimed job in its own transaction and record the outcome
+
+    Returns True if the task succeeded.
+    """
+    using = using or router.db_for_write(Job)
+    try:
+        func, _ = TASKS[job.task]
+        with transaction.atomic(using=using):
+            func(**job.payload)
+    except Exception:
+        now = timezone.now()
+        outcome = {'last_error': traceback.format_exc(), 'updated_at': now}
+        if job.attempts >= job.max_attempts:
+            outcome['status'] = 'failed'
+        else:
+            outcome.update(status='queued', run_after=now + timedelta(seconds=retry_delay(job.attempts)))
+        succeeded = False
+    else:
+        outcome = {'status': 'succeeded', 'last_error': '', 'updated_at': timezone.now()}
+        succeeded = True
+
+    # Only while we still hold the lease; otherwise another worker has the job now
+    Job.objects.using(using).filter(
+        pk=job.pk, locked_by=job.locked_by, locked_at=job.locked_at,
+    ).update(locked_by='', locked_at=None, **outcome)
+    return succeeded
+
+
+def run_pending(limit=None, worker=None, using=None):
+    """
+    Claim and run due jobs in the calling thread until none are left (or `limit` ran)
+
+    Returns the number of jobs run.
+    """
+    worker = worker or default_worker_id()
+    done = 0
+    while limit is None or done < limit:
+        batch = claim(worker, 100 if limit is None else min(100, limit - done), using)
+        if not batch:
+            break
+        for job in batch:
+            run_job(job, using)
+        done += len(batch)
+    return done
+
+
+def prune(retention=None, using=None):
+    """
+    Delete succeeded jobs finished more than `retention` seconds ago (default JOBS_RETENTION_SECONDS)
+
+    Deletes in batches, so no single statement holds locks for long. Returns the number deleted.
+    """
+    if retention is None:
+        retention = getattr(settings, 'JOBS_RETENTION_SECONDS', DEFAULT_RETENTION_SECONDS)
+    using = using or router.db_for_write(Job)
+    expired = Job.objects.using(using).filter(
+        status='succeeded', updated_at__lt=timezone.now() - timedelta(seconds=retention)
+    )
+    deleted = 0
+    while True:
+        ids = list(expired.values_list('pk', flat=True)[:PRUNE_BATCH_SIZE])
+        if not ids:
+            return deleted
+        deleted += Job.objects.using(using).filter(pk__in=ids).delete()[0]
+
+
+def _run_in_thread(job, using):
+    try:
+        return run_job(job, using)
+    finally:
+        close_old_connections()
+
+
+def work(threads=4, batch_size=None, poll_interval=1.0, stop=None, once=False, worker=None,
+         using=None, on_batch=None):
+    """
+    Worker loop: claim batches of due jobs and run them on a pool of `threads`
+
+    Sleeps `poll_interval` seconds when the queue is empty, until `stop`
+    (a threading.Event) is set; with once=True it returns as soon as no job
+    is due. Returns the number of jobs run. `on_batch(jobs, results)` is
+    called after every batch. Old succeeded jobs are pruned on start and
+    every PRUNE_INTERVAL seconds.
+    """
+    worker = worker or default_worker_id()
+    batch_size = batch_size or threads * 4
+    stop = stop or threading.Event()
+    done = 0
+    next_prune = 0
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix='jobs') as executor:
+        while not stop.is_set():
+            if time.monotonic() >= next_prune:
+                prune(using=using)
+                next_prune = time.monotonic() + PRUNE_INTERVAL
+            batch = claim(worker, batch_size, using)
+            if not batch:
+                if once:
+                    break
+                stop.wait(poll_interval)
+                continue
+            results = list(executor.map(_run_in_thread, batch, [using] * len(batch)))
+            done += len(batch)
+            if on_batch:
+                on_batch(batch, results)
+    return done
@@ -0,0 +1,162 @@
+# companies/listings.py
+"""
+Denormalized catalogue read model
+
+InternshipListing holds one flat row per active internship of an approved
+company: the list fields, the company's name and logos, a lowercased search
+text and the application count. internship_list filters, searches and
+orders that single table instead of joining Internship to Company.
+
+Rows are rewritten from the source tables by refresh(): signals.py calls it
+when an internship or company is saved, and bulk writers (importer,
+seed_data) call it themselves. applications_count moves with the counters:
+counters.apply_transitions() passes each internship's change in total to
+add_applications(). Creating or deleting an application invalidates the
+catalogue cache, so cached internship_list pages show the new count too.
+rebuild() compares every row with the source tables, for
+`manage.py rebuild_listings`.
+"""
+from collections import defaultdict
+
+from django.db import router
+from django.db.models import Count, F
+
+from . import recommendations
+from .models import Internship, InternshipListing
+
+
+# Copied from the internship as they are
+INTERNSHIP_FIELDS = [
+    'title', 'description', 'placement_type', 'duration_months', 'positions_available',
+    'location', 'stipend', 'application_deadline', 'start_date', 'created_at',
+]
+UPDATE_FIELDS = [
+    'company', 'company_name', 'company_logo', 'company_logo_thumbnail', 'company_logo_webp',
+    *INTERNSHIP_FIELDS, 'search_text', 'applications_count', 'term_features', 'term_weights', 'updated_at',
+]
+COMPARED_FIELDS = ['company_id', *UPDATE_FIELDS[1:-1]]
+
+
+def search_text(internship):
+    return ' '.join([
+        internship.title, internship.description, internship.requirements, internship.company.company_name,
+    ]).lower()
+
+
+def is_listed(internship):
+    return internship.is_active and internship.company.is_approved
+
+
+def _sources(internships):
+    """
+    `internships` with what a listing row needs loaded in the same query
+    """
+    return internships.select_related('company').annotate(applications_total=Count('applications'))
+
+
+def build(internship):
+    """
+    The listing row for a _sources() internship
+    """
+    company = internship.company
+    return InternshipListing(
+        id=internship.pk,
+        company_id=company.pk,
+        company_name=company.company_name,
+        company_logo=company.logo.name or None,
+        company_logo_thumbnail=company.logo_thumbnail.name or None,
+        company_logo_webp=company.logo_webp.name or None,
+        search_text=search_text(internship),
+        applications_count=internship.applications_total,
+        **recommendations.term_vector(internship),
+        **{field: getattr(internship, field) for field in INTERNSHIP_FIELDS},
+    )
+
+
+def refresh(internships, using=None):
+    """
+    Rewrite the listing rows of an Internship queryset: upsert the listed ones, delete the rest
+    """
+    using = using or router.db_for_write(InternshipListing)
+    listed, unlisted = [], []
+    for internship in _sources(internships.using(using)):
+        if is_listed(internship):
+            listed.append(build(internship))
+        else:
+            unlisted.append(internship.pk)
+
+    manager = InternshipListing.objects.db_manager(using)
+    if unlisted:
+        manager.filter(pk__in=unlisted).delete()
+    if listed:
+        manager.bulk_create(
+            listed, update_conflicts=True, unique_fields=['id'], update_fields=UPDATE_FIELDS, batch_size=500,
+        )
+    return len(listed)
+
+
+def refresh_internships(pks, using=None):
+    pks = list(pks)
+    if pks:
+        refresh(Internship.objects.filter(pk__in=pks), using)
+
+
+def refresh_company(company_id, using=None):
+    refresh(Internship.objects.filter(company_id=company_id), using)
+
+
+def remove(pk, using=None):
+    InternshipListing.objects.db_manager(using or router.db_for_write(InternshipListing)).filter(pk=pk).delete()
+
+
+def add_applications(deltas, using=None):
+    """
+    Apply {internship id: change in application count}, one UPDATE per distinct change
+    """
+    groups = defaultdict(list)
+    for pk, delta in deltas.items():
+        if delta:
+            groups[delta].append(pk)
+    manager = InternshipListing.objects.db_manager(using or router.db_for_write(InternshipListing))
+    for delta, pks in groups.items():
+        manager.filter(pk__in=pks).update(applications_count=F('applications_count') + delta)
+
+
+def _value(listing, field):
+    value = getattr(listing, field)
+    if field.startswith('company_logo'):
+        return value.name or None
+    # Binary fields load as memoryview
+    return bytes(value) if isinstance(value, memoryview) else value
+
+
+def _values(listing):
+    return tuple(_value(listing, field) for field in COMPARED_FIELDS)
+
+
+def rebuild(apply=True):
+    """
+    Compare every listing row with the source tables and optionally fix them
+
+    Returns the internship ids whose rows were wrong, missing or stale.
+    """
+    expected = {
+        internship.pk: build(internship)
+        for internship in _sources(Internship.objects.all()).iterator(chunk_size=2000)
+        if is_listed(internship)
+    }
+    stored = {listing.pk: listing for listing in InternshipListing.objects.iterator(chunk_size=2000)}
+
+    wrong = [
+        pk for pk, listing in expected.items()
+        if pk not in stored or _values(stored[pk]) != _values(listing)
+    ]
+    stale = [pk for pk in stored if pk not in expected]
+
+    if apply:
+        InternshipListing.objects.filter(pk__in=stale).delete()
+        InternshipListing.objects.bulk_create(
+            [expected[pk] for pk in wrong],
+            update_conflicts=True, unique_fields=['id'], update_fields=UPDATE_FIELDS, batch_size=1000,
+        )
+    return sorted(wrong + stale)
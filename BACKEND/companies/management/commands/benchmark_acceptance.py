@@ -0,0 +1,148 @@
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+from django.urls import reverse
+
+from companies import counters
+from companies.benchmarking import call_path
+from companies.models import Application, Company, Internship, InternshipApplicationStats
+from institution.models import Institution
+from students.models import Student
+
+
+class Command(BaseCommand):
+    help = (
+        'Accept applications to one internship from many threads at once and check '
+        'that positions_available is never exceeded'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--positions', type=int, default=10)
+        parser.add_argument('--applicants', type=int, default=200)
+        parser.add_argument('--batch', type=int, default=1,
+                            help='Applications accepted per bulk-status request')
+        parser.add_argument('--prefix', default='accept-bench')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            raise CommandError('Threads need a shared database; in-memory SQLite is per connection')
+
+        # Committed, so the worker threads' own connections can see it; removed afterwards
+        self.cleanup(options['prefix'])
+        try:
+            reviewer, internship, application_ids = self.create_fixture(options)
+            outcomes, elapsed = self.run_threads(reviewer, application_ids, options)
+            self.report(internship, outcomes, elapsed, options)
+        finally:
+            self.cleanup(options['prefix'])
+
+    def cleanup(self, prefix):
+        User.objects.filter(username__startswith=f'{prefix}-').delete()
+        Institution.objects.filter(code=f'{prefix}-I').delete()
+
+    def create_fixture(self, options):
+        prefix = options['prefix']
+        today = date.today()
+        institution = Institution.objects.create(
+            name='Benchmark University', code=f'{prefix}-I', email=f'registrar@{prefix}.example.com',
+            phone='0200000000', address='Nairobi',
+        )
+        reviewer = User.objects.create(username=f'{prefix}-company')
+        company = Company.objects.create(
+            user=reviewer, company_name='Benchmark Ltd', email=f'{prefix}@companies.example.com',
+            phone='0722000000', address='Nairobi', industry='Technology', description='-',
+            is_approved=True,
+        )
+        internship = Internship.objects.create(
+            company=company, title='Contended Intern', description='-', requirements='-',
+            placement_type='internship', duration_months=3, positions_available=options['positions'],
+            location='Nairobi', application_deadline=today + timedelta(days=30),
+            start_date=today + timedelta(days=60),
+        )
+
+        usernames = [f'{prefix}-student-{n}' for n in range(options['applicants'])]
+        User.objects.bulk_create([User(username=username) for username in usernames])
+        user_ids = User.objects.filter(username__in=usernames).values_list('pk', flat=True)
+        Student.objects.bulk_create([
+            Student(
+                user_id=user_id, student_id=f'{prefix}-S{user_id}', first_name='Bench',
+                last_name=str(user_id), email=f'{prefix}-{user_id}@students.example.com',
+                phone='0711000000', institution=institution, course='Computer Science',
+                year_of_study=3,
+            )
+            for user_id in user_ids
+        ])
+        students = Student.objects.filter(institution=institution).values_list('pk', flat=True)
+        applications = Application.objects.bulk_create([
+            Application(student_id=student_id, internship=internship, cover_letter='-')
+            for student_id in students
+        ])
+        counters.apply_transitions([
+            (application.student_id, application.internship_id, None, application.status)
+            for application in applications
+        ])
+        return reviewer, internship, [application.pk for application in applications]
+
+    def run_threads(self, reviewer, application_ids, options):
+        path = reverse('application-bulk-status')
+        batch = options['batch']
+        outcomes = Counter()
+        lock = threading.Lock()
+        start = threading.Barrier(options['threads'])
+
+        def worker(ids):
+            local = Counter()
+            try:
+                start.wait()
+                for offset in range(0, len(ids), batch):
+                    items = [{'id': pk, 'status': 'accepted'} for pk in ids[offset:offset + batch]]
+                    try:
+                        response = call_path(path, reviewer, 'post', {'items': items})
+                    except DatabaseError:
+                        local['database errors'] += len(items)
+                        continue
+                    for result in response.data['results']:
+                        local['accepted' if result['ok'] else 'refused'] += 1
+            finally:
+                connection.close()
+                with lock:
+                    outcomes.update(local)
+
+        # Interleave the applications so every thread contends for the same slots
+        threads = [
+            threading.Thread(target=worker, args=(application_ids[n::options['threads']],))
+            for n in range(options['threads'])
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes, time.perf_counter() - started
+
+    def report(self, internship, outcomes, elapsed, options):
+        accepted_rows = Application.objects.filter(internship=internship, status='accepted').count()
+        counter = InternshipApplicationStats.objects.get(pk=internship.pk).accepted
+        attempts = sum(outcomes.values())
+
+        self.stdout.write(
+            f'{options["threads"]} threads, {attempts} acceptance attempts in {elapsed:.2f}s '
+            f'({attempts / elapsed:.0f} attempts/s, batch={options["batch"]})'
+        )
+        self.stdout.write('  ' + ', '.join(f'{key}={value}' for key, value in sorted(outcomes.items())))
+        self.stdout.write(
+            f'  positions={options["positions"]} accepted rows={accepted_rows} accepted counter={counter}'
+        )
+
+        expected = min(options['positions'], options['applicants'])
+        if accepted_rows > options['positions'] or counter != accepted_rows:
+            raise CommandError('Internship overbooked or counter out of step')
+        if outcomes['database errors'] == 0 and accepted_rows != expected:
+            raise CommandError(f'Expected {expected} acceptances, got {accepted_rows}')
+        self.stdout.write(self.style.SUCCESS('No overbooking'))
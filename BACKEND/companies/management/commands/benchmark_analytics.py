@@ -0,0 +1,81 @@
+import time
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from companies import analytics
+from companies.benchmarking import format_summary, measure
+from companies.models import Application, InternshipApplicationStats, MarketTrendRollup, PlacementRollup
+from students.models import Student
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare reading the analytics rollups with running the same aggregations live, '
+        'and an incremental refresh with a full rebuild; everything is rolled back'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--applications', type=int, default=1_000_000,
+                            help='Seed synthetic applications (rolled back) until at least this many exist')
+        parser.add_argument('--iterations', type=int, default=5)
+        parser.add_argument('--touch', type=int, default=1000,
+                            help='Applications changed before timing the incremental refresh')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            missing = options['applications'] - Application.objects.count()
+            if missing > 0:
+                self.seed(missing)
+            # Age everything past the refresh overlap, so only the rows touched below count as changed
+            an_hour_ago = timezone.now() - timedelta(hours=1)
+            Application.objects.update(updated_at=an_hour_ago)
+            Student.objects.update(updated_at=an_hour_ago)
+
+            started = time.perf_counter()
+            summary = analytics.rebuild()
+            self.stdout.write(
+                f'rebuild: {time.perf_counter() - started:.2f}s for {Application.objects.count()} applications '
+                f'({summary["placement_groups"]} placement, {summary["trend_groups"]} trend groups)'
+            )
+
+            iterations = options['iterations']
+            pairs = (
+                ('placements', lambda: list(PlacementRollup.objects.all()),
+                 lambda: list(analytics.live_placements())),
+                ('trends', lambda: list(MarketTrendRollup.objects.all()),
+                 lambda: list(analytics.live_trends())),
+                ('funnels', lambda: list(InternshipApplicationStats.objects.all()),
+                 lambda: list(analytics.live_funnels())),
+            )
+            for name, rollup, live in pairs:
+                for label, func in (('rollup', rollup), ('live', live)):
+                    samples, queries = measure(func, iterations)
+                    self.stdout.write(f'{name:>10} {label:>6}: {format_summary(samples)} queries={queries}')
+
+            self.time_refresh(options['touch'])
+            transaction.set_rollback(True)
+
+    def seed(self, count):
+        students = max(1, count // 20)
+        self.stdout.write(f'Seeding {count} applications...')
+        call_command(
+            'seed_data', institutions=20, students=students, companies=max(1, students // 20),
+            internships=max(20, students // 2), applications=count, prefix='analytics-bench',
+            stdout=self.stdout,
+        )
+
+    def time_refresh(self, touch):
+        # The newest applications, where status changes happen; updated_at is bumped as a save would
+        ids = list(Application.objects.order_by('-applied_at').values_list('pk', flat=True)[:touch])
+        Application.objects.filter(pk__in=ids).update(updated_at=timezone.now())
+
+        started = time.perf_counter()
+        summary = analytics.refresh()
+        self.stdout.write(
+            f'refresh after {len(ids)} changed applications: {time.perf_counter() - started:.2f}s '
+            f'({summary["placement_groups"]} placement, {summary["trend_groups"]} trend groups recomputed)'
+        )
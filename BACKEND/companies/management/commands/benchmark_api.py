@@ -0,0 +1,257 @@
+import json
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import django
+from django.contrib.auth.models import User
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from companies import urls
+from companies.benchmarking import summarize
+from companies.models import Application, Company, Internship
+from students.models import Student
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive every endpoint in companies/urls.py through the test client and write '
+        'latency percentiles, query counts and peak memory to a JSON report'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--output', help='Write the JSON report here instead of stdout')
+        parser.add_argument('--baseline', help='Earlier JSON report to print p50 deltas against')
+        parser.add_argument('--endpoint', action='append', dest='endpoints',
+                            help='Only benchmark this URL name (repeatable)')
+        parser.add_argument('--with-cache', action='store_true',
+                            help='Keep the catalogue response cache on (off by default, to measure the database path)')
+        parser.add_argument('--profiling', action='store_true',
+                            help='Turn on ProfilingMiddleware; compare against a run without it to measure its overhead')
+
+    def handle(self, *args, **options):
+        student = (
+            Student.objects.filter(applications__status='pending').order_by('pk').first()
+            or Student.objects.order_by('pk').first()
+        )
+        internship = Internship.objects.filter(is_active=True, company__is_approved=True).order_by('pk').first()
+        if student is None or internship is None:
+            raise CommandError('Nothing to benchmark against; run seed_data first')
+
+        # Everything, including the login sessions and the staff user, is rolled back; the
+        # student's resume is written to a temporary MEDIA_ROOT
+        with (
+            tempfile.TemporaryDirectory() as media_root,
+            override_settings(MEDIA_ROOT=media_root),
+            transaction.atomic(),
+        ):
+            student.resume.save('resume.pdf', ContentFile(b'%PDF-1.4\n' + b'0' * 256 * 1024), save=True)
+            specs = self.endpoint_specs(student, internship)
+            missing = [pattern.name for pattern in urls.urlpatterns if pattern.name not in specs]
+            if missing:
+                raise CommandError(f'No benchmark spec for: {", ".join(missing)}')
+            names = list(specs)
+            if options['endpoints']:
+                names = [name for name in names if name in options['endpoints']]
+
+            client = Client()
+            # Every endpoint is called --iterations times by one user; the limits would cut that short
+            settings_override = {'ALLOWED_HOSTS': [*settings.ALLOWED_HOSTS, 'testserver'], 'RATE_LIMITS': {}}
+            if not options['with_cache']:
+                settings_override['CATALOGUE_CACHE_TIMEOUT'] = 0
+            if options['profiling']:
+                settings_override['REQUEST_PROFILING'] = True
+            with override_settings(**settings_override):
+                results = {}
+                for name in names:
+                    method, path, data, writes, *user = specs[name]
+                    client.force_login(user[0] if user else student.user)
+                    results[name] = self.run_endpoint(
+                        client, method, path, data, writes, options['iterations']
+                    )
+            transaction.set_rollback(True)
+
+        report = {
+            'meta': self.metadata(options),
+            'endpoints': results,
+        }
+        payload = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(payload + '\n')
+        else:
+            self.stdout.write(payload)
+
+        self.print_table(results, options['baseline'])
+
+    def endpoint_specs(self, student, internship):
+        """
+        URL name -> (method, path, data, writes[, user]). Writes run inside a
+        rolled-back transaction; requests are made as `student` unless a user is given.
+
+        Every route in companies/urls.py needs an entry; extra entries cover
+        other methods on the same route.
+        """
+        application = student.applications.order_by('pk').first()
+        application_pk = application.pk if application else 0
+        withdrawable = student.applications.filter(status__in=['pending', 'under_review']).first()
+        open_internships = Internship.objects.filter(
+            is_active=True, company__is_approved=True
+        ).exclude(applications__student=student).order_by('-application_deadline')
+        new_target = open_internships.first()
+        bulk_targets = list(open_internships.values_list('pk', flat=True)[:50])
+        reviewer = internship.company.user
+        staff = User.objects.create(username='benchmark-staff', is_staff=True)
+        to_review = list(Application.objects.filter(
+            internship__company=internship.company, status='pending'
+        ).values_list('pk', flat=True)[:100])
+
+        return {
+            'auth-token': ('post', reverse('auth-token'), {}, False),
+            'company-list': ('get', reverse('company-list'), None, False),
+            'company-detail': ('get', reverse('company-detail', args=[internship.company_id]), None, False),
+            'internship-list': ('get', reverse('internship-list') + '?search=python', None, False),
+            'internship-detail': ('get', reverse('internship-detail', args=[internship.pk]), None, False),
+            'internship-by-company': (
+                'get', reverse('internship-by-company') + f'?company_id={internship.company_id}', None, False,
+            ),
+            'application-list-create': ('get', reverse('application-list-create'), None, False),
+            'application-detail': ('get', reverse('application-detail', args=[application_pk]), None, False),
+            'application-withdraw': (
+                'post', reverse('application-withdraw', args=[withdrawable.pk if withdrawable else 0]), {}, True,
+            ),
+            'application-pending': ('get', reverse('application-pending'), None, False),
+            'application-accepted': ('get', reverse('application-accepted'), None, False),
+            'application-statistics': ('get', reverse('application-statistics'), None, False),
+            'application-create': (
+                'post', reverse('application-list-create'),
+                {'internship': new_target.pk if new_target else 0, 'cover_letter': 'Benchmark'}, True,
+            ),
+            'application-bulk-create': (
+                'post', reverse('application-bulk-create'),
+                {'items': [{'internship': pk, 'cover_letter': 'Benchmark'} for pk in bulk_targets]}, True,
+            ),
+            'application-bulk-status': (
+                'post', reverse('application-bulk-status'),
+                {'items': [{'id': pk, 'status': 'under_review'} for pk in to_review]}, True, reviewer,
+            ),
+            'recommendation-list': ('get', reverse('recommendation-list'), None, False),
+            'placement-run': ('post', reverse('placement-run'), {'dry_run': True}, False, staff),
+            'application-resume': (
+                'get', reverse('application-resume', args=[application_pk]), None, False,
+                application.internship.company.user if application else staff,
+            ),
+            'resume': ('get', reverse('resume'), None, False),
+            'application-export': (
+                'get', reverse('application-export', args=['csv']) + '?status=accepted', None, False, staff,
+            ),
+            'analytics-placements': ('get', reverse('analytics-placements'), None, False, staff),
+            'analytics-internships': ('get', reverse('analytics-internships'), None, False, reviewer),
+            'analytics-trends': ('get', reverse('analytics-trends'), None, False, staff),
+            'metrics': ('get', reverse('metrics'), None, False, staff),
+            'async-company-list': ('get', reverse('async-company-list'), None, False),
+            'async-company-detail': (
+                'get', reverse('async-company-detail', args=[internship.company_id]), None, False,
+            ),
+            'async-internship-list': ('get', reverse('async-internship-list') + '?search=python', None, False),
+            'async-internship-detail': (
+                'get', reverse('async-internship-detail', args=[internship.pk]), None, False,
+            ),
+        }
+
+    def run_endpoint(self, client, method, path, data, writes, iterations):
+        def call():
+            if method == 'get':
+                response = client.get(path)
+            else:
+                response = client.post(path, data, content_type='application/json')
+            # Streamed bodies are produced while being read, so read them inside the timing
+            body = b''.join(response.streaming_content) if response.streaming else response.content
+            return response, body
+
+        def once():
+            if not writes:
+                return call()
+            with transaction.atomic():
+                result = call()
+                transaction.set_rollback(True)
+            return result
+
+        # request_started clears the query log, so start from an empty one
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            response, body = once()
+        query_count = len(queries)
+
+        tracemalloc.start()
+        once()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        samples = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            once()
+            samples.append((time.perf_counter() - started) * 1000)
+
+        return {
+            'method': method.upper(),
+            'path': path,
+            'status': response.status_code,
+            'queries': query_count,
+            'response_bytes': len(body),
+            'peak_memory_kb': round(peak / 1024, 1),
+            'latency_ms': summarize(samples),
+        }
+
+    def metadata(self, options):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+
+        return {
+            'commit': commit,
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'iterations': options['iterations'],
+            'cache': options['with_cache'],
+            'profiling': options['profiling'],
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'rows': {
+                'companies': Company.objects.count(),
+                'internships': Internship.objects.count(),
+                'students': Student.objects.count(),
+                'applications': Application.objects.count(),
+            },
+        }
+
+    def print_table(self, results, baseline_path):
+        baseline = {}
+        if baseline_path:
+            with open(baseline_path) as baseline_file:
+                baseline = json.load(baseline_file)['endpoints']
+
+        for name, result in results.items():
+            line = (
+                f"{name:>26}: {result['status']} p50={result['latency_ms']['p50']:.2f}ms "
+                f"p99={result['latency_ms']['p99']:.2f}ms queries={result['queries']} "
+                f"peak={result['peak_memory_kb']}KB"
+            )
+            if name in baseline:
+                before = baseline[name]['latency_ms']['p50']
+                line += f" (p50 {result['latency_ms']['p50'] - before:+.2f}ms vs baseline)"
+            self.stderr.write(line)
@@ -0,0 +1,157 @@
+import asyncio
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from companies.benchmarking import http_load, summarize
+from companies.models import Company, Internship
+
+
+HOST = '127.0.0.1'
+# The servers' settings: the project's, without rate limits
+BENCHMARK_SETTINGS = 'internship_system.benchmark_settings'
+
+# name -> (command line, URL name prefix); both get the same --workers
+SERVERS = {
+    'wsgi': (
+        lambda port, workers: [
+            sys.executable, '-m', 'gunicorn', 'internship_system.wsgi:application',
+            '--bind', f'{HOST}:{port}', '--workers', str(workers), '--log-level', 'warning',
+        ],
+        '',
+    ),
+    'asgi': (
+        lambda port, workers: [
+            sys.executable, '-m', 'uvicorn', 'internship_system.asgi:application',
+            '--host', HOST, '--port', str(port), '--workers', str(workers),
+            '--log-level', 'warning', '--no-access-log',
+        ],
+        'async-',
+    ),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Load the catalogue endpoints through gunicorn (sync views) and uvicorn (async views) '
+        'with the same worker count, and compare requests per second and tail latency'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--concurrency', type=int, default=32,
+                            help='Simultaneous keep-alive client connections')
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--warmup', type=int, default=100)
+        parser.add_argument('--server', action='append', dest='servers', choices=sorted(SERVERS),
+                            help='Only run this server (repeatable)')
+        parser.add_argument('--prefix', default='asgi-bench')
+
+    def handle(self, *args, **options):
+        internship_ids = list(Internship.objects.filter(
+            is_active=True, company__is_approved=True
+        ).values_list('pk', flat=True)[:200])
+        company_ids = list(Company.objects.filter(is_approved=True).values_list('pk', flat=True)[:200])
+        if not internship_ids or not company_ids:
+            raise CommandError('Nothing to benchmark against; run seed_data first')
+
+        # The servers are separate processes, so the login has to be committed; removed afterwards
+        User.objects.filter(username=f'{options["prefix"]}-user').delete()
+        user = User.objects.create(username=f'{options["prefix"]}-user')
+        client = Client()
+        client.force_login(user)
+        session_key = client.cookies[settings.SESSION_COOKIE_NAME].value
+        headers = {'Cookie': f'{settings.SESSION_COOKIE_NAME}={session_key}'}
+
+        try:
+            for name in options['servers'] or sorted(SERVERS, reverse=True):
+                command, url_prefix = SERVERS[name]
+                paths = self.request_paths(url_prefix, internship_ids, company_ids, options)
+                samples, statuses, elapsed = self.run_server(name, command, paths, headers, options)
+                self.report(name, samples, statuses, elapsed, options)
+        finally:
+            SessionStore(session_key).delete()
+            user.delete()
+
+    def request_paths(self, url_prefix, internship_ids, company_ids, options):
+        """
+        A fixed mix of list and detail reads
+
+        Every path carries a unique `nocache` parameter, so each request
+        misses the catalogue response cache and reaches the database.
+        """
+        rng = random.Random(0)
+        total = options['warmup'] + options['requests']
+        paths = []
+        for n in range(total):
+            kind = n % 4
+            if kind == 0:
+                path = reverse(f'{url_prefix}internship-list') + f'?page={rng.randint(1, 5)}&'
+            elif kind == 1:
+                path = reverse(f'{url_prefix}internship-detail', args=[rng.choice(internship_ids)]) + '?'
+            elif kind == 2:
+                path = reverse(f'{url_prefix}company-list') + '?'
+            else:
+                path = reverse(f'{url_prefix}company-detail', args=[rng.choice(company_ids)]) + '?'
+            paths.append(f'{path}nocache={n}')
+        return paths
+
+    def run_server(self, name, command, paths, headers, options):
+        with socket.socket() as probe:
+            probe.bind((HOST, 0))
+            port = probe.getsockname()[1]
+
+        process = subprocess.Popen(
+            command(port, options['workers']), cwd=settings.BASE_DIR,
+            # Throughput, not the rate limits, is measured here
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': BENCHMARK_SETTINGS},
+            start_new_session=True,
+        )
+        try:
+            self.wait_for_port(port, process)
+            warmup, measured = paths[:options['warmup']], paths[options['warmup']:]
+            asyncio.run(http_load(HOST, port, warmup, headers, options['concurrency']))
+            return asyncio.run(http_load(HOST, port, measured, headers, options['concurrency']))
+        finally:
+            os.killpg(process.pid, signal.SIGTERM)
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                os.killpg(process.pid, signal.SIGKILL)
+                process.wait()
+
+    def wait_for_port(self, port, process, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f'Server exited with status {process.returncode}')
+            try:
+                with socket.create_connection((HOST, port), timeout=1):
+                    return
+            except OSError:
+                time.sleep(0.1)
+        raise CommandError(f'Server did not start listening on port {port}')
+
+    def report(self, name, samples, statuses, elapsed, options):
+        summary = summarize(samples)
+        self.stdout.write(
+            f'{name}: {len(samples)} requests in {elapsed:.2f}s = {len(samples) / elapsed:.0f} req/s '
+            f'(workers={options["workers"]}, concurrency={options["concurrency"]}) '
+            f'p50={summary["p50"]:.1f}ms p90={summary["p90"]:.1f}ms p99={summary["p99"]:.1f}ms'
+        )
+        self.stdout.write('  statuses: ' + ', '.join(
+            f'{code}={count}' for code, count in sorted(statuses.items(), key=str)
+        ))
+        if set(statuses) != {200}:
+            self.stderr.write(self.style.WARNING(f'  {name}: not every request succeeded'))
@@ -0,0 +1,105 @@
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from companies import tokens
+from companies.benchmarking import summarize
+from companies.management.commands.benchmark_api import Command as ApiBenchmark
+from companies.models import Internship
+from students.models import Student
+
+
+class Command(BaseCommand):
+    help = (
+        'Call the read-only GET endpoints with session authentication and with bearer tokens, '
+        'and compare the queries and latency per request; rolled back afterwards'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--endpoint', action='append', dest='endpoints',
+                            help='Only benchmark this URL name (repeatable)')
+
+    def handle(self, *args, **options):
+        student = (
+            Student.objects.filter(applications__status='pending').order_by('pk').first()
+            or Student.objects.order_by('pk').first()
+        )
+        internship = Internship.objects.filter(is_active=True, company__is_approved=True).order_by('pk').first()
+        if student is None or internship is None:
+            raise CommandError('Nothing to benchmark against; run seed_data first')
+
+        settings_override = {
+            'ALLOWED_HOSTS': [*settings.ALLOWED_HOSTS, 'testserver'],
+            'RATE_LIMITS': {},
+            # Measure the database path, not the catalogue cache
+            'CATALOGUE_CACHE_TIMEOUT': 0,
+        }
+        with (
+            tempfile.TemporaryDirectory() as media_root,
+            override_settings(MEDIA_ROOT=media_root, **settings_override),
+            transaction.atomic(),
+        ):
+            student.resume.save('resume.pdf', ContentFile(b'%PDF-1.4\n' + b'0' * 64 * 1024), save=True)
+            specs = ApiBenchmark().endpoint_specs(student, internship)
+            names = [name for name, (method, _, _, writes, *_) in specs.items() if method == 'get' and not writes]
+            if options['endpoints']:
+                names = [name for name in names if name in options['endpoints']]
+
+            totals = {'session': 0, 'token': 0}
+            for name in names:
+                _, path, _, _, *user = specs[name]
+                user = user[0] if user else student.user
+                session = Client()
+                session.force_login(user)
+                bearer = Client(headers={'Authorization': f'Bearer {tokens.issue(user)}'})
+
+                tokens.principals.clear()
+                cold = self.count_queries(bearer, path)
+                by_session = self.measure(session, path, options['iterations'])
+                by_token = self.measure(bearer, path, options['iterations'])
+                totals['session'] += by_session['queries']
+                totals['token'] += by_token['queries']
+                self.stdout.write(
+                    f"{name:>26}: {by_session['status']}/{by_token['status']} "
+                    f"queries session={by_session['queries']} token={by_token['queries']} (cold {cold}) "
+                    f"p50 session={by_session['latency_ms']['p50']:.2f}ms token={by_token['latency_ms']['p50']:.2f}ms"
+                )
+            transaction.set_rollback(True)
+
+        if names:
+            self.stdout.write(
+                f'{len(names)} endpoints: {totals["session"] / len(names):.2f} queries per request with sessions, '
+                f'{totals["token"] / len(names):.2f} with tokens; principal cache {dict(tokens.stats)}'
+            )
+
+    def call(self, client, path):
+        response = client.get(path)
+        # Streamed bodies are produced while being read
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
+
+    def count_queries(self, client, path):
+        # request_started clears the query log, so start from an empty one
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            self.call(client, path)
+        return len(queries)
+
+    def measure(self, client, path, iterations):
+        # Warm: the principal cache for tokens, the session for sessions
+        response = self.call(client, path)
+        queries = self.count_queries(client, path)
+        samples = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            self.call(client, path)
+            samples.append((time.perf_counter() - started) * 1000)
+        return {'status': response.status_code, 'queries': queries, 'latency_ms': summarize(samples)}
@@ -0,0 +1,90 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+
+from companies import cache
+from companies.benchmarking import WORDS, call_path, format_summary, seed_internships
+from companies.models import Company, Internship
+
+
+class Command(BaseCommand):
+    help = 'Replay a request log against the catalogue endpoints with and without the response cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Create this many synthetic internships (rolled back afterwards)')
+        parser.add_argument('--log', help='File with one request path per line, e.g. /api/internships/?page=2')
+        parser.add_argument('--requests', type=int, default=2000,
+                            help='Length of the synthetic log when --log is not given')
+        parser.add_argument('--write-every', type=int, default=200,
+                            help='Save an internship every N requests to exercise invalidation (0: never)')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['seed']:
+                seed_internships(options['seed'])
+            user = User.objects.create(username='benchmark-cache-reader')
+
+            if options['log']:
+                with open(options['log']) as log:
+                    paths = [line.strip() for line in log if line.strip()]
+            else:
+                paths = self.synthetic_log(options['requests'])
+
+            self.stdout.write(f'Replaying {len(paths)} requests')
+            # One reader replays the whole log, far past its rate limits
+            with override_settings(RATE_LIMITS={}):
+                with override_settings(CATALOGUE_CACHE_TIMEOUT=0):
+                    samples = self.replay(paths, user, options['write_every'])
+                self.stdout.write(f'  uncached: {format_summary(samples)}')
+
+                cache.get_cache().clear()
+                cache.stats.clear()
+                samples = self.replay(paths, user, options['write_every'])
+            hits, misses = cache.stats['hit'], cache.stats['miss']
+            self.stdout.write(
+                f'    cached: {format_summary(samples)} '
+                f'hit ratio={hits / max(1, hits + misses):.1%} ({hits} hits, {misses} misses)'
+            )
+
+            transaction.set_rollback(True)
+
+    def replay(self, paths, user, write_every):
+        writable = list(Internship.objects.values_list('pk', flat=True)[:100])
+        samples = []
+        for n, path in enumerate(paths, 1):
+            started = time.perf_counter()
+            call_path(path, user)
+            samples.append((time.perf_counter() - started) * 1000)
+
+            if write_every and writable and n % write_every == 0:
+                Internship.objects.get(pk=random.choice(writable)).save()
+        return samples
+
+    def synthetic_log(self, count):
+        """
+        Skewed traffic: a few hot pages and postings, a long tail of the rest
+        """
+        rng = random.Random(42)
+        internships = list(Internship.objects.filter(is_active=True).values_list('pk', flat=True)[:5000])
+        companies = list(Company.objects.filter(is_approved=True).values_list('pk', flat=True)[:500])
+        if not internships or not companies:
+            return ['/api/internships/', '/api/companies/'] * (count // 2)
+
+        def skewed(items):
+            return items[min(len(items) - 1, int(rng.paretovariate(1.2)) - 1)]
+
+        builders = [
+            lambda: f'/api/internships/?page={skewed(range(1, 50))}',
+            lambda: f'/api/internships/?search={skewed(WORDS)}',
+            lambda: f'/api/internships/{skewed(internships)}/',
+            lambda: f'/api/companies/?page={skewed(range(1, 10))}',
+            lambda: f'/api/companies/{skewed(companies)}/',
+            lambda: f'/api/internships/by-company/?company_id={skewed(companies)}',
+        ]
+        weights = [35, 20, 30, 5, 5, 5]
+        return [rng.choices(builders, weights)[0]() for _ in range(count)]
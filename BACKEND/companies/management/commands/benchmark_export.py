@@ -0,0 +1,64 @@
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from companies import export
+from companies.benchmarking import current_rss_kb
+from companies.models import Application
+
+
+class Command(BaseCommand):
+    help = 'Stream the full application export and report rows per second and RSS growth'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=0,
+                            help='Seed synthetic applications (rolled back) until at least this many exist')
+        parser.add_argument('--format', choices=sorted(export.FORMATS), default='csv', dest='export_format')
+        parser.add_argument('--chunk-size', type=int, default=export.DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--max-rss-growth-mb', type=float,
+                            help='Fail if RSS grows by more than this while streaming')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            missing = options['rows'] - Application.objects.count()
+            if missing > 0:
+                self.seed(missing)
+
+            rows, written, elapsed, growth_kb = self.run_export(options)
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            f'{rows} rows, {written / 2**20:.1f}MB of {options["export_format"]} in {elapsed:.2f}s: '
+            f'{rows / elapsed:.0f} rows/s, RSS growth {growth_kb / 1024:.1f}MB '
+            f'(chunk size {options["chunk_size"]})'
+        )
+        ceiling = options['max_rss_growth_mb']
+        if ceiling is not None and growth_kb / 1024 > ceiling:
+            raise CommandError(f'RSS grew by {growth_kb / 1024:.1f}MB, over the {ceiling}MB ceiling')
+
+    def seed(self, count):
+        # 20 applications per student keeps the student and internship tables realistic
+        students = max(1, count // 20)
+        self.stdout.write(f'Seeding {count} applications...')
+        call_command(
+            'seed_data', institutions=20, students=students, companies=max(1, students // 20),
+            internships=max(20, students // 2), applications=count, prefix='export-bench',
+            stdout=self.stdout,
+        )
+
+    def run_export(self, options):
+        baseline = peak = current_rss_kb()
+        lines = written = 0
+        started = time.perf_counter()
+        for text in export.stream(
+            export.filter_applications({}), options['export_format'], options['chunk_size']
+        ):
+            lines += text.count('\n')
+            written += len(text)
+            peak = max(peak, current_rss_kb())
+        elapsed = time.perf_counter() - started
+
+        rows = lines - 1 if options['export_format'] == 'csv' else lines
+        return rows, written, elapsed, peak - baseline
@@ -0,0 +1,98 @@
+import tempfile
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from companies import jobs
+from companies.benchmarking import call_path, summarize
+from companies.models import Internship, Job
+from students.models import Student
+
+
+class Command(BaseCommand):
+    help = (
+        'Time application create / withdraw requests with their side effects run inline '
+        '(JOBS_EAGER) and queued, then time a worker draining the queue; everything is rolled back'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--applications', type=int, default=200,
+                            help='Applications created and then withdrawn per mode')
+        parser.add_argument('--email-backend', default='django.core.mail.backends.filebased.EmailBackend',
+                            help='Email backend the notification jobs use (default: files in a temporary directory)')
+        parser.add_argument('--email-delay-ms', type=float, default=0,
+                            help='Send through an in-memory backend that waits this long per email, '
+                                 'standing in for a remote SMTP server')
+
+    def handle(self, *args, **options):
+        template = Student.objects.order_by('pk').first()
+        targets = list(Internship.objects.filter(
+            is_active=True, company__is_approved=True
+        ).order_by('-application_deadline').values_list('pk', flat=True)[:options['applications']])
+        if template is None or not targets:
+            raise CommandError('Nothing to benchmark against; run seed_data first')
+
+        email_backend = options['email_backend']
+        if options['email_delay_ms']:
+            email_backend = 'companies.benchmarking.DelayedEmailBackend'
+
+        with tempfile.TemporaryDirectory() as mail_dir, transaction.atomic():
+            for mode in ('inline', 'queued'):
+                with override_settings(JOBS_EAGER=mode == 'inline', RATE_LIMITS={}, EMAIL_BACKEND=email_backend,
+                                       EMAIL_FILE_PATH=mail_dir, BENCHMARK_EMAIL_DELAY_MS=options['email_delay_ms']):
+                    self.run_mode(mode, template, targets)
+            transaction.set_rollback(True)
+
+    def run_mode(self, mode, template, targets):
+        with transaction.atomic():
+            user = User.objects.create(username=f'jobs-bench-{mode}')
+            Student.objects.create(
+                user=user, student_id=f'jobs-bench-{mode}', first_name='Bench', last_name=mode.title(),
+                email=f'jobs-bench-{mode}@students.example.com', phone='0700000000',
+                institution_id=template.institution_id, course='Computer Science', year_of_study=3,
+            )
+            queued_before = Job.objects.filter(status='queued').count()
+
+            create_path = reverse('application-list-create')
+            created = []
+            create_samples = []
+            for internship_id in targets:
+                started = time.perf_counter()
+                response = call_path(create_path, user, 'post', {'internship': internship_id, 'cover_letter': '-'})
+                create_samples.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 201:
+                    raise CommandError(f'create returned {response.status_code}: {response.data}')
+                created.append(response.data['application']['id'])
+
+            withdraw_samples = []
+            for pk in created:
+                started = time.perf_counter()
+                response = call_path(reverse('application-withdraw', args=[pk]), user, 'post', {})
+                withdraw_samples.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    raise CommandError(f'withdraw returned {response.status_code}: {response.data}')
+
+            self.stdout.write(f'{mode}:')
+            for name, samples in (('create', create_samples), ('withdraw', withdraw_samples)):
+                summary = summarize(samples)
+                self.stdout.write(
+                    f'  {name:>8}: p50={summary["p50"]:.2f}ms p90={summary["p90"]:.2f}ms '
+                    f'p99={summary["p99"]:.2f}ms mean={summary["mean"]:.2f}ms'
+                )
+
+            queued = Job.objects.filter(status='queued').count() - queued_before
+            if queued:
+                # In this thread: worker threads could not see the uncommitted jobs
+                started = time.perf_counter()
+                done = jobs.run_pending()
+                elapsed = time.perf_counter() - started
+                failed = Job.objects.filter(status__in=['queued', 'failed'], last_error__gt='').count()
+                self.stdout.write(
+                    f'  {queued} jobs queued; worker ran {done} in {elapsed:.2f}s '
+                    f'({done / elapsed:.0f} jobs/s, {failed} failed)'
+                )
+            transaction.set_rollback(True)
@@ -0,0 +1,68 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from companies import search
+from companies.benchmarking import format_summary, seed_internships
+from companies.models import Internship, InternshipListing
+from companies.planner import plan_queryset
+from companies.serializers import InternshipListingSerializer, InternshipListSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the internship_list query paths: Internship joined to Company '
+        'vs the flat InternshipListing rows (count plus one serialized page each)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Create this many synthetic internships (rolled back afterwards)')
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--query', action='append', dest='queries',
+                            help='Search term to benchmark (repeatable)')
+
+    def handle(self, *args, **options):
+        queries = options['queries'] or ['python', 'data analyst', 'cloud engineer', 'nursing']
+
+        with transaction.atomic():
+            if options['seed']:
+                seed_internships(options['seed'])
+                # bulk_create skips the save signals
+                search.rebuild_index()
+                self.stdout.write(f'Seeded {options["seed"]} internships')
+
+            joined = plan_queryset(Internship.objects.filter(
+                is_active=True,
+                company__is_approved=True
+            ), InternshipListSerializer)
+            listed = InternshipListing.objects.all()
+
+            cases = {
+                'list': lambda base, q: base.order_by('application_deadline'),
+                'filter': lambda base, q: base.filter(placement_type='internship').order_by('application_deadline'),
+                'icontains': lambda base, q: search.icontains_filter(base, q).order_by('application_deadline'),
+                'index': lambda base, q: search.search(base, q).order_by('search_rank'),
+            }
+
+            self.stdout.write(
+                f'{InternshipListing.objects.count()} listed internships, '
+                f'{options["iterations"]} iterations per query'
+            )
+            for case, build in cases.items():
+                for label, base, serializer_class in (
+                    ('joined', joined, InternshipListSerializer),
+                    ('listing', listed, InternshipListingSerializer),
+                ):
+                    samples = []
+                    for _ in range(options['iterations']):
+                        for query in queries:
+                            started = time.perf_counter()
+                            queryset = build(base, query)
+                            queryset.count()
+                            serializer_class(queryset[:10], many=True).data
+                            samples.append((time.perf_counter() - started) * 1000)
+                    self.stdout.write(f'{case:>10} {label:>8}: {format_summary(samples)}')
+
+            transaction.set_rollback(True)
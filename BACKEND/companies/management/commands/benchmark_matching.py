@@ -0,0 +1,57 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from companies import matching
+
+
+class Command(BaseCommand):
+    help = 'Time the placement solver on synthetic problems of growing size, and optionally on the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000],
+                            help='Numbers of applications to generate')
+        parser.add_argument('--per-student', type=int, default=10,
+                            help='Applications per synthetic student')
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--database', action='store_true',
+                            help='Also run a full placement (load, solve, write) on the current data, rolled back')
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(0)
+        for size in options['sizes']:
+            arrays = self.synthetic(size, options['per_student'], rng)
+            samples = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                matched = matching.deferred_acceptance(*arrays)
+                samples.append(time.perf_counter() - started)
+            capacity = arrays[4]
+            self.stdout.write(
+                f'{size:>9} applications, {len(capacity):>7} internships: '
+                f'best {min(samples) * 1000:8.1f}ms, matched {int(matched.sum())} of {int(capacity.sum())} positions'
+            )
+
+        if options['database']:
+            with transaction.atomic():
+                summary = matching.run_placement()
+                transaction.set_rollback(True)
+            self.stdout.write(f'database: {summary}')
+
+    def synthetic(self, size, per_student, rng):
+        """
+        Students each applying to `per_student` internships, with scarce positions
+        """
+        n_students = max(1, size // per_student)
+        n_internships = max(1, size // (per_student * 4))
+        student_index = np.repeat(np.arange(n_students), per_student)[:size]
+        # Popularity is skewed, so a few internships are heavily contested
+        weights = 1.0 / np.arange(1, n_internships + 1) ** 0.8
+        internship_index = rng.choice(n_internships, size=size, p=weights / weights.sum())
+        rank = np.tile(np.arange(per_student), n_students)[:size]
+        scores = rng.random(size)
+        capacity = rng.integers(1, 6, n_internships)
+        tiebreak = np.arange(size)
+        return student_index, internship_index, rank, scores, capacity, tiebreak
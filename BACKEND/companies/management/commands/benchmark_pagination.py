@@ -0,0 +1,59 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from companies import views
+from companies.benchmarking import format_summary, measure, seed_internships
+from companies.models import Internship
+from companies.pagination import encode_cursor, get_keyset
+
+
+class Command(BaseCommand):
+    help = 'Compare internship_list latency at page 1 and a deep page: page numbers vs cursors'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Create this many synthetic internships (rolled back afterwards)')
+        parser.add_argument('--page', type=int, default=500, help='Deep page to compare against page 1')
+        parser.add_argument('--page-size', type=int, default=10)
+        parser.add_argument('--iterations', type=int, default=50)
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        page_size = options['page_size']
+
+        with transaction.atomic():
+            if options['seed']:
+                seed_internships(options['seed'])
+            user = User.objects.create(username='benchmark-pagination-reader')
+
+            def call(params):
+                def request():
+                    req = factory.get('/api/internships/', {'page_size': page_size, **params})
+                    force_authenticate(req, user=user)
+                    response = views.internship_list(req)
+                    assert response.status_code == 200, response.data
+                return request
+
+            ordered = Internship.objects.filter(
+                is_active=True,
+                company__is_approved=True
+            ).order_by('application_deadline')
+            offset = (options['page'] - 1) * page_size
+            if offset >= ordered.count():
+                self.stderr.write(f'Not enough internships for page {options["page"]}; use --seed')
+                return
+            deep_cursor = encode_cursor(get_keyset(ordered), ordered[offset - 1]) if offset else ''
+
+            cases = [
+                ('page=1', {'page': 1}),
+                (f'page={options["page"]}', {'page': options['page']}),
+                ('cursor first', {'cursor': ''}),
+                (f'cursor @{options["page"]}', {'cursor': deep_cursor}),
+            ]
+            for name, params in cases:
+                samples, queries = measure(call(params), options['iterations'])
+                self.stdout.write(f'{name:>14}: {format_summary(samples)} queries={queries}')
+
+            transaction.set_rollback(True)
@@ -0,0 +1,103 @@
+import random
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from companies import throttling
+from companies.benchmarking import WORDS
+from companies.models import InternshipListing
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay abusive search traffic (a new search on every request, so the response cache never helps) '
+        'from several clients, with RATE_LIMITS off and on, and compare the database work it causes; '
+        'rolled back afterwards'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=4,
+                            help='Abusive clients, each with its own user and IP address')
+        parser.add_argument('--requests', type=int, default=200, help='Searches per client')
+        parser.add_argument('--seconds', type=int, default=60,
+                            help='Simulated time the requests are spread over (the rate limiter\'s clock)')
+
+    def handle(self, *args, **options):
+        if not InternshipListing.objects.exists():
+            raise CommandError('Nothing to benchmark against; run seed_data first')
+        if not getattr(settings, 'RATE_LIMITS', {}).get('catalogue'):
+            raise CommandError('RATE_LIMITS has no catalogue limits to measure')
+
+        self.stdout.write(
+            f'{options["clients"]} clients x {options["requests"]} searches over {options["seconds"]}s simulated; '
+            f'catalogue limits {settings.RATE_LIMITS["catalogue"]}, '
+            f'search cost {getattr(settings, "RATE_LIMIT_SEARCH_COST", throttling.DEFAULT_SEARCH_COST)}'
+        )
+        with transaction.atomic():
+            clients = []
+            for n in range(options['clients']):
+                client = Client(REMOTE_ADDR=f'10.0.0.{n + 1}')
+                client.force_login(User.objects.create(username=f'rate-limit-bench-{n}'))
+                clients.append(client)
+
+            allowed_hosts = [*settings.ALLOWED_HOSTS, 'testserver']
+            for label, limits in (('unlimited', {}), ('limited', settings.RATE_LIMITS)):
+                throttling.get_cache().clear()
+                with override_settings(ALLOWED_HOSTS=allowed_hosts, RATE_LIMITS=limits):
+                    self.run_mode(label, clients, options)
+            transaction.set_rollback(True)
+
+    def run_mode(self, label, clients, options):
+        rng = random.Random(0)
+        path = reverse('internship-list')
+        total = len(clients) * options['requests']
+        step = options['seconds'] / total
+        # On an hour boundary, so runs line up with the limiter's windows the same way every time
+        start = time.time() // 3600 * 3600
+        clock = [start]
+        statuses = Counter()
+        per_minute = Counter()
+        sql = {'queries': 0, 'seconds': 0.0}
+
+        def count_queries(execute, sql_text, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql_text, params, many, context)
+            finally:
+                sql['queries'] += 1
+                sql['seconds'] += time.perf_counter() - started
+
+        # The limiter reads the simulated clock, so a whole --seconds span fits in one quick run
+        real_timer = throttling.RateLimitThrottle.timer
+        throttling.RateLimitThrottle.timer = staticmethod(lambda: clock[0])
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(count_queries):
+                for n in range(options['requests']):
+                    for client in clients:
+                        term = ' '.join(rng.sample(WORDS, 2))
+                        response = client.get(path, {'search': term, 'nocache': n})
+                        statuses[response.status_code] += 1
+                        if response.status_code == 200:
+                            per_minute[int((clock[0] - start) // 60)] += 1
+                        clock[0] += step
+        finally:
+            throttling.RateLimitThrottle.timer = real_timer
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f'{label:>9}: {", ".join(f"{code}={count}" for code, count in sorted(statuses.items()))} | '
+            f'{sql["queries"]} queries ({sql["queries"] / total:.1f}/request), '
+            f'SQL {sql["seconds"] * 1000:.0f}ms, wall {elapsed:.2f}s'
+        )
+        self.stdout.write(
+            f'           searches served per simulated minute: '
+            f'{", ".join(str(per_minute[minute]) for minute in sorted(per_minute))}'
+        )
@@ -0,0 +1,82 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Concat
+from django.test.utils import override_settings
+
+from companies import listings, recommendations
+from companies.benchmarking import seed_internships
+from companies.models import Internship, InternshipListing
+from students.models import Student
+
+
+class Command(BaseCommand):
+    help = (
+        'Build the recommendation index, time top-k scoring and full recommendations per student, '
+        'and an incremental refresh after internships change; rolled back afterwards'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=50000,
+                            help='Create this many synthetic internships first (rolled back afterwards)')
+        parser.add_argument('--students', type=int, default=200, help='Students to recommend for')
+        parser.add_argument('--k', type=int, default=20)
+        parser.add_argument('--changed', type=int, default=500,
+                            help='Internships edited before the incremental refresh')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['seed']:
+                seed_internships(options['seed'])
+            students = list(Student.objects.order_by('pk')[:options['students']])
+            if not students:
+                raise CommandError('No students; run seed_data first')
+
+            started = time.perf_counter()
+            index = recommendations.RecommendationIndex.build()
+            build_seconds = time.perf_counter() - started
+            main = index.main
+            memory = main.indptr.nbytes + main.postings_document.nbytes + main.postings_weight.nbytes
+            self.stdout.write(
+                f'index: {len(index)} listings, {len(main.postings_document):,} postings, '
+                f'{memory / 2**20:.1f} MiB, built in {build_seconds:.2f}s'
+            )
+
+            profiles = [recommendations.student_profile(index, student) for student in students]
+            self.report('top-k scoring', [
+                self.timed(index.top_k, profile, options['k'], applied) for profile, applied in profiles
+            ])
+            # Whole requests: the profile queries, scoring, and loading the listing rows
+            recommendations._index, recommendations._checked_at = index, time.monotonic()
+            with override_settings(RECOMMENDATIONS_REFRESH_SECONDS=float('inf')):
+                self.report('recommend()', [
+                    self.timed(recommendations.recommend, student, options['k']) for student in students
+                ])
+
+            changed = list(InternshipListing.objects.order_by('?').values_list('pk', flat=True)[:options['changed']])
+            Internship.objects.filter(pk__in=changed).update(title=Concat(F('title'), Value(' remote')))
+            listings.refresh_internships(changed)
+            started = time.perf_counter()
+            refreshed = index.refreshed()
+            self.stdout.write(
+                f'incremental refresh of {len(changed)} changed internships: '
+                f'{(time.perf_counter() - started) * 1000:.1f}ms '
+                f'({"delta segment of " + str(len(refreshed.delta)) if refreshed.main is index.main else "rebuilt"})'
+            )
+            recommendations.reset()
+            transaction.set_rollback(True)
+
+    def timed(self, function, *args):
+        started = time.perf_counter()
+        function(*args)
+        return time.perf_counter() - started
+
+    def report(self, label, samples):
+        samples = np.array(samples) * 1000
+        self.stdout.write(
+            f'{label}: p50 {np.percentile(samples, 50):.2f}ms, p99 {np.percentile(samples, 99):.2f}ms, '
+            f'max {samples.max():.2f}ms over {len(samples)} students'
+        )
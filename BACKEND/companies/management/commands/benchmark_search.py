@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from companies import search
+from companies.benchmarking import format_summary, seed_internships
+from companies.models import Internship
+
+
+class Command(BaseCommand):
+    help = 'Compare internship_list search latency: icontains scans vs the full-text index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Create this many synthetic internships (rolled back afterwards)')
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--query', action='append', dest='queries',
+                            help='Search term to benchmark (repeatable)')
+
+    def handle(self, *args, **options):
+        queries = options['queries'] or ['python', 'data analyst', 'cloud engineer', 'nursing']
+
+        with transaction.atomic():
+            if options['seed']:
+                seed_internships(options['seed'])
+                # bulk_create skips the save signals
+                search.rebuild_index()
+                self.stdout.write(f'Seeded {options["seed"]} internships')
+
+            base = Internship.objects.filter(
+                is_active=True,
+                company__is_approved=True
+            ).select_related('company')
+
+            paths = {
+                'icontains': lambda q: search.icontains_filter(base, q).order_by('application_deadline'),
+                'index': lambda q: search.search(base, q).order_by('search_rank'),
+            }
+
+            self.stdout.write(f'{Internship.objects.count()} internships, {options["iterations"]} iterations per query')
+            for name, build in paths.items():
+                samples = []
+                for _ in range(options['iterations']):
+                    for query in queries:
+                        started = time.perf_counter()
+                        queryset = build(query)
+                        queryset.count()
+                        list(queryset[:10])
+                        samples.append((time.perf_counter() - started) * 1000)
+
+                self.stdout.write(f'{name:>10}: {format_summary(samples)}')
+
+            transaction.set_rollback(True)
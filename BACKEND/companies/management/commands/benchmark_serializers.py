@@ -0,0 +1,78 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+from rest_framework.renderers import JSONRenderer
+
+from companies import fastpath
+from companies.benchmarking import seed_internships
+from companies.models import Application, Company, InternshipListing
+from companies.planner import plan_queryset
+from companies.serializers import ApplicationListSerializer, CompanySerializer, InternshipListingSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        'Serialize and render pages of the list serializers with DRF and with the fast path '
+        '(FAST_SERIALIZERS), and report rows per second for each'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Create this many synthetic internships (rolled back afterwards)')
+        parser.add_argument('--rows', type=int, default=100, help='Rows per page, as page_size')
+        parser.add_argument('--iterations', type=int, default=50)
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        # Primary key order, so the page query itself stays cheap next to the serializing
+        cases = [
+            ('internship listing', InternshipListingSerializer, InternshipListing.objects.order_by('pk')),
+            ('company', CompanySerializer, Company.objects.order_by('pk')),
+            ('application', ApplicationListSerializer,
+             plan_queryset(Application.objects.all(), ApplicationListSerializer).order_by('pk')),
+        ]
+
+        with transaction.atomic():
+            if options['seed']:
+                seed_internships(options['seed'])
+            self.stdout.write(
+                f'{rows} rows per page, {options["iterations"]} iterations; '
+                f'orjson {"installed" if fastpath.orjson else "not installed (stdlib json)"}'
+            )
+            for label, serializer_class, queryset in cases:
+                page = queryset[:rows]
+                count = len(page)
+                if not count:
+                    raise CommandError(f'No {label} rows; run seed_data first')
+                results = {}
+                for mode, fast in (('drf', False), ('fast', True)):
+                    renderer = fastpath.FastJSONRenderer() if fast else JSONRenderer()
+                    with override_settings(FAST_SERIALIZERS=fast):
+                        results[mode] = self.measure(serializer_class, page, renderer, options['iterations'])
+                if results['drf'][2] != results['fast'][2]:
+                    raise CommandError(f'{label}: the fast path rendered different bytes')
+                self.stdout.write(f'{label} ({count} rows):')
+                for mode, (serialize_seconds, render_seconds, _) in results.items():
+                    total = count * options['iterations']
+                    self.stdout.write(
+                        f'  {mode:>4}: serialize {total / serialize_seconds:>9,.0f} rows/s, '
+                        f'serialize+render {total / (serialize_seconds + render_seconds):>9,.0f} rows/s'
+                    )
+            transaction.set_rollback(True)
+
+    def measure(self, serializer_class, page, renderer, iterations):
+        """
+        Seconds spent building rows (query included) and rendering them, and the last rendered body
+        """
+        serialize_seconds = render_seconds = 0.0
+        for _ in range(iterations):
+            started = time.perf_counter()
+            # A fresh queryset each time, so nothing is served from its result cache
+            data = fastpath.serialize(serializer_class, page.all())
+            rendered = time.perf_counter()
+            content = renderer.render(data)
+            serialize_seconds += rendered - started
+            render_seconds += time.perf_counter() - rendered
+        return serialize_seconds, render_seconds, content
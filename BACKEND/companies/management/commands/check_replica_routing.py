@@ -0,0 +1,127 @@
+import sqlite3
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from companies import cache, routers
+from companies.models import Internship
+from students.models import Student
+
+
+class Command(BaseCommand):
+    help = (
+        'Call the catalogue endpoints and a few others and check which database each one\'s queries go to: '
+        'catalogue reads to the replicas, everything else to the primary. Locally, with two SQLite files: '
+        'DATABASE_URL=sqlite:///primary.sqlite3 DATABASE_REPLICA_URLS=sqlite:///replica.sqlite3 '
+        'manage.py check_replica_routing --copy'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--copy', action='store_true',
+                            help='First copy the SQLite primary over each SQLite replica, standing in for replication')
+
+    def handle(self, *args, **options):
+        aliases = routers.replicas()
+        if not aliases:
+            raise CommandError('No replicas configured; set DATABASE_REPLICA_URLS')
+        if options['copy']:
+            for alias in aliases:
+                self.copy(alias)
+
+        student = Student.objects.filter(applications__isnull=False).order_by('pk').first()
+        internship = Internship.objects.filter(is_active=True, company__is_approved=True).order_by('pk').first()
+        if student is None or internship is None:
+            raise CommandError('Nothing to call; run seed_data on the primary (and --copy) first')
+        to_apply = Internship.objects.filter(
+            is_active=True, company__is_approved=True
+        ).exclude(applications__student=student).order_by('-application_deadline').first()
+
+        # name -> (method, path, data, whether its reads should go to a replica)
+        probes = {
+            'company-list': ('get', reverse('company-list'), None, True),
+            'company-detail': ('get', reverse('company-detail', args=[internship.company_id]), None, True),
+            'internship-list': ('get', reverse('internship-list') + '?search=python', None, True),
+            'internship-detail': ('get', reverse('internship-detail', args=[internship.pk]), None, True),
+            'internship-by-company': (
+                'get', reverse('internship-by-company') + f'?company_id={internship.company_id}', None, True,
+            ),
+            'async-company-list': ('get', reverse('async-company-list'), None, True),
+            'async-internship-detail': ('get', reverse('async-internship-detail', args=[internship.pk]), None, True),
+            'application-list': ('get', reverse('application-list-create'), None, False),
+            'application-statistics': ('get', reverse('application-statistics'), None, False),
+            'application-create': (
+                'post', reverse('application-list-create'),
+                {'internship': (to_apply or internship).pk, 'cover_letter': '-'}, False,
+            ),
+        }
+
+        if cache.recently_written():
+            # The catalogue views read the primary until then
+            self.stdout.write(f'Waiting {cache.get_replica_lag()}s for a recent catalogue write to pass')
+            time.sleep(cache.get_replica_lag())
+
+        queries = Counter()
+
+        def count(alias):
+            def wrapper(execute, sql, params, many, context):
+                queries[alias] += 1
+                return execute(sql, params, many, context)
+            return wrapper
+
+        failures = []
+        settings_override = {
+            'ALLOWED_HOSTS': [*settings.ALLOWED_HOSTS, 'testserver'],
+            'RATE_LIMITS': {},
+            'CATALOGUE_CACHE_TIMEOUT': 0,
+        }
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(count(alias)))
+            # The login session and the application are written to the primary, and rolled back
+            stack.enter_context(override_settings(**settings_override))
+            stack.enter_context(transaction.atomic())
+            client = Client()
+            client.force_login(student.user)
+            for name, (method, path, data, replica_reads) in probes.items():
+                queries.clear()
+                with transaction.atomic():
+                    if method == 'get':
+                        response = client.get(path)
+                    else:
+                        response = client.post(path, data, content_type='application/json')
+                    transaction.set_rollback(True)
+                on_replicas = sum(queries[alias] for alias in aliases)
+                ok = on_replicas > 0 if replica_reads else on_replicas == 0
+                if not ok:
+                    failures.append(name)
+                self.stdout.write(
+                    f'{name:>24}: {response.status_code} '
+                    + ' '.join(f'{alias}={queries[alias]}' for alias in connections)
+                    + ('' if ok else '  <- expected ' + ('replica reads' if replica_reads else 'no replica queries'))
+                )
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError(f'Misrouted: {", ".join(failures)}')
+        self.stdout.write(self.style.SUCCESS('Catalogue reads go to the replicas, everything else to the primary'))
+
+    def copy(self, alias):
+        primary, replica = connections[DEFAULT_DB_ALIAS], connections[alias]
+        if primary.vendor != 'sqlite' or replica.vendor != 'sqlite':
+            raise CommandError('--copy only copies SQLite databases')
+        replica.close()
+        source = sqlite3.connect(primary.settings_dict['NAME'])
+        target = sqlite3.connect(replica.settings_dict['NAME'])
+        try:
+            source.backup(target)
+        finally:
+            source.close()
+            target.close()
+        self.stdout.write(f'Copied {primary.settings_dict["NAME"]} to {replica.settings_dict["NAME"]}')
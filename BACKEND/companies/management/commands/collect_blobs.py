@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from companies import blobs
+
+
+class Command(BaseCommand):
+    help = (
+        'Recount the references to stored blobs (resumes, logos) and remove the files '
+        'nothing has referenced for the grace period'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=float, default=blobs.DEFAULT_GRACE.total_seconds() / 3600,
+                            help='Keep unreferenced blobs this long, for uploads not committed yet')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be fixed and removed')
+
+    def handle(self, *args, **options):
+        apply = not options['dry_run']
+
+        with transaction.atomic():
+            wrong = blobs.recount(apply=apply)
+        if wrong:
+            verb = 'Fixed' if apply else 'Found'
+            self.stdout.write(f'{verb} {len(wrong)} drifted reference counts: {wrong[:20]}')
+
+        removed, freed = blobs.collect_garbage(timedelta(hours=options['grace_hours']), apply=apply)
+        verb = 'Removed' if apply else 'Would remove'
+        self.stdout.write(f'{verb} {len(removed)} unreferenced files ({freed / 1024:.1f} KB)')
+        self.stdout.write(self.style.SUCCESS('Done'))
@@ -0,0 +1,64 @@
+import multiprocessing
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F, Q
+
+from companies import thumbnails
+from companies.models import Company
+from companies.storage import public_blob_storage
+
+
+class Command(BaseCommand):
+    help = (
+        'Render the thumbnail and WebP derivatives of company logos that have none yet, '
+        'on a pool of processes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--all', action='store_true', help='Render every logo again, not just missing ones')
+
+    def handle(self, *args, **options):
+        companies = Company.objects.exclude(Q(logo='') | Q(logo__isnull=True))
+        if not options['all']:
+            companies = companies.exclude(logo_derived_from=F('logo'))
+        # Companies sharing a logo share its derivatives; render each file once
+        by_logo = defaultdict(list)
+        for pk, logo in companies.values_list('pk', 'logo').iterator(chunk_size=2000):
+            by_logo[logo].append(pk)
+        if not by_logo:
+            self.stdout.write('No logos to render')
+            return
+
+        size = thumbnails.thumbnail_size()
+        started = time.perf_counter()
+        saved, failed = 0, []
+        # Spawned, so no worker inherits this process's database connections; they only run PIL
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(options['processes'], mp_context=context, initializer=django.setup) as pool:
+            futures = {
+                pool.submit(thumbnails.render, public_blob_storage.path(logo), size): logo
+                for logo in by_logo
+            }
+            for future in as_completed(futures):
+                logo = futures[future]
+                try:
+                    names = thumbnails.store(future.result())
+                except Exception as exc:
+                    failed.append(logo)
+                    self.stderr.write(f'{logo}: {exc}')
+                    continue
+                saved += sum(thumbnails.apply(pk, logo, names) for pk in by_logo[logo])
+
+        self.stdout.write(
+            f'Rendered {len(by_logo) - len(failed)} logos for {saved} companies in '
+            f'{time.perf_counter() - started:.1f}s on {options["processes"]} processes'
+        )
+        if failed:
+            raise CommandError(f'{len(failed)} logos could not be rendered')
+        self.stdout.write(self.style.SUCCESS('Done'))
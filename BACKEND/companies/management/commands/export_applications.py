@@ -0,0 +1,41 @@
+import sys
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from companies import export
+
+
+class Command(BaseCommand):
+    help = 'Stream the application / placement roster to a CSV or NDJSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(export.FORMATS), default='csv', dest='export_format')
+        parser.add_argument('--output', help='File to write (default: stdout)')
+        parser.add_argument('--institution', help='Institution id')
+        parser.add_argument('--company', help='Company id')
+        parser.add_argument('--status', help='Comma-separated statuses, e.g. accepted for placements')
+        parser.add_argument('--applied-after', help='YYYY-MM-DD, inclusive')
+        parser.add_argument('--applied-before', help='YYYY-MM-DD, inclusive')
+        parser.add_argument('--chunk-size', type=int, default=export.DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            applications = export.filter_applications(options)
+        except ValidationError as exc:
+            raise CommandError(exc.messages[0])
+
+        output = open(options['output'], 'w', newline='') if options['output'] else sys.stdout
+        started = time.perf_counter()
+        written = 0
+        try:
+            for text in export.stream(applications, options['export_format'], options['chunk_size']):
+                output.write(text)
+                written += len(text)
+        finally:
+            if options['output']:
+                output.close()
+
+        elapsed = time.perf_counter() - started
+        self.stderr.write(f'Wrote {written / 1024:.0f}KB in {elapsed:.2f}s')
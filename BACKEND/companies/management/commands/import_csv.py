@@ -0,0 +1,50 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from companies import importer
+
+
+class Command(BaseCommand):
+    help = 'Import students or internships from a CSV file in resumable, bulk-validated chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(importer.IMPORTERS))
+        parser.add_argument('path')
+        parser.add_argument('--chunk-size', type=int, default=importer.DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--errors', help='Per-row error report (default: <path>.errors.csv)')
+        parser.add_argument('--checkpoint', help='Progress file (default: <path>.checkpoint.json)')
+        parser.add_argument('--restart', action='store_true',
+                            help='Ignore any checkpoint and start from the first row')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'{path} does not exist')
+        checkpoint_path = options['checkpoint'] or f'{path}.checkpoint.json'
+        error_path = options['errors'] or f'{path}.errors.csv'
+        if options['restart'] and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+
+        resumed = importer.read_checkpoint(checkpoint_path, options['kind'], path)
+        if resumed:
+            self.stdout.write(f'Resuming after row {resumed["rows"]}')
+
+        started = time.perf_counter()
+        result = importer.run_import(
+            options['kind'], path,
+            chunk_size=options['chunk_size'],
+            checkpoint_path=checkpoint_path,
+            error_path=error_path,
+            on_chunk=lambda progress: self.stdout.write(f'  {progress["rows"]} rows', ending='\r'),
+        )
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f'{result["rows"]} rows in {elapsed:.1f}s: {result["created"]} created, '
+            f'{result["updated"]} updated, {result["failed"]} rejected'
+        )
+        if result['failed']:
+            self.stdout.write(f'See {error_path} for the rejected rows')
+        self.stdout.write(self.style.SUCCESS('Done'))
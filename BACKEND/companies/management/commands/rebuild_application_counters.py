@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from companies import counters
+from companies.models import InternshipApplicationStats, StudentApplicationStats
+
+
+class Command(BaseCommand):
+    help = 'Check the per-student and per-internship application counters against live data and rebuild them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Only report drift; exit with an error if any counter is wrong')
+
+    def handle(self, *args, **options):
+        apply = not options['check']
+        drifted = 0
+
+        with transaction.atomic():
+            for model in (StudentApplicationStats, InternshipApplicationStats):
+                wrong = counters.rebuild(model, apply=apply)
+                drifted += len(wrong)
+                label = model._meta.verbose_name_plural
+                if wrong:
+                    verb = 'Rebuilt' if apply else 'Found'
+                    self.stdout.write(f'{verb} {len(wrong)} drifted {label} rows: {wrong[:20]}')
+                else:
+                    self.stdout.write(f'{label}: all counters match')
+
+        if drifted and not apply:
+            raise CommandError(f'{drifted} counter rows disagree with the applications table')
+        self.stdout.write(self.style.SUCCESS('Done'))
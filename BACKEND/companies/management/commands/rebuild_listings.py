@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from companies import cache, listings
+
+
+class Command(BaseCommand):
+    help = 'Check the internship listing rows against the internship and company tables and rebuild them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Only report drift; exit with an error if any row is wrong')
+
+    def handle(self, *args, **options):
+        apply = not options['check']
+
+        with transaction.atomic():
+            wrong = listings.rebuild(apply=apply)
+
+        if wrong:
+            verb = 'Rebuilt' if apply else 'Found'
+            self.stdout.write(f'{verb} {len(wrong)} drifted listing rows: {wrong[:20]}')
+            if not apply:
+                raise CommandError(f'{len(wrong)} listing rows disagree with the source tables')
+            cache.invalidate()
+        else:
+            self.stdout.write('internship listings: all rows match')
+        self.stdout.write(self.style.SUCCESS('Done'))
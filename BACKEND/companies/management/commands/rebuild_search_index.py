@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from companies import cache, search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the internship full-text search index from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=None, help='Database alias to rebuild')
+
+    def handle(self, *args, **options):
+        if not search.is_supported(options['database']):
+            raise CommandError('The configured database has no full-text index; search uses icontains lookups.')
+
+        indexed = search.rebuild_index(options['database'])
+        # Search results may have changed without any save signal
+        cache.invalidate()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} internships'))
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from companies import analytics
+
+
+class Command(BaseCommand):
+    help = (
+        'Bring the analytics rollups up to date with changes since the last refresh '
+        '(run it from cron), or rebuild them from scratch with --rebuild'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Recompute every rollup row, e.g. after deletes or bulk data fixes')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        summary = analytics.rebuild() if options['rebuild'] else analytics.refresh()
+        self.stdout.write(
+            f'{"Rebuilt" if summary["rebuilt"] else "Refreshed"} {summary["placement_groups"]} placement '
+            f'and {summary["trend_groups"]} trend groups in {time.perf_counter() - started:.2f}s'
+        )
@@ -0,0 +1,39 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from companies import jobs
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs on a thread pool until stopped (or until the queue is empty with --once)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--batch-size', type=int, help='Jobs claimed at a time (default: 4 per thread)')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds to wait when no job is due')
+        parser.add_argument('--once', action='store_true', help='Exit when no job is due')
+        parser.add_argument('--worker-id', help='Name recorded on claimed jobs (default: host:pid)')
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+        # Finish the current batch, then exit
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stop.set())
+
+        def on_batch(batch, results):
+            failed = results.count(False)
+            self.stdout.write(f'{len(batch)} jobs run, {failed} failed' if failed else f'{len(batch)} jobs run')
+
+        done = jobs.work(
+            threads=options['threads'],
+            batch_size=options['batch_size'],
+            poll_interval=options['poll_interval'],
+            stop=stop,
+            once=options['once'],
+            worker=options['worker_id'],
+            on_batch=on_batch if options['verbosity'] > 1 else None,
+        )
+        self.stdout.write(self.style.SUCCESS(f'Ran {done} jobs'))
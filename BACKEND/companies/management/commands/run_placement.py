@@ -0,0 +1,24 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from companies import counters, matching
+
+
+class Command(BaseCommand):
+    help = 'Allocate students to internships from their open applications (stable matching)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Compute and report the placement without writing it')
+        parser.add_argument('--reject-unmatched', action='store_true',
+                            help='Reject every candidate application that was not matched')
+
+    def handle(self, *args, **options):
+        try:
+            summary = matching.run_placement(
+                dry_run=options['dry_run'], reject_unmatched=options['reject_unmatched'],
+            )
+        except counters.PositionsFilled as exc:
+            raise CommandError(f'{exc}; positions changed during the run, nothing was written')
+        self.stdout.write(json.dumps(summary, indent=2))
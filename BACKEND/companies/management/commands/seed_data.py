@@ -0,0 +1,226 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from companies import cache, counters, listings, search
+from companies.benchmarking import WORDS
+from companies.models import (
+    Application,
+    Company,
+    Internship,
+    InternshipApplicationStats,
+    StudentApplicationStats,
+)
+from institution.models import Institution
+from students.models import Student
+
+
+FIRST_NAMES = ['Amina', 'Brian', 'Cynthia', 'David', 'Esther', 'Felix', 'Grace', 'Hassan',
+               'Irene', 'James', 'Kevin', 'Lucy', 'Mercy', 'Njeri', 'Otieno', 'Peter']
+LAST_NAMES = ['Achieng', 'Barasa', 'Chebet', 'Kamau', 'Kiptoo', 'Mutua', 'Njoroge',
+              'Odhiambo', 'Omondi', 'Wafula', 'Wanjiru', 'Waweru']
+COURSES = ['Computer Science', 'Information Technology', 'Electrical Engineering',
+           'Civil Engineering', 'Business Administration', 'Accounting', 'Nursing',
+           'Education', 'Economics', 'Journalism', 'Statistics', 'Law']
+INDUSTRIES = ['Technology', 'Finance', 'Healthcare', 'Manufacturing', 'Agriculture',
+              'Telecommunications', 'Energy', 'Media', 'Logistics', 'Education']
+LOCATIONS = ['Nairobi', 'Mombasa', 'Kisumu', 'Nakuru', 'Eldoret', 'Thika', 'Nyeri', 'Machakos']
+ROLES = ['Intern', 'Attachment Trainee', 'Graduate Trainee', 'Assistant']
+STATUS_WEIGHTS = {'pending': 50, 'under_review': 20, 'accepted': 10, 'rejected': 15, 'withdrawn': 5}
+
+
+class Command(BaseCommand):
+    help = 'Bulk-seed institutions, students, companies, internships and applications for benchmarking'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--institutions', type=int, default=50)
+        parser.add_argument('--students', type=int, default=10000)
+        parser.add_argument('--companies', type=int, default=1000)
+        parser.add_argument('--internships', type=int, default=20000)
+        parser.add_argument('--applications', type=int, default=100000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--random-seed', type=int, default=42)
+        parser.add_argument('--prefix', default='seed',
+                            help='Prefix for generated usernames and codes, so runs can be told apart')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['random_seed'])
+        self.batch_size = options['batch_size']
+        self.prefix = options['prefix']
+        self.password = make_password(None)
+
+        if options['applications'] > options['students'] * options['internships']:
+            options['applications'] = options['students'] * options['internships']
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            institution_ids = self.step('institutions', self.seed_institutions, options['institutions'])
+            student_ids = self.step('students', self.seed_students, options['students'], institution_ids)
+            company_ids = self.step('companies', self.seed_companies, options['companies'])
+            internship_ids = self.step('internships', self.seed_internships, options['internships'], company_ids)
+            self.step('applications', self.seed_applications, options['applications'],
+                      student_ids, internship_ids)
+
+            # bulk_create skips the signals that maintain the derived tables
+            search.rebuild_index()
+            counters.rebuild(StudentApplicationStats)
+            counters.rebuild(InternshipApplicationStats)
+            listings.rebuild()
+        cache.invalidate()
+
+        self.stdout.write(self.style.SUCCESS(f'Seeded in {time.perf_counter() - started:.1f}s'))
+
+    def step(self, label, func, count, *args):
+        started = time.perf_counter()
+        ids = func(count, *args)
+        self.stdout.write(f'{label}: {count} rows in {time.perf_counter() - started:.1f}s')
+        return ids
+
+    def new_ids(self, model, before):
+        return list(model.objects.filter(pk__gt=before or 0).values_list('pk', flat=True))
+
+    def max_id(self, model):
+        return model.objects.aggregate(Max('pk'))['pk__max']
+
+    def batches(self, count):
+        for start in range(0, count, self.batch_size):
+            yield range(start, min(count, start + self.batch_size))
+
+    def create_users(self, kind, numbers):
+        users = [
+            User(username=f'{self.prefix}-{kind}-{n}', email=f'{self.prefix}-{kind}-{n}@example.com',
+                 password=self.password)
+            for n in numbers
+        ]
+        User.objects.bulk_create(users)
+        return dict(User.objects.filter(
+            username__in=[user.username for user in users]
+        ).values_list('username', 'id'))
+
+    def seed_institutions(self, count):
+        before = self.max_id(Institution)
+        Institution.objects.bulk_create([
+            Institution(
+                name=f'{self.rng.choice(LOCATIONS)} University {n}',
+                code=f'{self.prefix}-I{n}',
+                email=f'registrar{n}@{self.prefix}.example.com',
+                phone='0200000000',
+                address=self.rng.choice(LOCATIONS),
+            )
+            for n in range(count)
+        ], batch_size=self.batch_size)
+        return self.new_ids(Institution, before)
+
+    def seed_students(self, count, institution_ids):
+        before = self.max_id(Student)
+        for numbers in self.batches(count):
+            user_ids = self.create_users('student', numbers)
+            Student.objects.bulk_create([
+                Student(
+                    user_id=user_ids[f'{self.prefix}-student-{n}'],
+                    student_id=f'{self.prefix}-S{n}',
+                    first_name=self.rng.choice(FIRST_NAMES),
+                    last_name=self.rng.choice(LAST_NAMES),
+                    email=f'{self.prefix}-student-{n}@students.example.com',
+                    phone='0711000000',
+                    institution_id=self.rng.choice(institution_ids),
+                    course=self.rng.choice(COURSES),
+                    year_of_study=self.rng.randint(1, 5),
+                    is_approved=self.rng.random() < 0.9,
+                )
+                for n in numbers
+            ])
+        return self.new_ids(Student, before)
+
+    def seed_companies(self, count):
+        before = self.max_id(Company)
+        for numbers in self.batches(count):
+            user_ids = self.create_users('company', numbers)
+            Company.objects.bulk_create([
+                Company(
+                    user_id=user_ids[f'{self.prefix}-company-{n}'],
+                    company_name=f'{self.rng.choice(LAST_NAMES)} {self.rng.choice(INDUSTRIES)} {n}',
+                    email=f'{self.prefix}-company-{n}@companies.example.com',
+                    phone='0722000000',
+                    address=self.rng.choice(LOCATIONS),
+                    industry=self.rng.choice(INDUSTRIES),
+                    description=' '.join(self.rng.choices(WORDS, k=30)),
+                    is_approved=self.rng.random() < 0.8,
+                )
+                for n in numbers
+            ])
+        return self.new_ids(Company, before)
+
+    def seed_internships(self, count, company_ids):
+        today = date.today()
+        before = self.max_id(Internship)
+        for numbers in self.batches(count):
+            rows = []
+            for _ in numbers:
+                keywords = self.rng.choices(WORDS, k=3)
+                deadline = today + timedelta(days=self.rng.randint(-60, 120))
+                rows.append(Internship(
+                    company_id=self.rng.choice(company_ids),
+                    title=f'{keywords[0].title()} {keywords[1].title()} {self.rng.choice(ROLES)}',
+                    description=' '.join(self.rng.choices(WORDS, k=60)),
+                    requirements=' '.join(self.rng.choices(WORDS, k=20)),
+                    placement_type=self.rng.choice(['internship', 'attachment']),
+                    duration_months=self.rng.choice([3, 6, 12]),
+                    positions_available=self.rng.randint(1, 20),
+                    location=self.rng.choice(LOCATIONS),
+                    stipend=self.rng.choice([None, 5000, 10000, 15000, 25000]),
+                    application_deadline=deadline,
+                    start_date=deadline + timedelta(days=30),
+                    is_active=self.rng.random() < 0.85,
+                ))
+            Internship.objects.bulk_create(rows)
+        return self.new_ids(Internship, before)
+
+    def seed_applications(self, count, student_ids, internship_ids):
+        statuses = list(STATUS_WEIGHTS)
+        weights = list(STATUS_WEIGHTS.values())
+        # For internships whose positions are all taken
+        unplaced = [status for status in statuses if status != 'accepted']
+        unplaced_weights = [STATUS_WEIGHTS[status] for status in unplaced]
+        # The internships are new, so every position is still open
+        open_positions = dict(
+            Internship.objects.filter(pk__gte=min(internship_ids)).values_list('pk', 'positions_available')
+        )
+
+        def status_for(internship_id):
+            status = self.rng.choices(statuses, weights)[0]
+            if status != 'accepted':
+                return status
+            if open_positions[internship_id] <= 0:
+                return self.rng.choices(unplaced, unplaced_weights)[0]
+            open_positions[internship_id] -= 1
+            return status
+
+        def rows():
+            # Spread `count` over the students; each applies to distinct internships
+            per_student, remainder = divmod(count, len(student_ids))
+            for index, student_id in enumerate(student_ids):
+                k = min(len(internship_ids), per_student + (1 if index < remainder else 0))
+                for internship_id in self.rng.sample(internship_ids, k):
+                    yield Application(
+                        student_id=student_id,
+                        internship_id=internship_id,
+                        cover_letter=' '.join(self.rng.choices(WORDS, k=40)),
+                        status=status_for(internship_id),
+                        admin_approved=self.rng.random() < 0.3,
+                    )
+
+        batch = []
+        for application in rows():
+            batch.append(application)
+            if len(batch) >= self.batch_size:
+                Application.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Application.objects.bulk_create(batch)
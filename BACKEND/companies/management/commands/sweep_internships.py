@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from companies import expiry
+
+
+class Command(BaseCommand):
+    help = (
+        'Deactivate internships past their application deadline and optionally '
+        'archive old inactive ones with their applications (run it from cron)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=expiry.DEFAULT_BATCH_SIZE,
+                            help='Internships per UPDATE / archive transaction')
+        parser.add_argument('--archive-after-days', type=int,
+                            help='Archive inactive internships this many days past their deadline '
+                                 '(default: EXPIRY_ARCHIVE_AFTER_DAYS; not set means no archiving)')
+
+    def handle(self, *args, **options):
+        run = expiry.sweep(archive_after=options['archive_after_days'], batch_size=options['batch_size'])
+        self.stdout.write(
+            f'Deactivated {run.deactivated} internships, archived {run.archived_internships} internships '
+            f'and {run.archived_applications} applications in {run.duration_seconds:.2f}s'
+        )
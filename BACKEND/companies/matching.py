@@ -0,0 +1,278 @@
+# companies/matching.py
+"""
+Placement engine: allocate students to internships from their open applications
+
+Every pending / under_review application to an active internship is a
+candidate edge between a student and an internship. Students rank their
+own applications by when they applied (earliest first, which is primary
+key order, so no timestamps need loading); internships rank
+applicants by a score computed column-wise with NumPy (see SCORE_WEIGHTS).
+Student-proposing deferred acceptance then produces a stable matching that
+respects each internship's free positions: positions_available minus the
+applications already accepted.
+
+Each round of deferred acceptance is a handful of array operations over
+the held and newly proposed edges, and there are at most as many rounds as
+the longest application list, so 100k applications run in well under a
+second. The result is written back in one transaction; the accepted
+counter's capacity check (counters.PositionsFilled) rolls the whole
+placement back if positions were taken in the meantime.
+"""
+import time
+
+import numpy as np
+from django.db import router, transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from . import counters, tasks
+from .models import Application, Internship
+
+
+CANDIDATE_STATUSES = ['pending', 'under_review']
+
+# How internships rank applicants; each feature is scaled to [0, 1]
+SCORE_WEIGHTS = {
+    'under_review': 1.0,    # the company has already shortlisted the application
+    'admin_approved': 0.5,
+    'year_of_study': 0.25,  # final-year students first
+    'applied_early': 0.1,   # earlier applications win ties
+}
+
+UPDATE_BATCH_SIZE = 900
+
+
+class PlacementRunSerializer(serializers.Serializer):
+    """
+    The placement_run body; accepts true/false, 1/0 and their string forms
+    """
+    dry_run = serializers.BooleanField(default=False)
+    reject_unmatched = serializers.BooleanField(default=False)
+
+
+class Problem:
+    """
+    Candidate applications as parallel arrays, one entry per application
+    """
+    def __init__(self, rows, capacity):
+        columns = list(zip(*rows)) if rows else [()] * 6
+        application_ids, student_ids, internship_ids, statuses, admin_approved, years = columns
+
+        self.application_ids = np.array(application_ids, dtype=np.int64)
+        self.student_ids = np.array(student_ids, dtype=np.int64)
+        self.internship_ids = np.array(internship_ids, dtype=np.int64)
+        self.statuses = np.array(statuses, dtype=object)
+        self.under_review = self.statuses == 'under_review'
+        self.admin_approved = np.array(admin_approved, dtype=bool)
+        self.year_of_study = np.array(years, dtype=np.float64)
+
+        # Dense 0..n-1 indexes for students and internships
+        self.students, self.student_index = np.unique(self.student_ids, return_inverse=True)
+        self.internships, self.internship_index = np.unique(self.internship_ids, return_inverse=True)
+        self.capacity = np.array(
+            [max(0, capacity.get(pk, 0)) for pk in self.internships.tolist()], dtype=np.int64
+        )
+
+    def __len__(self):
+        return len(self.application_ids)
+
+
+def load_problem(using=None):
+    """
+    Candidate applications and each internship's free positions, in two queries
+
+    Students who already hold an accepted application are left out.
+    """
+    placed = Application.objects.using(using).filter(status='accepted').values('student_id')
+    rows = list(Application.objects.using(using).filter(
+        status__in=CANDIDATE_STATUSES, internship__is_active=True,
+    ).exclude(student_id__in=placed).values_list(
+        'pk', 'student_id', 'internship_id', 'status', 'admin_approved',
+        'student__year_of_study',
+    ).order_by())
+
+    internship_ids = {row[2] for row in rows}
+    capacity = {
+        pk: positions - (accepted or 0)
+        for pk, positions, accepted in Internship.objects.using(using).filter(
+            pk__in=internship_ids
+        ).values_list('pk', 'positions_available', 'application_stats__accepted')
+    } if internship_ids else {}
+    return Problem(rows, capacity)
+
+
+def _scale(values):
+    low, high = values.min(), values.max()
+    if high == low:
+        return np.zeros_like(values)
+    return (values - low) / (high - low)
+
+
+def score(problem, weights=SCORE_WEIGHTS):
+    """
+    Internship-side score of every candidate application (higher is better)
+    """
+    if not len(problem):
+        return np.zeros(0)
+    features = {
+        'under_review': problem.under_review.astype(np.float64),
+        'admin_approved': problem.admin_approved.astype(np.float64),
+        'year_of_study': _scale(problem.year_of_study),
+        'applied_early': 1.0 - _scale(problem.application_ids.astype(np.float64)),
+    }
+    return sum(weights[name] * values for name, values in features.items())
+
+
+def preference_rank(problem):
+    """
+    Position of each application in its student's preference list (0 = first choice)
+    """
+    order = np.lexsort((problem.application_ids, problem.student_index))
+    return _rank_within_groups(problem.student_index, order)
+
+
+def _rank_within_groups(groups, order):
+    """
+    Rank of every element within its group, following `order` (sorted by group)
+    """
+    sorted_groups = groups[order]
+    position = np.arange(len(order))
+    is_start = np.ones(len(order), dtype=bool)
+    is_start[1:] = sorted_groups[1:] != sorted_groups[:-1]
+    group_start = np.maximum.accumulate(np.where(is_start, position, 0))
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = position - group_start
+    return rank
+
+
+def deferred_acceptance(student_index, internship_index, rank, scores, capacity, tiebreak):
+    """
+    Student-proposing deferred acceptance with internship capacities
+
+    Returns a boolean mask of the matched edges. Each round every unmatched
+    student proposes to their next choice; each internship keeps its
+    best-scoring `capacity` proposals among those held and new ones.
+    """
+    n = len(student_index)
+    matched = np.zeros(n, dtype=bool)
+    if not n:
+        return matched
+
+    # Edges laid out student by student, in preference order
+    by_preference = np.lexsort((rank, student_index))
+    n_students = int(student_index.max()) + 1
+    list_length = np.bincount(student_index, minlength=n_students)
+    list_start = np.concatenate(([0], np.cumsum(list_length)[:-1]))
+    next_choice = np.zeros(n_students, dtype=np.int64)
+    holding = np.zeros(n_students, dtype=bool)
+
+    while True:
+        proposing = np.flatnonzero(~holding & (next_choice < list_length))
+        if not len(proposing):
+            break
+        proposals = by_preference[list_start[proposing] + next_choice[proposing]]
+        next_choice[proposing] += 1
+
+        candidates = np.concatenate((np.flatnonzero(matched), proposals))
+        order = np.lexsort((
+            tiebreak[candidates], -scores[candidates], internship_index[candidates]
+        ))
+        seat = _rank_within_groups(internship_index[candidates], order)
+        keep = seat < capacity[internship_index[candidates]]
+
+        matched[:] = False
+        matched[candidates[keep]] = True
+        holding[:] = False
+        holding[student_index[matched]] = True
+
+    return matched
+
+
+def solve(problem, weights=SCORE_WEIGHTS):
+    """
+    Matched-edge mask for `problem`
+    """
+    return deferred_acceptance(
+        problem.student_index,
+        problem.internship_index,
+        preference_rank(problem),
+        score(problem, weights),
+        problem.capacity,
+        problem.application_ids,
+    )
+
+
+def run_placement(dry_run=False, reject_unmatched=False, using=None):
+    """
+    Load, solve and (unless dry_run) write back a placement round
+
+    Matched applications become accepted; with reject_unmatched every other
+    candidate application is rejected. Returns a summary dict.
+    """
+    using = using or router.db_for_write(Application)
+    timings = {}
+
+    started = time.perf_counter()
+    problem = load_problem(using)
+    timings['load'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    matched = solve(problem)
+    timings['solve'] = time.perf_counter() - started
+
+    summary = {
+        'candidates': len(problem),
+        'students': len(problem.students),
+        'internships': len(problem.internships),
+        'positions': int(problem.capacity.sum()),
+        'matched': int(matched.sum()),
+        'rejected': int((~matched).sum()) if reject_unmatched else 0,
+        'dry_run': dry_run,
+    }
+
+    if not dry_run and len(problem):
+        started = time.perf_counter()
+        summary['changed_meanwhile'] = write_placement(problem, matched, reject_unmatched, using)
+        timings['write'] = time.perf_counter() - started
+
+    summary['seconds'] = {step: round(value, 3) for step, value in timings.items()}
+    return summary
+
+
+def write_placement(problem, matched, reject_unmatched, using):
+    """
+    Apply the matching with batched UPDATEs and the matching counter transitions
+
+    Each batch's rows are locked and their status read again first.
+    Applications whose status changed after load_problem (withdrawn or
+    reviewed meanwhile) are left as they are, and the counters move from
+    the status each UPDATE actually replaced. Returns how many were left.
+    """
+    changes = [('accepted', matched)]
+    if reject_unmatched:
+        changes.append(('rejected', ~matched))
+
+    now = timezone.now()
+    skipped = 0
+    with transaction.atomic(using=using):
+        transitions = []
+        effects = []
+        for status, mask in changes:
+            ids = problem.application_ids[mask].tolist()
+            loaded = dict(zip(ids, problem.statuses[mask].tolist()))
+            edges = dict(zip(ids, zip(problem.student_ids[mask].tolist(), problem.internship_ids[mask].tolist())))
+            for start in range(0, len(ids), UPDATE_BATCH_SIZE):
+                batch = ids[start:start + UPDATE_BATCH_SIZE]
+                stored = dict(
+                    Application.objects.using(using).select_for_update().filter(pk__in=batch)
+                    .values_list('pk', 'status')
+                )
+                unchanged = [pk for pk in batch if stored.get(pk) == loaded[pk]]
+                skipped += len(batch) - len(unchanged)
+                Application.objects.using(using).filter(pk__in=unchanged).update(status=status, updated_at=now)
+                transitions.extend((*edges[pk], loaded[pk], status) for pk in unchanged)
+                effects.extend((pk, loaded[pk], status, now) for pk in unchanged)
+        # The accepted counter re-checks every internship's capacity here
+        counters.apply_transitions(transitions, using)
+        tasks.enqueue_transition_effects(effects, using)
+    return skipped
@@ -0,0 +1,59 @@
+# Full-text search index for internships (see companies/search.py)
+
+from django.db import migrations
+
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE companies_internship_fts USING fts5("
+    "title, description, requirements, company_name, "
+    "tokenize = 'unicode61 remove_diacritics 2')",
+    "INSERT INTO companies_internship_fts (rowid, title, description, requirements, company_name) "
+    "SELECT i.id, i.title, i.description, i.requirements, c.company_name "
+    "FROM companies_internship i JOIN companies_company c ON c.id = i.company_id",
+]
+
+SQLITE_BACKWARD = [
+    "DROP TABLE IF EXISTS companies_internship_fts",
+]
+
+POSTGRES_FORWARD = [
+    "CREATE TABLE companies_internship_search ("
+    "internship_id bigint PRIMARY KEY REFERENCES companies_internship (id) "
+    "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+    "document tsvector NOT NULL)",
+    "CREATE INDEX companies_internship_search_document_idx "
+    "ON companies_internship_search USING GIN (document)",
+    "INSERT INTO companies_internship_search (internship_id, document) "
+    "SELECT i.id, "
+    "setweight(to_tsvector('english', i.title), 'A') || "
+    "setweight(to_tsvector('english', c.company_name), 'B') || "
+    "setweight(to_tsvector('english', i.requirements), 'C') || "
+    "setweight(to_tsvector('english', i.description), 'D') "
+    "FROM companies_internship i JOIN companies_company c ON c.id = i.company_id",
+]
+
+POSTGRES_BACKWARD = [
+    "DROP TABLE IF EXISTS companies_internship_search",
+]
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        for statement in statements.get(vendor, []):
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD}),
+            run({'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRES_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 6.0.1 on 2026-10-18 07:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+STATUSES = ['pending', 'under_review', 'accepted', 'rejected', 'withdrawn']
+
+
+def populate_stats(apps, schema_editor):
+    Application = apps.get_model('companies', 'Application')
+    aggregates = {'total': Count('pk')}
+    aggregates.update({status: Count('pk', filter=Q(status=status)) for status in STATUSES})
+
+    for model_name, key in (('StudentApplicationStats', 'student'), ('InternshipApplicationStats', 'internship')):
+        model = apps.get_model('companies', model_name)
+        rows = Application.objects.values(key).annotate(**aggregates).order_by()
+        model.objects.bulk_create(
+            [model(pk=row.pop(key), **row) for row in rows],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0002_internship_search_index'),
+        ('students', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InternshipApplicationStats',
+            fields=[
+                ('total', models.IntegerField(default=0)),
+                ('pending', models.IntegerField(default=0)),
+                ('under_review', models.IntegerField(default=0)),
+                ('accepted', models.IntegerField(default=0)),
+                ('rejected', models.IntegerField(default=0)),
+                ('withdrawn', models.IntegerField(default=0)),
+                ('internship', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='application_stats', serialize=False, to='companies.internship')),
+            ],
+            options={
+                'verbose_name_plural': 'Internship application stats',
+            },
+        ),
+        migrations.CreateModel(
+            name='StudentApplicationStats',
+            fields=[
+                ('total', models.IntegerField(default=0)),
+                ('pending', models.IntegerField(default=0)),
+                ('under_review', models.IntegerField(default=0)),
+                ('accepted', models.IntegerField(default=0)),
+                ('rejected', models.IntegerField(default=0)),
+                ('withdrawn', models.IntegerField(default=0)),
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='application_stats', serialize=False, to='students.student')),
+            ],
+            options={
+                'verbose_name_plural': 'Student application stats',
+            },
+        ),
+        migrations.RunPython(populate_stats, migrations.RunPython.noop),
+    ]
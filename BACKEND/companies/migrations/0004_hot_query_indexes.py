@@ -0,0 +1,40 @@
+# Generated by Django 6.0.1 on 2026-10-18 07:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0003_application_stats'),
+        ('students', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['student', '-applied_at', '-id'], name='app_student_applied_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['student', 'status', '-applied_at', '-id'], name='app_status_applied_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['student', 'status', '-updated_at'], name='app_status_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(condition=models.Q(('is_approved', True)), fields=['-created_at', '-id'], name='company_approved_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='internship',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['application_deadline', 'id'], name='internship_active_deadln_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='internship',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['company', 'application_deadline'], name='internship_active_company_idx'),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 6.0.1 on 2026-10-18 08:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0005_background_jobs'),
+        ('institution', '0001_initial'),
+        ('students', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarketTrendRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total', models.IntegerField(default=0)),
+                ('pending', models.IntegerField(default=0)),
+                ('under_review', models.IntegerField(default=0)),
+                ('accepted', models.IntegerField(default=0)),
+                ('rejected', models.IntegerField(default=0)),
+                ('withdrawn', models.IntegerField(default=0)),
+                ('month', models.DateField()),
+                ('industry', models.CharField(max_length=100)),
+                ('location', models.CharField(max_length=200)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PlacementRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total', models.IntegerField(default=0)),
+                ('pending', models.IntegerField(default=0)),
+                ('under_review', models.IntegerField(default=0)),
+                ('accepted', models.IntegerField(default=0)),
+                ('rejected', models.IntegerField(default=0)),
+                ('withdrawn', models.IntegerField(default=0)),
+                ('course', models.CharField(max_length=200)),
+                ('year_of_study', models.IntegerField()),
+                ('students', models.IntegerField(default=0)),
+                ('applicants', models.IntegerField(default=0)),
+                ('placed', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('changed_before', models.DateTimeField()),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StalePlacementGroup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('course', models.CharField(max_length=200)),
+                ('year_of_study', models.IntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('institution', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='institution.institution')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['updated_at'], name='app_updated_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='markettrendrollup',
+            unique_together={('month', 'industry', 'location')},
+        ),
+        migrations.AddField(
+            model_name='placementrollup',
+            name='institution',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='placement_rollups', to='institution.institution'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='placementrollup',
+            unique_together={('institution', 'course', 'year_of_study')},
+        ),
+    ]
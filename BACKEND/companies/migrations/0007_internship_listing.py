@@ -0,0 +1,72 @@
+# Generated by Django 6.0.1 on 2026-10-18 08:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_listings(apps, schema_editor):
+    Internship = apps.get_model('companies', 'Internship')
+    InternshipListing = apps.get_model('companies', 'InternshipListing')
+    internships = Internship.objects.filter(
+        is_active=True, company__is_approved=True
+    ).select_related('company').annotate(applications_total=Count('applications'))
+    InternshipListing.objects.bulk_create([
+        InternshipListing(
+            id=internship.pk,
+            company_id=internship.company_id,
+            company_name=internship.company.company_name,
+            company_logo=internship.company.logo.name or None,
+            title=internship.title,
+            description=internship.description,
+            placement_type=internship.placement_type,
+            duration_months=internship.duration_months,
+            positions_available=internship.positions_available,
+            location=internship.location,
+            stipend=internship.stipend,
+            application_deadline=internship.application_deadline,
+            start_date=internship.start_date,
+            created_at=internship.created_at,
+            search_text=' '.join([
+                internship.title, internship.description, internship.requirements,
+                internship.company.company_name,
+            ]).lower(),
+            applications_count=internship.applications_total,
+        )
+        for internship in internships.iterator(chunk_size=2000)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0006_analytics_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InternshipListing',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('company_name', models.CharField(max_length=200)),
+                ('company_logo', models.ImageField(blank=True, null=True, upload_to='company_logos/')),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField()),
+                ('placement_type', models.CharField(choices=[('internship', 'Internship'), ('attachment', 'Attachment')], max_length=20)),
+                ('duration_months', models.IntegerField()),
+                ('positions_available', models.IntegerField()),
+                ('location', models.CharField(max_length=200)),
+                ('stipend', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('application_deadline', models.DateField()),
+                ('start_date', models.DateField()),
+                ('created_at', models.DateTimeField()),
+                ('search_text', models.TextField()),
+                ('applications_count', models.IntegerField(default=0)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='listings', to='companies.company')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['application_deadline', 'id'], name='listing_deadline_idx'), models.Index(fields=['company', 'application_deadline'], name='listing_company_idx'), models.Index(fields=['placement_type', 'application_deadline'], name='listing_type_idx')],
+            },
+        ),
+        migrations.RunPython(populate_listings, migrations.RunPython.noop),
+    ]
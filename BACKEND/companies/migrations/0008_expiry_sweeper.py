@@ -0,0 +1,65 @@
+# Generated by Django 6.0.1 on 2026-10-18 08:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0007_internship_listing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedApplication',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('student_id', models.BigIntegerField(db_index=True)),
+                ('internship_id', models.BigIntegerField(db_index=True)),
+                ('cover_letter', models.TextField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('under_review', 'Under Review'), ('accepted', 'Accepted'), ('rejected', 'Rejected'), ('withdrawn', 'Withdrawn')], max_length=20)),
+                ('admin_approved', models.BooleanField()),
+                ('company_feedback', models.TextField(blank=True, null=True)),
+                ('admin_notes', models.TextField(blank=True, null=True)),
+                ('applied_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('events', models.JSONField(default=list)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedInternship',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('company_id', models.BigIntegerField(db_index=True)),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField()),
+                ('requirements', models.TextField()),
+                ('placement_type', models.CharField(choices=[('internship', 'Internship'), ('attachment', 'Attachment')], max_length=20)),
+                ('duration_months', models.IntegerField()),
+                ('positions_available', models.IntegerField()),
+                ('location', models.CharField(max_length=200)),
+                ('stipend', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('application_deadline', models.DateField()),
+                ('start_date', models.DateField()),
+                ('is_active', models.BooleanField()),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SweepRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField()),
+                ('duration_seconds', models.FloatField()),
+                ('deactivated', models.IntegerField(default=0)),
+                ('archived_internships', models.IntegerField(default=0)),
+                ('archived_applications', models.IntegerField(default=0)),
+            ],
+            options={
+                'get_latest_by': 'started_at',
+            },
+        ),
+    ]
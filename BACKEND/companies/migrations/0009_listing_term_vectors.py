@@ -0,0 +1,32 @@
+# Generated by Django 6.0.1 on 2026-10-18 08:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0008_expiry_sweeper'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='internshiplisting',
+            name='term_features',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.AddField(
+            model_name='internshiplisting',
+            name='term_weights',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.AddField(
+            model_name='internshiplisting',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='internshiplisting',
+            index=models.Index(fields=['updated_at'], name='listing_updated_idx'),
+        ),
+    ]
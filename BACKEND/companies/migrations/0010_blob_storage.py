@@ -0,0 +1,37 @@
+# Generated by Django 6.0.1 on 2026-10-18 09:04
+
+import companies.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0009_listing_term_vectors'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='company',
+            name='logo',
+            field=models.ImageField(blank=True, null=True, storage=companies.storage.get_blob_storage, upload_to='company_logos/'),
+        ),
+        migrations.AlterField(
+            model_name='internshiplisting',
+            name='company_logo',
+            field=models.ImageField(blank=True, null=True, storage=companies.storage.get_blob_storage, upload_to='company_logos/'),
+        ),
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('size', models.BigIntegerField()),
+                ('references', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('released_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['references'], name='blob_references_idx')],
+            },
+        ),
+    ]
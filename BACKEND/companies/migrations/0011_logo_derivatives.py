@@ -0,0 +1,49 @@
+# Generated by Django 6.0.1 on 2026-10-18 09:08
+
+import companies.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0010_blob_storage'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='company',
+            name='logo',
+            field=models.ImageField(blank=True, null=True, storage=companies.storage.get_public_blob_storage, upload_to='company_logos/'),
+        ),
+        migrations.AlterField(
+            model_name='internshiplisting',
+            name='company_logo',
+            field=models.ImageField(blank=True, null=True, storage=companies.storage.get_public_blob_storage, upload_to='company_logos/'),
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='logo_derived_from',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='logo_thumbnail',
+            field=models.ImageField(blank=True, editable=False, null=True, storage=companies.storage.get_public_blob_storage, upload_to=''),
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='logo_webp',
+            field=models.ImageField(blank=True, editable=False, null=True, storage=companies.storage.get_public_blob_storage, upload_to=''),
+        ),
+        migrations.AddField(
+            model_name='internshiplisting',
+            name='company_logo_thumbnail',
+            field=models.ImageField(blank=True, null=True, storage=companies.storage.get_public_blob_storage, upload_to=''),
+        ),
+        migrations.AddField(
+            model_name='internshiplisting',
+            name='company_logo_webp',
+            field=models.ImageField(blank=True, null=True, storage=companies.storage.get_public_blob_storage, upload_to=''),
+        ),
+    ]
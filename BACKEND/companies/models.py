@@ -1,6 +1,8 @@
-from django.db import models
+from django.db import models, router, transaction
 from django.contrib.auth.models import User
 
+from .storage import get_public_blob_storage
+
 class Company(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     company_name = models.CharField(max_length=200)
@@ -10,13 +12,22 @@ class Company(models.Model):
     industry = models.CharField(max_length=100)
     description = models.TextField()
     website = models.URLField(blank=True, null=True)
-    logo = models.ImageField(upload_to='company_logos/', null=True, blank=True)
+    logo = models.ImageField(upload_to='company_logos/', storage=get_public_blob_storage, null=True, blank=True)
+    # Made from logo by thumbnails.py. Until they are, logo_thumbnail is the logo itself
+    logo_thumbnail = models.ImageField(storage=get_public_blob_storage, null=True, blank=True, editable=False)
+    logo_webp = models.ImageField(storage=get_public_blob_storage, null=True, blank=True, editable=False)
+    logo_derived_from = models.CharField(max_length=100, blank=True, editable=False)
     is_approved = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name_plural = "Companies"
+        indexes = [
+            # company_list: approved companies, newest first
+            models.Index(fields=['-created_at', '-id'], condition=models.Q(is_approved=True),
+                         name='company_approved_created_idx'),
+        ]
 
     def __str__(self):
         return self.company_name
@@ -43,10 +54,69 @@ class Internship(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # internship_list: active postings by deadline (the company join is by primary key)
+            models.Index(fields=['application_deadline', 'id'], condition=models.Q(is_active=True),
+                         name='internship_active_deadln_idx'),
+            # internship_by_company
+            models.Index(fields=['company', 'application_deadline'], condition=models.Q(is_active=True),
+                         name='internship_active_company_idx'),
+        ]
+
     def __str__(self):
         return f"{self.title} - {self.company.company_name}"
 
 
+class InternshipListing(models.Model):
+    """
+    Flat catalogue row for one open internship; see listings.py
+
+    `id` is the internship's id. Only active internships of approved
+    companies have a row, so internship_list reads this one table.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='listings')
+    company_name = models.CharField(max_length=200)
+    company_logo = models.ImageField(upload_to='company_logos/', storage=get_public_blob_storage, null=True, blank=True)
+    company_logo_thumbnail = models.ImageField(storage=get_public_blob_storage, null=True, blank=True)
+    company_logo_webp = models.ImageField(storage=get_public_blob_storage, null=True, blank=True)
+    title = models.CharField(max_length=200)
+    description = models.TextField()
+    placement_type = models.CharField(max_length=20, choices=Internship.PLACEMENT_TYPE)
+    duration_months = models.IntegerField()
+    positions_available = models.IntegerField()
+    location = models.CharField(max_length=200)
+    stipend = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    application_deadline = models.DateField()
+    start_date = models.DateField()
+    created_at = models.DateTimeField()
+    # Lowercased title, description, requirements and company name
+    search_text = models.TextField()
+    applications_count = models.IntegerField(default=0)
+    # Hashed bag-of-words vector for recommendations.py: int32 feature ids, float32 weights
+    term_features = models.BinaryField(default=b'')
+    term_weights = models.BinaryField(default=b'')
+    # When the row was last rewritten, for the recommendation index's incremental refresh
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Every listed internship is active
+    is_active = True
+
+    class Meta:
+        indexes = [
+            # internship_list default ordering
+            models.Index(fields=['application_deadline', 'id'], name='listing_deadline_idx'),
+            # internship_by_company and ?company=
+            models.Index(fields=['company', 'application_deadline'], name='listing_company_idx'),
+            models.Index(fields=['placement_type', 'application_deadline'], name='listing_type_idx'),
+            models.Index(fields=['updated_at'], name='listing_updated_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.title} - {self.company_name}"
+
+
 class Application(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -68,6 +138,285 @@ class Application(models.Model):
 
     class Meta:
         unique_together = ('student', 'internship')
+        indexes = [
+            # application_list_create, newest first
+            models.Index(fields=['student', '-applied_at', '-id'], name='app_student_applied_idx'),
+            # application_pending and status-filtered lists
+            models.Index(fields=['student', 'status', '-applied_at', '-id'], name='app_status_applied_idx'),
+            # application_accepted
+            models.Index(fields=['student', 'status', '-updated_at'], name='app_status_updated_idx'),
+            # analytics.refresh: applications changed since the watermark
+            models.Index(fields=['updated_at'], name='app_updated_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student.user.username} - {self.internship.title}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so the counters can apply the transition
+        if 'status' in instance.__dict__:
+            instance._loaded_status = instance.status
+        return instance
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(Application, instance=self)
+        update_fields = kwargs.get('update_fields')
+
+        # The status counters are updated by a post_save receiver, in the same transaction
+        with transaction.atomic(using=using):
+            if not self._state.adding and (update_fields is None or 'status' in update_fields):
+                # The status as stored now, locked until the commit: the one this instance was
+                # loaded with may have been changed by a concurrent save since
+                self._loaded_status = Application.objects.using(using).select_for_update().filter(
+                    pk=self.pk
+                ).values_list('status', flat=True).first()
+            super().save(*args, **kwargs)
+
+        if update_fields is None or 'status' in update_fields:
+            self._loaded_status = self.status
+
+
+class ApplicationStatusCounts(models.Model):
+    """
+    Denormalized application counts, one column per status
+    """
+    total = models.IntegerField(default=0)
+    pending = models.IntegerField(default=0)
+    under_review = models.IntegerField(default=0)
+    accepted = models.IntegerField(default=0)
+    rejected = models.IntegerField(default=0)
+    withdrawn = models.IntegerField(default=0)
+
+    COUNTER_FIELDS = ['total', 'pending', 'under_review', 'accepted', 'rejected', 'withdrawn']
+
+    class Meta:
+        abstract = True
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in self.COUNTER_FIELDS}
+
+
+class StudentApplicationStats(ApplicationStatusCounts):
+    student = models.OneToOneField('students.Student', on_delete=models.CASCADE,
+                                   primary_key=True, related_name='application_stats')
+
+    class Meta:
+        verbose_name_plural = "Student application stats"
+
+    def __str__(self):
+        return f"Application stats for student {self.student_id}"
+
+
+class InternshipApplicationStats(ApplicationStatusCounts):
+    internship = models.OneToOneField(Internship, on_delete=models.CASCADE,
+                                      primary_key=True, related_name='application_stats')
+
+    class Meta:
+        verbose_name_plural = "Internship application stats"
+
+    def __str__(self):
+        return f"Application stats for internship {self.internship_id}"
+
+
+class PlacementRollup(ApplicationStatusCounts):
+    """
+    Placement figures per institution, course and year of study; see analytics.py
+
+    The inherited counters count the group's applications by status;
+    `applicants` and `placed` count students with any / an accepted application.
+    """
+    institution = models.ForeignKey('institution.Institution', on_delete=models.CASCADE,
+                                    related_name='placement_rollups')
+    course = models.CharField(max_length=200)
+    year_of_study = models.IntegerField()
+    students = models.IntegerField(default=0)
+    applicants = models.IntegerField(default=0)
+    placed = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('institution', 'course', 'year_of_study')
+
+    def __str__(self):
+        return f"Placements for {self.institution_id} / {self.course} / year {self.year_of_study}"
+
+
+class MarketTrendRollup(ApplicationStatusCounts):
+    """
+    Applications per month (of applied_at), company industry and internship location; see analytics.py
+    """
+    month = models.DateField()
+    industry = models.CharField(max_length=100)
+    location = models.CharField(max_length=200)
+
+    class Meta:
+        unique_together = ('month', 'industry', 'location')
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} {self.industry} / {self.location}"
+
+
+class StalePlacementGroup(models.Model):
+    """
+    A placement group a student has moved out of; the next analytics.refresh recomputes it
+    """
+    institution = models.ForeignKey('institution.Institution', on_delete=models.CASCADE, related_name='+')
+    course = models.CharField(max_length=200)
+    year_of_study = models.IntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Stale placements for {self.institution_id} / {self.course} / year {self.year_of_study}"
+
+
+class RollupWatermark(models.Model):
+    """
+    How far the analytics rollups have been brought up to date
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    # Every change made before this time is included in the rollups
+    changed_before = models.DateTimeField()
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} up to {self.changed_before}"
+
+
+class ApplicationEvent(models.Model):
+    """
+    Audit trail of application status changes, written by a background job
+    """
+    application = models.ForeignKey(Application, on_delete=models.CASCADE, related_name='events')
+    from_status = models.CharField(max_length=20, choices=Application.STATUS_CHOICES, blank=True, null=True)
+    to_status = models.CharField(max_length=20, choices=Application.STATUS_CHOICES)
+    occurred_at = models.DateTimeField()
+    recorded_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['occurred_at', 'id']
+        # A retried job records the same change only once
+        unique_together = ('application', 'to_status', 'occurred_at')
+
+    def __str__(self):
+        return f"Application {self.application_id}: {self.from_status or 'new'} -> {self.to_status}"
+
+
+class Job(models.Model):
+    """
+    A queued background task; see companies/jobs.py
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    task = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    idempotency_key = models.CharField(max_length=200, unique=True, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField()
+    locked_by = models.CharField(max_length=100, blank=True, default='')
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Workers claim due jobs in run_after order
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} [{self.status}]"
+
+
+class ArchivedInternship(models.Model):
+    """
+    Cold copy of an expired internship moved out by the expiry sweeper; see expiry.py
+
+    Ids are kept, but the references are plain columns so the live rows can go.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    company_id = models.BigIntegerField(db_index=True)
+    title = models.CharField(max_length=200)
+    description = models.TextField()
+    requirements = models.TextField()
+    placement_type = models.CharField(max_length=20, choices=Internship.PLACEMENT_TYPE)
+    duration_months = models.IntegerField()
+    positions_available = models.IntegerField()
+    location = models.CharField(max_length=200)
+    stipend = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    application_deadline = models.DateField()
+    start_date = models.DateField()
+    is_active = models.BooleanField()
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.title} (archived)"
+
+
+class ArchivedApplication(models.Model):
+    """
+    Cold copy of an application to an archived internship, with its status events
+    """
+    id = models.BigIntegerField(primary_key=True)
+    student_id = models.BigIntegerField(db_index=True)
+    internship_id = models.BigIntegerField(db_index=True)
+    cover_letter = models.TextField()
+    status = models.CharField(max_length=20, choices=Application.STATUS_CHOICES)
+    admin_approved = models.BooleanField()
+    company_feedback = models.TextField(blank=True, null=True)
+    admin_notes = models.TextField(blank=True, null=True)
+    applied_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    # ApplicationEvent rows as [{'from_status', 'to_status', 'occurred_at'}]
+    events = models.JSONField(default=list)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Application {self.id} (archived)"
+
+
+class SweepRun(models.Model):
+    """
+    What one expiry sweep did, for the metrics endpoint
+    """
+    started_at = models.DateTimeField()
+    duration_seconds = models.FloatField()
+    deactivated = models.IntegerField(default=0)
+    archived_internships = models.IntegerField(default=0)
+    archived_applications = models.IntegerField(default=0)
+
+    class Meta:
+        get_latest_by = 'started_at'
+
+    def __str__(self):
+        return f"Sweep at {self.started_at:%Y-%m-%d %H:%M}"
+
+
+class Blob(models.Model):
+    """
+    A file in ContentAddressedStorage and how many rows name it; see blobs.py
+    """
+    name = models.CharField(max_length=100, primary_key=True)
+    size = models.BigIntegerField()
+    references = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # When references last dropped to 0; collect_blobs waits a grace period after it
+    released_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['references'], name='blob_references_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.student.user.username} - {self.internship.title}"
\ No newline at end of file
+        return f"{self.name} ({self.references} references)"
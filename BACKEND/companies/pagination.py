@@ -0,0 +1,153 @@
+# companies/pagination.py
+"""
+Keyset (cursor) pagination for the list endpoints
+
+A cursor is the signed ordering key of the last row on the previous page.
+The next page is fetched with a WHERE on that key instead of an OFFSET, and
+no COUNT query is run, so every page costs the same.
+"""
+import datetime
+import decimal
+
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+
+CURSOR_SALT = 'companies.pagination.cursor'
+DEFAULT_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 100
+
+
+class CursorError(ValueError):
+    pass
+
+
+def is_cursor_request(request):
+    """
+    Cursor mode is opt-in: `?cursor=` (empty) asks for the first page
+    """
+    return 'cursor' in request.query_params
+
+
+def get_page_size(request):
+    try:
+        page_size = int(request.query_params.get('page_size', DEFAULT_PAGE_SIZE))
+    except (TypeError, ValueError):
+        raise CursorError('page_size must be an integer')
+    return max(1, min(page_size, MAX_PAGE_SIZE))
+
+
+def get_keyset(queryset):
+    """
+    Return the (field, descending) pairs the queryset is ordered by,
+    with `id` appended as a unique tie-breaker
+    """
+    model = queryset.model
+    keyset = []
+    for name in queryset.query.order_by:
+        descending = name.startswith('-')
+        name = name.lstrip('-')
+        if name == 'pk':
+            name = 'id'
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            raise CursorError(f"Ordering '{name}' cannot be used with cursor pagination")
+        if field.is_relation or field.null:
+            raise CursorError(f"Ordering '{name}' cannot be used with cursor pagination")
+        keyset.append((field, descending))
+        if field.primary_key:
+            return keyset
+
+    # Break ties on the primary key in the same direction as the last field
+    descending = keyset[-1][1] if keyset else False
+    keyset.append((model._meta.pk, descending))
+    return keyset
+
+
+def _dump(value):
+    # Full precision: DjangoJSONEncoder would truncate datetimes to milliseconds
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(keyset, row):
+    payload = {
+        'o': [('-' if descending else '') + field.name for field, descending in keyset],
+        'v': [_dump(field.value_from_object(row)) for field, _ in keyset],
+    }
+    return signing.dumps(payload, salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(keyset, cursor):
+    try:
+        payload = signing.loads(cursor, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        raise CursorError('Invalid cursor')
+
+    ordering = [('-' if descending else '') + field.name for field, descending in keyset]
+    if payload.get('o') != ordering or len(payload.get('v', [])) != len(keyset):
+        raise CursorError('Cursor does not match the requested ordering')
+
+    try:
+        return [field.to_python(value) for (field, _), value in zip(keyset, payload['v'])]
+    except ValidationError:
+        raise CursorError('Invalid cursor')
+
+
+def keyset_filter(keyset, values):
+    """
+    Build the lexicographic "comes after" condition:
+    (a > x) OR (a = x AND b > y) OR ...
+    """
+    condition = Q()
+    equal = {}
+    for (field, descending), value in zip(keyset, values):
+        lookup = 'lt' if descending else 'gt'
+        condition |= Q(**equal, **{f'{field.attname}__{lookup}': value})
+        equal[field.attname] = value
+    return condition
+
+
+def paginate_by_cursor(queryset, request):
+    """
+    Slice one page out of an ordered queryset
+
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    queryset, keyset, page_size = _page_query(queryset, request)
+    return _split_page(list(queryset[:page_size + 1]), keyset, page_size)
+
+
+async def apaginate_by_cursor(queryset, request):
+    """
+    paginate_by_cursor for async views
+    """
+    queryset, keyset, page_size = _page_query(queryset, request)
+    rows = [row async for row in queryset[:page_size + 1].aiterator(chunk_size=page_size + 1)]
+    return _split_page(rows, keyset, page_size)
+
+
+def _page_query(queryset, request):
+    page_size = get_page_size(request)
+    keyset = get_keyset(queryset)
+    queryset = queryset.order_by(*[
+        ('-' if descending else '') + field.name for field, descending in keyset
+    ])
+
+    cursor = request.query_params.get('cursor')
+    if cursor:
+        queryset = queryset.filter(keyset_filter(keyset, decode_cursor(keyset, cursor)))
+    return queryset, keyset, page_size
+
+
+def _split_page(rows, keyset, page_size):
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(keyset, rows[-1])
+    return rows, next_cursor
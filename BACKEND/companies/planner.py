@@ -0,0 +1,115 @@
+# companies/planner.py
+"""
+Query planning for serializers
+
+plan_queryset() looks at the fields a serializer will read and applies the
+matching select_related / prefetch_related / annotate calls, so rendering a
+page costs a fixed number of queries however many rows it holds.
+
+Relations are discovered from nested serializers and dotted `source`s.
+Anything the fields can't reveal (e.g. a SerializerMethodField reading
+`obj.student`) is declared on the serializer's Meta:
+
+    class Meta:
+        select_related = ['student']
+        prefetch_related = []
+        annotations = {'applications_total': Count('applications')}
+
+A nested serializer that declares annotations is loaded with its own
+Prefetch queryset, so the annotations land on the nested objects.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+class QueryPlan:
+    def __init__(self):
+        self.select_related = set()
+        self.prefetch_related = []
+        self.annotations = {}
+
+    def merge(self, other, prefix):
+        self.select_related.update(f'{prefix}__{path}' for path in other.select_related)
+        for lookup in other.prefetch_related:
+            if isinstance(lookup, Prefetch):
+                self.prefetch_related.append(Prefetch(
+                    f'{prefix}__{lookup.prefetch_through}',
+                    queryset=lookup.queryset,
+                    to_attr=lookup.to_attr,
+                ))
+            else:
+                self.prefetch_related.append(f'{prefix}__{lookup}')
+
+    def apply(self, queryset):
+        if self.select_related:
+            queryset = queryset.select_related(*sorted(self.select_related))
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        if self.annotations:
+            queryset = queryset.annotate(**self.annotations)
+        return queryset
+
+
+def _relation_path(model, attrs):
+    """
+    Longest prefix of `attrs` that follows forward single-valued relations
+    """
+    path = []
+    for attr in attrs:
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            break
+        if not (field.many_to_one or field.one_to_one):
+            break
+        path.append(attr)
+        model = field.related_model
+    return '__'.join(path)
+
+
+def build_plan(serializer, model):
+    plan = QueryPlan()
+    meta = getattr(serializer, 'Meta', None)
+    plan.select_related.update(getattr(meta, 'select_related', []))
+    plan.prefetch_related.extend(getattr(meta, 'prefetch_related', []))
+    plan.annotations.update(getattr(meta, 'annotations', {}))
+
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+
+        if isinstance(field, serializers.ListSerializer):
+            related = model._meta.get_field(field.source).related_model
+            child_plan = build_plan(field.child, related)
+            plan.prefetch_related.append(Prefetch(
+                field.source,
+                queryset=child_plan.apply(related._default_manager.all()),
+            ))
+
+        elif isinstance(field, serializers.BaseSerializer):
+            related = model._meta.get_field(field.source).related_model
+            child_plan = build_plan(field, related)
+            if child_plan.annotations:
+                # Annotations have to be computed on the nested queryset itself
+                plan.prefetch_related.append(Prefetch(
+                    field.source,
+                    queryset=child_plan.apply(related._default_manager.all()),
+                ))
+            else:
+                plan.select_related.add(field.source)
+                plan.merge(child_plan, field.source)
+
+        elif len(field.source_attrs) > 1:
+            path = _relation_path(model, field.source_attrs[:-1])
+            if path:
+                plan.select_related.add(path)
+
+    return plan
+
+
+def plan_queryset(queryset, serializer_class):
+    """
+    Apply the relations and aggregates `serializer_class` needs to `queryset`
+    """
+    return build_plan(serializer_class(), queryset.model).apply(queryset)
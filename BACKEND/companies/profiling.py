@@ -0,0 +1,344 @@
+# companies/profiling.py
+"""
+Opt-in per-request profiling
+
+ProfilingMiddleware (first in MIDDLEWARE) records, for every request:
+
+- SQL query count and time, through a database execute wrapper
+- duplicate queries: the same SQL run more than once with different
+  parameters, the signature of an N+1 loop
+- time spent producing serializer.data, or the rows fastpath.serialize()
+  builds with FAST_SERIALIZERS on (including the queries either triggers)
+- template response render time
+- response size
+
+and reports them in a Server-Timing header, so they show up in the
+browser's network panel. The same numbers are aggregated per URL name into
+in-process histograms, which metrics_text() renders in the Prometheus text
+format for the admin-only /api/metrics/ endpoint. Each process keeps its
+own histograms; scrape every worker.
+
+With REQUEST_PROFILING = False (the default) the middleware raises
+MiddlewareNotUsed, so Django drops it from the chain and nothing is
+patched or wrapped: the overhead is zero. The hooks install() adds are
+removed by uninstall(), which runs when a test or benchmark turns the
+setting back off. Either way the hooks only measure while a request
+profile is set in the current context; otherwise they pass straight
+through.
+"""
+import bisect
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+from rest_framework import serializers
+
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (1024, 10240, 102400, 1048576, 10485760)
+
+# A statement run this many times in one request is logged as a likely N+1
+DEFAULT_DUPLICATE_THRESHOLD = 5
+
+_current = ContextVar('request_profile', default=None)
+
+
+class RequestProfile:
+    """
+    Measurements of the request being handled
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.statements = Counter()
+        self.serializer_seconds = 0.0
+        self.serializing = False
+        self.render_started = None
+        self.render_seconds = 0.0
+
+    @property
+    def duplicates(self):
+        return sum(count - 1 for count in self.statements.values())
+
+    def worst_statement(self):
+        return self.statements.most_common(1)[0] if self.statements else (None, 0)
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper: time the statement against the current request's profile
+    """
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.sql_seconds += time.perf_counter() - started
+        profile.queries += 1
+        # The SQL still has its placeholders, so repeats with other parameters match
+        profile.statements[sql] += 1
+
+
+def _wrap_connection(connection):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    _wrap_connection(connection)
+
+
+@contextmanager
+def serializing():
+    """
+    Count the time spent in the block as serialization time of the current request, if it is profiled
+    """
+    profile = _current.get()
+    # Nested blocks (a nested serializer's data) are already inside the outer one's time
+    if profile is None or profile.serializing:
+        yield
+        return
+    profile.serializing = True
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.serializer_seconds += time.perf_counter() - started
+        profile.serializing = False
+
+
+def _timed_data(prop):
+    def data(self):
+        with serializing():
+            return prop.fget(self)
+    return property(data)
+
+
+SERIALIZER_CLASSES = (serializers.Serializer, serializers.ListSerializer)
+
+# class -> its own data property, while install() has replaced it
+_original_data = {}
+_install_lock = threading.Lock()
+
+
+def install():
+    """
+    Wrap database connections and serializer.data; only done when profiling is enabled
+    """
+    with _install_lock:
+        if _original_data:
+            return
+        # Connections opened from now on (one per thread and alias), and those already open here
+        connection_created.connect(_on_connection_created)
+        for connection in connections.all(initialized_only=True):
+            _wrap_connection(connection)
+        for cls in SERIALIZER_CLASSES:
+            _original_data[cls] = cls.__dict__['data']
+            cls.data = _timed_data(cls.data)
+
+
+def uninstall():
+    """
+    Undo install()
+
+    Connections open in other threads keep the execute wrapper until they close; with no profile
+    set it only passes the statement on.
+    """
+    with _install_lock:
+        if not _original_data:
+            return
+        connection_created.disconnect(_on_connection_created)
+        for connection in connections.all(initialized_only=True):
+            if record_query in connection.execute_wrappers:
+                connection.execute_wrappers.remove(record_query)
+        for cls, prop in _original_data.items():
+            cls.data = prop
+        _original_data.clear()
+
+
+@receiver(setting_changed)
+def _profiling_setting_changed(setting, value, **kwargs):
+    if setting == 'REQUEST_PROFILING' and not value:
+        uninstall()
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip((*self.buckets, '+Inf'), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_sum{{{labels}}} {self.sum:g}'
+        yield f'{name}_count{{{labels}}} {cumulative}'
+
+
+# (metric name, help, type, source): histograms observe one value per request, counters add it up
+METRICS = (
+    ('http_request_duration_seconds', 'Time to produce the response', 'histogram', DURATION_BUCKETS),
+    ('http_request_db_queries', 'SQL statements run per request', 'histogram', QUERY_BUCKETS),
+    ('http_response_size_bytes', 'Response body size (streamed responses are not counted)', 'histogram',
+     SIZE_BUCKETS),
+    ('http_request_db_seconds_total', 'Time spent running SQL', 'counter', None),
+    ('http_request_duplicate_queries_total', 'SQL statements repeated within a request', 'counter', None),
+    ('http_request_serializer_seconds_total', 'Time spent serializing response data', 'counter', None),
+    ('http_request_render_seconds_total', 'Time spent rendering responses', 'counter', None),
+)
+
+_metrics_lock = threading.Lock()
+# (view name, method) -> {metric name: Histogram or running total}
+_metrics = {}
+
+
+def observe(view_name, method, profile, duration, size):
+    values = {
+        'http_request_duration_seconds': duration,
+        'http_request_db_queries': profile.queries,
+        'http_response_size_bytes': size,
+        'http_request_db_seconds_total': profile.sql_seconds,
+        'http_request_duplicate_queries_total': profile.duplicates,
+        'http_request_serializer_seconds_total': profile.serializer_seconds,
+        'http_request_render_seconds_total': profile.render_seconds,
+    }
+    with _metrics_lock:
+        series = _metrics.get((view_name, method))
+        if series is None:
+            series = _metrics[(view_name, method)] = {
+                name: Histogram(buckets) if kind == 'histogram' else 0
+                for name, _, kind, buckets in METRICS
+            }
+        for name, _, kind, _ in METRICS:
+            value = values[name]
+            if kind == 'histogram':
+                if value is not None:
+                    series[name].observe(value)
+            else:
+                series[name] += value
+
+
+def reset_metrics():
+    with _metrics_lock:
+        _metrics.clear()
+
+
+def metrics_text():
+    """
+    The aggregated metrics in the Prometheus text exposition format
+    """
+    lines = []
+    with _metrics_lock:
+        keys = sorted(_metrics)
+        for name, help_text, kind, _ in METRICS:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for view_name, method in keys:
+                labels = f'view="{view_name}",method="{method}"'
+                value = _metrics[(view_name, method)][name]
+                if kind == 'histogram':
+                    lines.extend(value.lines(name, labels))
+                else:
+                    lines.append(f'{name}{{{labels}}} {value:g}')
+    return '\n'.join(lines) + '\n'
+
+
+def server_timing(profile, duration):
+    return ', '.join([
+        f'total;dur={duration * 1000:.1f}',
+        f'db;dur={profile.sql_seconds * 1000:.1f};desc="{profile.queries} queries, {profile.duplicates} duplicate"',
+        f'serialize;dur={profile.serializer_seconds * 1000:.1f}',
+        f'render;dur={profile.render_seconds * 1000:.1f}',
+    ])
+
+
+class ProfilingMiddleware:
+    """
+    Measure every request; enabled by REQUEST_PROFILING = True
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_PROFILING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.duplicate_threshold = getattr(
+            settings, 'REQUEST_PROFILING_DUPLICATE_THRESHOLD', DEFAULT_DUPLICATE_THRESHOLD
+        )
+        install()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        profile = RequestProfile()
+        token = _current.set(profile)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, profile)
+
+    async def __acall__(self, request):
+        profile = RequestProfile()
+        # The context, and with it the profile, follows the ORM into sync_to_async threads
+        token = _current.set(profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, profile)
+
+    def process_template_response(self, request, response):
+        # Called last of all middleware, right before the response is rendered
+        profile = _current.get()
+        if profile is not None:
+            profile.render_started = time.perf_counter()
+            response.add_post_render_callback(lambda _: self.rendered(profile))
+        return response
+
+    def rendered(self, profile):
+        profile.render_seconds += time.perf_counter() - profile.render_started
+
+    def finish(self, request, response, profile):
+        duration = time.perf_counter() - profile.started
+        size = None if response.streaming else len(response.content)
+        response.headers['Server-Timing'] = server_timing(profile, duration)
+
+        match = request.resolver_match
+        view_name = match.view_name if match else '<unresolved>'
+        observe(view_name, request.method, profile, duration, size)
+
+        statement, count = profile.worst_statement()
+        if count >= self.duplicate_threshold:
+            logger.warning(
+                'Possible N+1 in %s %s (%s): statement ran %d times: %s',
+                request.method, request.path, view_name, count, statement,
+            )
+        return response
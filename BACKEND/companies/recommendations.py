@@ -0,0 +1,351 @@
+# companies/recommendations.py
+"""
+Internship recommendations for students
+
+Each listing row carries a hashed bag-of-words vector of its internship.
+term_vector() computes it when listings.build() writes the row: the
+internship's title, requirements and description words are weighted by
+FIELD_WEIGHTS, summed per feature (crc32 of the word modulo N_FEATURES)
+and log-scaled. Mentions of a year of study ("3rd year") become a year:N
+term, which a student's year of study matches.
+
+RecommendationIndex keeps the vectors of the listed internships in memory
+as an inverted index. For each feature it holds the postings (document,
+weight), TF-IDF weighted and L2-normalized. A student's profile vector
+combines their course and year of study with the internships they
+applied to. Scoring a profile against every posting is one np.bincount
+over the postings of the profile's features, and the top k come from
+np.argpartition. That takes a few milliseconds for 50k postings.
+
+The index refreshes incrementally. Every RECOMMENDATIONS_REFRESH_SECONDS
+a process looks for listing rows with an updated_at it hasn't indexed,
+from OVERLAP before the newest one it has. It masks them out of the main
+segment and indexes them into a small delta segment, using the main
+segment's IDF. Once the delta
+outgrows MERGE_FRACTION of the main segment, the index is rebuilt.
+Listing rows that have gone away (deleted, archived) are noticed when
+recommend() loads its results, and are masked from then on. Each process
+builds its own index on first use. Rows written before the vectors
+existed have empty vectors until `manage.py rebuild_listings` fills them.
+"""
+import re
+import threading
+import time
+import zlib
+from collections import defaultdict
+from datetime import timedelta
+from functools import lru_cache
+
+import numpy as np
+from django.conf import settings
+from django.db import router
+from django.utils import timezone
+
+from .models import Application, InternshipListing
+from .search import tokenize
+
+
+N_FEATURES = 1 << 18
+
+# How much a word counts in each internship field
+FIELD_WEIGHTS = (('title', 3.0), ('requirements', 2.0), ('description', 1.0))
+
+# Parts of a student's profile, each normalized before weighting
+COURSE_WEIGHT = 1.0
+YEAR_WEIGHT = 0.5
+APPLIED_WEIGHT = 1.0
+
+STOP_WORDS = frozenset(
+    'a an and are as at be by for from has have in is it of on or our that the their this to we will with you your'
+    .split()
+)
+YEAR_RE = re.compile(r'\b([1-9])(?:st|nd|rd|th)?[\s-]*years?\b')
+
+# Rebuild instead of growing the delta segment past this share of the main one
+MERGE_FRACTION = 0.05
+MIN_MERGE_SIZE = 1000
+# How far back refreshes look, so rows committed late by a long transaction still get picked up
+OVERLAP = timedelta(minutes=1)
+# Candidates loaded per requested recommendation, in case some rows have gone
+CANDIDATE_MARGIN = 10
+
+
+@lru_cache(maxsize=200_000)
+def feature_id(term):
+    # crc32 rather than hash(), which differs between processes
+    return zlib.crc32(term.encode()) & (N_FEATURES - 1)
+
+
+def terms(text):
+    text = text.lower()
+    words = [word for word in tokenize(text) if len(word) > 1 and not word.isdigit() and word not in STOP_WORDS]
+    return words + [f'year:{year}' for year in YEAR_RE.findall(text)]
+
+
+def _vector(weighted_terms):
+    """
+    (int32 features, float32 weights) of log-scaled weighted term counts, sorted by feature
+    """
+    counts = defaultdict(float)
+    for term, weight in weighted_terms:
+        counts[feature_id(term)] += weight
+    features = np.array(sorted(counts), dtype=np.int32)
+    weights = np.log1p(np.array([counts[feature] for feature in features.tolist()], dtype=np.float32))
+    return features, weights
+
+
+def term_vector(internship):
+    """
+    The term_features / term_weights of an internship's listing row
+    """
+    features, weights = _vector(
+        (term, weight) for field, weight in FIELD_WEIGHTS for term in terms(getattr(internship, field))
+    )
+    return {'term_features': features.tobytes(), 'term_weights': weights.tobytes()}
+
+
+def _arrays(features, weights):
+    return np.frombuffer(features, dtype=np.int32), np.frombuffer(weights, dtype=np.float32)
+
+
+def _combine(features, weights):
+    """
+    Sum the weights of repeated features: a sparse vector as (unique features, weights)
+    """
+    if not len(features):
+        return features.astype(np.int32), weights.astype(np.float32)
+    unique, inverse = np.unique(features, return_inverse=True)
+    return unique.astype(np.int32), np.bincount(inverse, weights=weights).astype(np.float32)
+
+
+class Segment:
+    """
+    Inverted index over a set of listing rows
+    """
+
+    def __init__(self, rows, idf):
+        # rows: (id, deadline ordinal, feature bytes, weight bytes)
+        self.ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self.deadlines = np.array([row[1] for row in rows], dtype=np.int64)
+        self.alive = np.ones(len(rows), dtype=bool)
+        self.position = {pk: n for n, pk in enumerate(self.ids.tolist())}
+
+        features = np.frombuffer(b''.join(bytes(row[2]) for row in rows), dtype=np.int32)
+        weights = np.frombuffer(b''.join(bytes(row[3]) for row in rows), dtype=np.float32)
+        lengths = np.array([len(row[2]) // 4 for row in rows], dtype=np.int64)
+        documents = np.repeat(np.arange(len(rows), dtype=np.int32), lengths)
+
+        weights = weights * idf[features]
+        norms = np.sqrt(np.bincount(documents, weights=weights * weights, minlength=len(rows)))
+        weights = weights / np.where(norms > 0, norms, 1)[documents]
+
+        order = np.argsort(features, kind='stable')
+        self.postings_document = documents[order]
+        self.postings_weight = weights[order].astype(np.float32)
+        self.indptr = np.zeros(N_FEATURES + 1, dtype=np.int64)
+        np.cumsum(np.bincount(features, minlength=N_FEATURES), out=self.indptr[1:])
+
+    def __len__(self):
+        return len(self.ids)
+
+    def scores(self, features, weights):
+        """
+        Dot product of the (features, weights) profile with every document
+        """
+        starts = self.indptr[features]
+        lengths = self.indptr[features + 1] - starts
+        total = int(lengths.sum())
+        if not total:
+            return np.zeros(len(self.ids))
+        # Positions of every posting of every profile feature, without a Python loop
+        offsets = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+        postings = offsets + np.arange(total)
+        return np.bincount(
+            self.postings_document[postings],
+            weights=self.postings_weight[postings] * np.repeat(weights, lengths),
+            minlength=len(self.ids),
+        )
+
+    def forget(self, pks):
+        for pk in pks:
+            n = self.position.get(pk)
+            if n is not None:
+                self.alive[n] = False
+
+
+def _load(queryset):
+    """
+    Segment rows of a listing queryset, and {id: updated_at} of them
+    """
+    rows, stamps = [], {}
+    for pk, deadline, features, weights, updated_at in queryset.values_list(
+        'id', 'application_deadline', 'term_features', 'term_weights', 'updated_at',
+    ).iterator(chunk_size=2000):
+        rows.append((pk, deadline.toordinal(), features, weights))
+        stamps[pk] = updated_at
+    return rows, stamps
+
+
+def _recent(stamps, seen=None):
+    """
+    {id: updated_at} of the rows within OVERLAP of the newest, which the next refresh reads again
+    """
+    stamps = {**(seen or {}), **stamps}
+    if not stamps:
+        return {}
+    since = max(stamps.values()) - OVERLAP
+    return {pk: updated_at for pk, updated_at in stamps.items() if updated_at > since}
+
+
+class RecommendationIndex:
+    """
+    A main segment, a delta segment of rows changed since it was built, and their shared IDF
+    """
+
+    def __init__(self, main, delta, delta_rows, idf, seen, using):
+        self.main = main
+        self.delta = delta
+        self.delta_rows = delta_rows
+        self.idf = idf
+        # The newest rows indexed, so refreshes skip them while they are still inside OVERLAP
+        self.seen = seen
+        self.using = using
+
+    @classmethod
+    def build(cls, using=None):
+        using = using or router.db_for_read(InternshipListing)
+        rows, stamps = _load(InternshipListing.objects.using(using))
+        features = np.frombuffer(b''.join(bytes(row[2]) for row in rows), dtype=np.int32)
+        # Each document counts once per feature: the features of a row are unique
+        frequency = np.bincount(features, minlength=N_FEATURES)
+        idf = (np.log((1 + len(rows)) / (1 + frequency)) + 1).astype(np.float32)
+        return cls(Segment(rows, idf), Segment([], idf), {}, idf, _recent(stamps), using)
+
+    def __len__(self):
+        return int(self.main.alive.sum() + self.delta.alive.sum())
+
+    def refreshed(self):
+        """
+        This index with the rows changed since it was built or last refreshed, or a rebuilt one
+        """
+        listings = InternshipListing.objects.using(self.using)
+        changed = listings.all()
+        if self.seen:
+            changed = changed.filter(updated_at__gt=max(self.seen.values()) - OVERLAP)
+        fresh = [pk for pk, updated_at in changed.values_list('id', 'updated_at') if self.seen.get(pk) != updated_at]
+        if not fresh:
+            return self
+        if len(self.delta_rows) + len(fresh) > max(MIN_MERGE_SIZE, MERGE_FRACTION * len(self.main)):
+            return self.build(self.using)
+
+        rows, stamps = _load(listings.filter(pk__in=fresh))
+        delta_rows = {**self.delta_rows, **{row[0]: row for row in rows}}
+        self.main.forget(delta_rows)
+        return RecommendationIndex(
+            self.main, Segment(list(delta_rows.values()), self.idf), delta_rows, self.idf,
+            _recent(stamps, self.seen), self.using,
+        )
+
+    def forget(self, pks):
+        self.main.forget(pks)
+        self.delta.forget(pks)
+        for pk in pks:
+            self.delta_rows.pop(pk, None)
+
+    def _normalized(self, features, weights):
+        weights = weights * self.idf[features]
+        norm = np.sqrt(np.dot(weights, weights))
+        return weights / norm if norm else weights
+
+    def profile(self, course, year_of_study, applied_vectors=()):
+        """
+        A student's (features, weights) profile vector
+        """
+        parts = []
+        course_features, course_weights = _vector((term, 1.0) for term in terms(course))
+        parts.append((course_features, COURSE_WEIGHT * self._normalized(course_features, course_weights)))
+        year = np.array([feature_id(f'year:{year_of_study}')], dtype=np.int32)
+        parts.append((year, np.array([YEAR_WEIGHT], dtype=np.float32)))
+        applied = [_arrays(features, weights) for features, weights in applied_vectors if features]
+        for features, weights in applied:
+            parts.append((features, APPLIED_WEIGHT / len(applied) * self._normalized(features, weights)))
+        return _combine(np.concatenate([part[0] for part in parts]), np.concatenate([part[1] for part in parts]))
+
+    def top_k(self, profile, k, exclude=(), today=None):
+        """
+        [(internship id, score)] of the k best-scoring open internships, best first
+        """
+        today = (today or timezone.localdate()).toordinal()
+        ids, scores = [], []
+        for segment in (self.main, self.delta):
+            if not len(segment):
+                continue
+            segment_scores = segment.scores(*profile)
+            segment_scores[~segment.alive | (segment.deadlines < today)] = 0
+            ids.append(segment.ids)
+            scores.append(segment_scores)
+        if not ids:
+            return []
+        ids, scores = np.concatenate(ids), np.concatenate(scores)
+        if len(exclude):
+            scores[np.isin(ids, np.fromiter(exclude, dtype=np.int64))] = 0
+
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return list(zip(ids[candidates].tolist(), scores[candidates].tolist()))
+
+
+_index = None
+_checked_at = 0.0
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """
+    This process's index, refreshed if RECOMMENDATIONS_REFRESH_SECONDS have passed
+    """
+    global _index, _checked_at
+    interval = getattr(settings, 'RECOMMENDATIONS_REFRESH_SECONDS', 10)
+    if _index is None or time.monotonic() - _checked_at >= interval:
+        with _index_lock:
+            if _index is None:
+                _index = RecommendationIndex.build()
+            elif time.monotonic() - _checked_at >= interval:
+                _index = _index.refreshed()
+            _checked_at = time.monotonic()
+    return _index
+
+
+def reset():
+    global _index
+    with _index_lock:
+        _index = None
+
+
+def student_profile(index, student):
+    """
+    The student's profile vector for `index`, and the ids of the internships they applied to
+    """
+    applied = set(Application.objects.filter(student=student).values_list('internship_id', flat=True))
+    applied_vectors = InternshipListing.objects.filter(pk__in=applied).values_list('term_features', 'term_weights')
+    profile = index.profile(student.course, student.year_of_study, [
+        (bytes(features), bytes(weights)) for features, weights in applied_vectors
+    ])
+    return profile, applied
+
+
+def recommend(student, k=20, today=None):
+    """
+    [(InternshipListing, score)] for `student`, best first, leaving out internships they applied to
+    """
+    index = get_index()
+    profile, applied = student_profile(index, student)
+    ranked = index.top_k(profile, k + CANDIDATE_MARGIN, exclude=applied, today=today)
+
+    found = InternshipListing.objects.in_bulk([pk for pk, _ in ranked])
+    gone = [pk for pk, _ in ranked if pk not in found]
+    if gone:
+        index.forget(gone)
+    return [(found[pk], score) for pk, score in ranked if pk in found][:k]
@@ -0,0 +1,103 @@
+# companies/routers.py
+"""
+Read replicas for the catalogue views
+
+DATABASE_REPLICAS lists the replica aliases (DATABASE_REPLICA_URLS, see
+internship_system/database.py). The GET catalogue views in views.py and
+async_views.py are wrapped in @read_from_replica, which picks one replica
+for the request. While the view runs, ReplicaRouter sends its reads
+there. Reads anywhere else go to the primary, as does every write.
+
+Authentication and throttling run before the view, so sessions and users
+are still read from the primary. Migrations only run on the primary.
+`manage.py check_replica_routing` checks where each endpoint's queries go.
+
+A catalogue write invalidates the response cache (cache.py), and the next
+request misses and caches what it reads for CATALOGUE_CACHE_TIMEOUT. Read
+from a replica that hasn't applied the write yet, that entry would keep
+the old data for the whole timeout. So for DATABASE_REPLICA_LAG_SECONDS
+after an invalidation (default 5) the views read from the primary. As long
+as replicas stay within that lag, responses are no older than the cache
+makes them anyway. A replica further behind can still get old data cached,
+for up to its lag plus CATALOGUE_CACHE_TIMEOUT. The mark is kept in the
+catalogue cache, so it reaches other processes only if that cache is
+shared.
+"""
+import random
+from contextvars import ContextVar
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from . import cache
+
+
+_replica = ContextVar('replica', default=None)
+
+
+def replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def current_replica():
+    """
+    The replica this request's reads go to, or None for the primary
+    """
+    return _replica.get()
+
+
+def _reads_replica(request):
+    return bool(replicas()) and request.method in ('GET', 'HEAD')
+
+
+def _choose(request, recently_written=False):
+    if _reads_replica(request) and not recently_written:
+        return _replica.set(random.choice(replicas()))
+    return _replica.set(None)
+
+
+def read_from_replica(view):
+    """
+    Send a view's reads to a replica on GET and HEAD requests, unless the catalogue was just written
+
+    Goes under @api_view (or async_api_view), so authentication reads the primary.
+    """
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def wrapped(request, *args, **kwargs):
+            token = _choose(request, _reads_replica(request) and await cache.arecently_written())
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                _replica.reset(token)
+        return wrapped
+
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        token = _choose(request, _reads_replica(request) and cache.recently_written())
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _replica.reset(token)
+    return wrapped
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        # None: Django's own choice, the primary or the hinted instance's database
+        return _replica.get()
+
+    def db_for_write(self, model, **hints):
+        # Also for instances that were read from a replica
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the primary's data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in replicas():
+            return False
+        return None
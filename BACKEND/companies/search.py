@@ -0,0 +1,195 @@
+# companies/search.py
+"""
+Full-text search index for internships
+
+SQLite keeps an FTS5 virtual table and PostgreSQL a tsvector side table,
+both keyed by internship id. Any other database falls back to the plain
+icontains lookups.
+"""
+import re
+
+from django.db import connections, router
+from django.db.models import Q
+
+from .models import Internship, InternshipListing
+
+
+SQLITE_TABLE = 'companies_internship_fts'
+POSTGRES_TABLE = 'companies_internship_search'
+
+# Relative weight of each indexed column (title, description, requirements, company name)
+SQLITE_WEIGHTS = '10.0, 1.0, 2.0, 5.0'
+
+POSTGRES_DOCUMENT = (
+    "setweight(to_tsvector('english', i.title), 'A') || "
+    "setweight(to_tsvector('english', c.company_name), 'B') || "
+    "setweight(to_tsvector('english', i.requirements), 'C') || "
+    "setweight(to_tsvector('english', i.description), 'D')"
+)
+
+SUPPORTED_VENDORS = ('sqlite', 'postgresql')
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def _connection(using=None):
+    return connections[using or router.db_for_write(Internship)]
+
+
+def is_supported(using=None):
+    return _connection(using).vendor in SUPPORTED_VENDORS
+
+
+def tokenize(query):
+    return TOKEN_RE.findall(query.lower())
+
+
+def icontains_filter(queryset, query):
+    """
+    Legacy search: OR-ed icontains scans over every searchable column
+
+    InternshipListing rows keep those columns, lowercased, in search_text.
+    """
+    if queryset.model is InternshipListing:
+        return queryset.filter(search_text__contains=query.lower())
+    return queryset.filter(
+        Q(title__icontains=query)
+        | Q(description__icontains=query)
+        | Q(requirements__icontains=query)
+        | Q(company__company_name__icontains=query)
+    )
+
+
+def search(queryset, query):
+    """
+    Restrict an Internship (or InternshipListing) queryset to rows matching `query`
+
+    Adds a `search_rank` column where lower values are more relevant, so
+    callers can `order_by('search_rank')`.
+    """
+    tokens = tokenize(query)
+    connection = connections[queryset.db]
+    vendor = connection.vendor
+    if not tokens or vendor not in SUPPORTED_VENDORS:
+        return icontains_filter(queryset, query).extra(select={'search_rank': '0'})
+
+    # Index rows are keyed by internship id, which is also the listing's primary key
+    base = connection.ops.quote_name(queryset.model._meta.db_table)
+
+    if vendor == 'sqlite':
+        # Every token must match, each as a prefix like the old substring search
+        match = ' '.join('"%s"*' % token for token in tokens)
+        return queryset.extra(
+            select={'search_rank': f'bm25({SQLITE_TABLE}, {SQLITE_WEIGHTS})'},
+            tables=[SQLITE_TABLE],
+            where=[
+                f'{SQLITE_TABLE}.rowid = {base}.id',
+                f'{SQLITE_TABLE} MATCH %s',
+            ],
+            params=[match],
+        )
+
+    tsquery = ' & '.join('%s:*' % token for token in tokens)
+    return queryset.extra(
+        select={
+            'search_rank': f"-ts_rank({POSTGRES_TABLE}.document, to_tsquery('english', %s))",
+        },
+        select_params=[tsquery],
+        tables=[POSTGRES_TABLE],
+        where=[
+            f'{POSTGRES_TABLE}.internship_id = {base}.id',
+            f"{POSTGRES_TABLE}.document @@ to_tsquery('english', %s)",
+        ],
+        params=[tsquery],
+    )
+
+
+def _reindex(where, params, using=None):
+    """
+    Rewrite the index rows for every internship matching `where`
+    """
+    connection = _connection(using)
+    vendor = connection.vendor
+    if vendor not in SUPPORTED_VENDORS:
+        return
+
+    with connection.cursor() as cursor:
+        if vendor == 'sqlite':
+            cursor.execute(
+                f'DELETE FROM {SQLITE_TABLE} WHERE rowid IN '
+                f'(SELECT i.id FROM companies_internship i WHERE {where})',
+                params,
+            )
+            cursor.execute(
+                f'INSERT INTO {SQLITE_TABLE} (rowid, title, description, requirements, company_name) '
+                f'SELECT i.id, i.title, i.description, i.requirements, c.company_name '
+                f'FROM companies_internship i JOIN companies_company c ON c.id = i.company_id '
+                f'WHERE {where}',
+                params,
+            )
+        else:
+            cursor.execute(
+                f'INSERT INTO {POSTGRES_TABLE} (internship_id, document) '
+                f'SELECT i.id, {POSTGRES_DOCUMENT} '
+                f'FROM companies_internship i JOIN companies_company c ON c.id = i.company_id '
+                f'WHERE {where} '
+                f'ON CONFLICT (internship_id) DO UPDATE SET document = EXCLUDED.document',
+                params,
+            )
+
+
+def index_internship(pk, using=None):
+    _reindex('i.id = %s', [pk], using)
+
+
+def index_internships(pks, using=None):
+    pks = list(pks)
+    if pks:
+        _reindex('i.id IN (%s)' % ', '.join(['%s'] * len(pks)), pks, using)
+
+
+def index_company(company_id, using=None):
+    _reindex('i.company_id = %s', [company_id], using)
+
+
+def remove_internship(pk, using=None):
+    remove_internships([pk], using)
+
+
+def remove_internships(pks, using=None):
+    pks = list(pks)
+    connection = _connection(using)
+    vendor = connection.vendor
+    if not pks or vendor not in SUPPORTED_VENDORS:
+        return
+
+    placeholders = ', '.join(['%s'] * len(pks))
+    with connection.cursor() as cursor:
+        if vendor == 'sqlite':
+            cursor.execute(f'DELETE FROM {SQLITE_TABLE} WHERE rowid IN ({placeholders})', pks)
+        else:
+            cursor.execute(f'DELETE FROM {POSTGRES_TABLE} WHERE internship_id IN ({placeholders})', pks)
+
+
+def rebuild_index(using=None):
+    """
+    Drop every index row and rebuild from the internship table
+
+    Returns the number of indexed internships.
+    """
+    connection = _connection(using)
+    vendor = connection.vendor
+    if vendor not in SUPPORTED_VENDORS:
+        return 0
+
+    with connection.cursor() as cursor:
+        if vendor == 'sqlite':
+            cursor.execute(f'DELETE FROM {SQLITE_TABLE}')
+        else:
+            cursor.execute(f'TRUNCATE {POSTGRES_TABLE}')
+    _reindex('1 = 1', [], connection.alias)
+
+    with connection.cursor() as cursor:
+        table = SQLITE_TABLE if vendor == 'sqlite' else POSTGRES_TABLE
+        cursor.execute(f'SELECT COUNT(*) FROM {table}')
+        return cursor.fetchone()[0]
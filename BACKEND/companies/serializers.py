@@ -1,29 +1,59 @@
 # companies/serializers.py
+from django.db.models import Count
 from rest_framework import serializers
-from .models import Company, Internship
+from .models import (
+    Company,
+    Internship,
+    InternshipApplicationStats,
+    InternshipListing,
+    MarketTrendRollup,
+    PlacementRollup,
+)
 
 class CompanySerializer(serializers.ModelSerializer):
+    logo_thumbnail = serializers.ImageField(read_only=True)
+    logo_webp = serializers.ImageField(read_only=True)
+    
     class Meta:
         model = Company
         fields = ['id', 'company_name', 'email', 'phone', 'address', 
                   'industry', 'description', 'website', 'logo', 
-                  'is_approved', 'created_at']
+                  'logo_thumbnail', 'logo_webp', 'is_approved', 'created_at']
         read_only_fields = ['id', 'created_at', 'is_approved']
 
 
 class InternshipListSerializer(serializers.ModelSerializer):
     company_name = serializers.CharField(source='company.company_name', read_only=True)
-    company_logo = serializers.ImageField(source='company.logo', read_only=True)
+    # The thumbnail (see thumbnails.py), not the full-size logo
+    company_logo = serializers.ImageField(source='company.logo_thumbnail', read_only=True)
+    company_logo_webp = serializers.ImageField(source='company.logo_webp', read_only=True)
     
     class Meta:
         model = Internship
-        fields = ['id', 'company', 'company_name', 'company_logo', 'title', 
+        fields = ['id', 'company', 'company_name', 'company_logo', 'company_logo_webp', 'title', 
                   'description', 'placement_type', 'duration_months', 
                   'positions_available', 'location', 'stipend', 
                   'application_deadline', 'start_date', 'is_active', 'created_at']
         read_only_fields = ['id', 'created_at']
 
 
+class InternshipListingSerializer(serializers.ModelSerializer):
+    """
+    InternshipListSerializer's fields, plus applications_count, read from the flat listing row
+    """
+    company_logo = serializers.ImageField(source='company_logo_thumbnail', read_only=True)
+    company_logo_webp = serializers.ImageField(read_only=True)
+    is_active = serializers.BooleanField(read_only=True)
+    
+    class Meta:
+        model = InternshipListing
+        fields = ['id', 'company', 'company_name', 'company_logo', 'company_logo_webp', 'title', 
+                  'description', 'placement_type', 'duration_months', 
+                  'positions_available', 'location', 'stipend', 
+                  'application_deadline', 'start_date', 'is_active', 
+                  'applications_count', 'created_at']
+
+
 class InternshipDetailSerializer(serializers.ModelSerializer):
     company = CompanySerializer(read_only=True)
     applications_count = serializers.SerializerMethodField()
@@ -34,8 +64,12 @@ class InternshipDetailSerializer(serializers.ModelSerializer):
                   'placement_type', 'duration_months', 'positions_available', 
                   'location', 'stipend', 'application_deadline', 'start_date', 
                   'is_active', 'applications_count', 'created_at']
+        annotations = {'applications_total': Count('applications')}
     
     def get_applications_count(self, obj):
+        # Annotated by plan_queryset(); otherwise one query per object
+        if hasattr(obj, 'applications_total'):
+            return obj.applications_total
         return obj.applications.count()
 
 
@@ -82,6 +116,8 @@ class ApplicationListSerializer(serializers.ModelSerializer):
         fields = ['id', 'student_name', 'internship', 'status', 
                   'admin_approved', 'applied_at', 'updated_at']
         read_only_fields = ['id', 'applied_at', 'updated_at']
+        select_related = ['student']
+        fast_methods = {'student_name': ['student__first_name', 'student__last_name']}
     
     def get_student_name(self, obj):
         return f"{obj.student.first_name} {obj.student.last_name}"
@@ -99,6 +135,43 @@ class ApplicationDetailSerializer(serializers.ModelSerializer):
                   'company_feedback', 'admin_notes', 'applied_at', 'updated_at']
         read_only_fields = ['id', 'applied_at', 'updated_at', 'status', 
                            'admin_approved', 'company_feedback', 'admin_notes']
+        select_related = ['student']
     
     def get_student_name(self, obj):
-        return f"{obj.student.first_name} {obj.student.last_name}"
\ No newline at end of file
+        return f"{obj.student.first_name} {obj.student.last_name}"
+
+class PlacementRollupSerializer(serializers.ModelSerializer):
+    institution_name = serializers.CharField(source='institution.name', read_only=True)
+    placement_rate = serializers.SerializerMethodField()
+
+    class Meta:
+        model = PlacementRollup
+        fields = ['institution', 'institution_name', 'course', 'year_of_study', 'students',
+                  'applicants', 'placed', 'placement_rate', 'total', 'pending', 'under_review',
+                  'accepted', 'rejected', 'withdrawn']
+
+    def get_placement_rate(self, obj):
+        return round(obj.placed / obj.students, 4) if obj.students else 0.0
+
+
+class MarketTrendRollupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = MarketTrendRollup
+        fields = ['month', 'industry', 'location', 'total', 'pending', 'under_review',
+                  'accepted', 'rejected', 'withdrawn']
+
+
+class InternshipFunnelSerializer(serializers.ModelSerializer):
+    funnel = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Internship
+        fields = ['id', 'title', 'company', 'positions_available', 'is_active', 'funnel']
+        select_related = ['application_stats']
+
+    def get_funnel(self, obj):
+        # Internships nobody has applied to have no stats row
+        try:
+            return obj.application_stats.as_dict()
+        except InternshipApplicationStats.DoesNotExist:
+            return dict.fromkeys(InternshipApplicationStats.COUNTER_FIELDS, 0)
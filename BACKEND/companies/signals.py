@@ -0,0 +1,191 @@
+# companies/signals.py
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from students.models import Student
+
+from . import analytics, blobs, cache, counters, listings, search, tasks, thumbnails, tokens
+from .models import Application, Company, Internship
+
+
+INDEXED_INTERNSHIP_FIELDS = {'title', 'description', 'requirements', 'company'}
+
+
+@receiver(post_save, sender=Internship)
+def index_internship(sender, instance, raw=False, using=None, update_fields=None, **kwargs):
+    """
+    Keep the search index row in sync with the saved internship
+    """
+    if raw:
+        return
+    if update_fields is not None and not INDEXED_INTERNSHIP_FIELDS & set(update_fields):
+        return
+    search.index_internship(instance.pk, using)
+
+
+@receiver(post_delete, sender=Internship)
+def unindex_internship(sender, instance, using=None, **kwargs):
+    search.remove_internship(instance.pk, using)
+
+
+@receiver(post_save, sender=Company)
+def reindex_company_internships(sender, instance, created=False, raw=False, using=None, update_fields=None, **kwargs):
+    """
+    The company name is part of every internship document
+    """
+    if raw or created:
+        return
+    if update_fields is not None and 'company_name' not in update_fields:
+        return
+    search.index_company(instance.pk, using)
+
+
+# Listing rows copy these (plus the company's name, logo and approval)
+LISTED_INTERNSHIP_FIELDS = {*listings.INTERNSHIP_FIELDS, 'requirements', 'company', 'is_active'}
+LISTED_COMPANY_FIELDS = {'company_name', 'logo', 'logo_thumbnail', 'logo_webp', 'is_approved'}
+
+
+@receiver(post_save, sender=Internship)
+def list_internship(sender, instance, raw=False, using=None, update_fields=None, **kwargs):
+    """
+    Keep the catalogue listing row in sync with the saved internship
+    """
+    if raw:
+        return
+    if update_fields is not None and not LISTED_INTERNSHIP_FIELDS & set(update_fields):
+        return
+    listings.refresh_internships([instance.pk], using)
+
+
+@receiver(post_delete, sender=Internship)
+def unlist_internship(sender, instance, using=None, **kwargs):
+    listings.remove(instance.pk, using)
+
+
+@receiver(post_save, sender=Company)
+def relist_company_internships(sender, instance, created=False, raw=False, using=None, update_fields=None, **kwargs):
+    """
+    Every listing row carries its company's name, logo and approval
+    """
+    if raw or created:
+        return
+    if update_fields is not None and not LISTED_COMPANY_FIELDS & set(update_fields):
+        return
+    listings.refresh_company(instance.pk, using)
+
+
+@receiver(post_save, sender=Application)
+def count_application(sender, instance, created=False, raw=False, using=None, update_fields=None, **kwargs):
+    """
+    Apply the status transition to the counters (runs inside Application.save's transaction)
+    """
+    if raw:
+        return
+    if not created and update_fields is not None and 'status' not in update_fields:
+        return
+    previous = None if created else getattr(instance, '_loaded_status', None)
+    counters.apply_transitions(
+        [(instance.student_id, instance.internship_id, previous, instance.status)], using
+    )
+
+
+@receiver(post_save, sender=Application)
+def queue_application_effects(sender, instance, created=False, raw=False, using=None, update_fields=None, **kwargs):
+    """
+    Queue the background side effects of a status change, in the same transaction
+    """
+    if raw:
+        return
+    if not created and update_fields is not None and 'status' not in update_fields:
+        return
+    previous = None if created else getattr(instance, '_loaded_status', None)
+    tasks.enqueue_transition_effects(
+        [(instance.pk, previous, instance.status, instance.updated_at)], using
+    )
+
+
+@receiver(post_delete, sender=Application)
+def uncount_application(sender, instance, using=None, **kwargs):
+    previous = getattr(instance, '_loaded_status', instance.status)
+    counters.apply_transitions(
+        [(instance.student_id, instance.internship_id, previous, None)], using
+    )
+
+
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+@receiver(post_save, sender=Internship)
+@receiver(post_delete, sender=Internship)
+def invalidate_catalogue(sender, using=None, **kwargs):
+    cache.invalidate_on_commit(using=using)
+
+
+# internship_detail and the internship lists show applications_count, which only changes on create and delete
+@receiver(post_save, sender=Application)
+def invalidate_internship_detail(sender, instance, created=False, raw=False, using=None, **kwargs):
+    if created and not raw:
+        cache.invalidate_on_commit(cache.internship_scope(instance.internship_id), using)
+        cache.invalidate_on_commit(using=using)
+
+
+@receiver(post_delete, sender=Application)
+def invalidate_internship_detail_on_delete(sender, instance, using=None, **kwargs):
+    cache.invalidate_on_commit(cache.internship_scope(instance.internship_id), using)
+    cache.invalidate_on_commit(using=using)
+
+
+# Logo thumbnails (see thumbnails.py)
+@receiver(pre_save, sender=Company)
+def prepare_logo_derivatives(sender, instance, raw=False, using=None, update_fields=None, **kwargs):
+    if not raw:
+        thumbnails.prepare(instance, using, update_fields)
+
+
+@receiver(post_save, sender=Company)
+def queue_logo_derivatives(sender, instance, raw=False, using=None, **kwargs):
+    if not raw:
+        thumbnails.enqueue([instance], using)
+
+
+# Blob reference counts (see blobs.py)
+@receiver(pre_save, sender=Company)
+@receiver(pre_save, sender=Student)
+def remember_blobs(sender, instance, raw=False, using=None, update_fields=None, **kwargs):
+    if not raw:
+        blobs.remember(instance, using, update_fields)
+
+
+@receiver(post_save, sender=Company)
+@receiver(post_save, sender=Student)
+def count_blobs(sender, instance, raw=False, using=None, **kwargs):
+    if not raw:
+        blobs.saved(instance, using)
+
+
+@receiver(post_delete, sender=Company)
+@receiver(post_delete, sender=Student)
+def release_blobs(sender, instance, using=None, **kwargs):
+    blobs.release(blobs.names_of(instance), using)
+
+
+# Cached token principals (see tokens.py)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_user(sender, instance, using=None, **kwargs):
+    tokens.forget(instance.pk, using)
+
+
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def forget_profile_user(sender, instance, using=None, **kwargs):
+    tokens.forget(instance.user_id, using)
+
+
+# Analytics rollups (see analytics.py)
+@receiver(pre_save, sender=Student)
+def note_placement_group(sender, instance, raw=False, using=None, update_fields=None, **kwargs):
+    if not raw:
+        analytics.note_placement_group(instance, using, update_fields)
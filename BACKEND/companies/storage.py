@@ -0,0 +1,132 @@
+# companies/storage.py
+"""
+Content-addressed file storage for resumes and company logos
+
+ContentAddressedStorage keeps every distinct file once, named after the
+SHA-256 of its bytes: <directory>/<aa>/<bb>/<sha256><ext>. Resumes go
+into blob_storage (blobs/), which is only read through the download
+views. Company logos and their thumbnails go into public_blob_storage
+(public/), the only directory the web server may serve directly. An
+upload is read in chunks, hashed as it is written to a temporary file in
+blobs/tmp/ (never under public/), then renamed into place; if that blob
+already exists the copy is dropped. Large uploads Django has already
+spooled to disk are hashed and moved, not copied. The same resume uploaded by a whole cohort takes the disk
+space of one.
+
+Several rows can name one blob, so delete() leaves files alone. blobs.py
+counts the references and `manage.py collect_blobs` removes the files no
+row names. Files saved before this storage (resumes/..., company_logos/...)
+stay where they are and are read as before.
+"""
+import hashlib
+import os
+import re
+import tempfile
+
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+
+
+BLOB_DIR = 'blobs'
+# Files anyone may fetch: company logos and their derivatives
+PUBLIC_BLOB_DIR = 'public'
+BLOB_DIRS = [BLOB_DIR, PUBLIC_BLOB_DIR]
+TEMP_DIR = 'tmp'
+BLOB_NAME_RE = re.compile(
+    r'(?:blobs|public)/[0-9a-f]{2}/[0-9a-f]{2}/(?P<digest>[0-9a-f]{64})(?P<ext>\.[a-z0-9]{1,10})?'
+)
+
+
+def blob_name(digest, ext='', directory=BLOB_DIR):
+    return f'{directory}/{digest[:2]}/{digest[2:4]}/{digest}{ext}'
+
+
+def digest_of(name):
+    """
+    The SHA-256 a blob name carries, or None for files stored under their upload name
+    """
+    match = BLOB_NAME_RE.fullmatch(name or '')
+    return match['digest'] if match else None
+
+
+def _extension(name):
+    ext = os.path.splitext(name)[1].lower()
+    return ext if re.fullmatch(r'\.[a-z0-9]{1,10}', ext) else ''
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    FileSystemStorage that names files by the SHA-256 of their content, under `directory`
+    """
+
+    def __init__(self, directory=BLOB_DIR, **kwargs):
+        super().__init__(**kwargs)
+        self.directory = directory
+
+    def temp_dir(self):
+        # Shared by both directories, and not served
+        return self.path(f'{BLOB_DIR}/{TEMP_DIR}')
+
+    def _save(self, name, content):
+        digest = hashlib.sha256()
+        spooled = getattr(content, 'temporary_file_path', None)
+        if spooled:
+            # Already on disk: one read to hash it, then a rename
+            for chunk in content.chunks():
+                digest.update(chunk)
+            source = spooled()
+        else:
+            os.makedirs(self.temp_dir(), exist_ok=True)
+            fd, source = tempfile.mkstemp(dir=self.temp_dir())
+            try:
+                with os.fdopen(fd, 'wb') as temp:
+                    for chunk in content.chunks():
+                        digest.update(chunk)
+                        temp.write(chunk)
+            except BaseException:
+                os.remove(source)
+                raise
+
+        name = blob_name(digest.hexdigest(), _extension(name), self.directory)
+        target = self.path(name)
+        if os.path.exists(target):
+            # A new reference is on its way: keep collect_blobs off it for another grace period
+            os.utime(target)
+            if not spooled:
+                os.remove(source)
+            return name
+
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if spooled:
+            file_move_safe(source, target, allow_overwrite=True)
+        else:
+            # Same filesystem, so the blob appears whole or not at all
+            os.replace(source, target)
+        if self.file_permissions_mode is not None:
+            os.chmod(target, self.file_permissions_mode)
+        return name
+
+    def get_available_name(self, name, max_length=None):
+        # _save names the file; the upload's name only lends its extension
+        return name
+
+    def delete(self, name):
+        """
+        Blobs are shared; collect_blobs removes the ones nothing references
+        """
+
+    def remove(self, name):
+        super().delete(name)
+
+
+blob_storage = ContentAddressedStorage()
+public_blob_storage = ContentAddressedStorage(PUBLIC_BLOB_DIR)
+
+
+def get_blob_storage():
+    # A callable, so migrations refer to it instead of copying the storage's arguments
+    return blob_storage
+
+
+def get_public_blob_storage():
+    return public_blob_storage
@@ -0,0 +1,106 @@
+# companies/tasks.py
+"""
+Background side effects of application status changes
+
+Every code path that changes an application's status (Application.save
+through signals.py, bulk.py, matching.py) reports the change to
+enqueue_transition_effects(), which queues these tasks in the same
+transaction. The status counters are not among them: the accepted counter
+is the capacity check, so it has to be updated with the write itself.
+"""
+from django.conf import settings
+from django.core.mail import send_mail
+from django.utils.dateparse import parse_datetime
+
+from . import jobs
+from .models import Application, ApplicationEvent
+
+
+# Statuses set by a reviewer, which the student is told about
+STUDENT_NOTIFIED_STATUSES = {'under_review', 'accepted', 'rejected'}
+
+
+def _idempotency_key(name, application_id, to_status, occurred_at):
+    return f'{name}:{application_id}:{to_status}:{occurred_at}'
+
+
+def enqueue_transition_effects(changes, using=None):
+    """
+    Queue the side effects of (application id, old status, new status, when) changes
+
+    The old status is None for a new application.
+    """
+    queued = []
+    for application_id, from_status, to_status, occurred_at in changes:
+        if from_status == to_status:
+            continue
+        payload = {
+            'application_id': application_id,
+            'from_status': from_status,
+            'to_status': to_status,
+            'occurred_at': occurred_at.isoformat(),
+        }
+        names = ['applications.record_event']
+        if to_status in STUDENT_NOTIFIED_STATUSES:
+            names.append('applications.notify_student')
+        if from_status is None or to_status == 'withdrawn':
+            names.append('applications.notify_company')
+        queued.extend(
+            (name, payload, _idempotency_key(name, application_id, to_status, payload['occurred_at']))
+            for name in names
+        )
+    if queued:
+        jobs.enqueue_many(queued, using=using)
+
+
+@jobs.task('applications.record_event')
+def record_event(application_id, from_status, to_status, occurred_at):
+    if not Application.objects.filter(pk=application_id).exists():
+        return
+    ApplicationEvent.objects.bulk_create([ApplicationEvent(
+        application_id=application_id,
+        from_status=from_status,
+        to_status=to_status,
+        occurred_at=parse_datetime(occurred_at),
+    )], ignore_conflicts=True)
+
+
+def _application(application_id):
+    return Application.objects.select_related(
+        'student', 'internship__company'
+    ).filter(pk=application_id).first()
+
+
+@jobs.task('applications.notify_student')
+def notify_student(application_id, from_status, to_status, occurred_at):
+    application = _application(application_id)
+    if application is None or application.status != to_status:
+        # Deleted, or changed again since; that change sends its own email
+        return
+    internship = application.internship
+    send_mail(
+        subject=f'Your application for {internship.title} is {application.get_status_display().lower()}',
+        message=(
+            f'Dear {application.student.first_name},\n\n'
+            f'Your application for {internship.title} at {internship.company.company_name} '
+            f'is now {application.get_status_display().lower()}.\n'
+        ),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipient_list=[application.student.email],
+    )
+
+
+@jobs.task('applications.notify_company')
+def notify_company(application_id, from_status, to_status, occurred_at):
+    application = _application(application_id)
+    if application is None:
+        return
+    student = application.student
+    internship = application.internship
+    verb = 'withdrew their application' if to_status == 'withdrawn' else 'applied'
+    send_mail(
+        subject=f'{internship.title}: {student.first_name} {student.last_name} {verb}',
+        message=f'{student.first_name} {student.last_name} ({student.email}) {verb} for {internship.title}.\n',
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipient_list=[internship.company.email],
+    )
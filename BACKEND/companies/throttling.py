@@ -0,0 +1,259 @@
+# companies/throttling.py
+"""
+Rate limits for the search, apply and login endpoints
+
+Each scope in RATE_LIMITS has a budget per user and per client IP, as DRF
+rate strings ('120/min'):
+
+    RATE_LIMITS = {
+        'catalogue': {'user': '300/min', 'ip': '600/min'},
+        'apply': {'user': '20/min', 'ip': '60/min'},
+        'login': {'ip': '10/min'},
+    }
+
+A request spends tokens from both of its budgets and is refused with 429
+and a Retry-After header when either would go over. Requests cost one
+token, except catalogue searches (RATE_LIMIT_SEARCH_COST tokens, because
+a full-text or substring match is much heavier than an index range scan)
+and bulk applications (one token per item). A request that costs more
+than a whole budget, such as a bulk application with more items than the
+per-user rate, is refused with 429 and no Retry-After: waiting wouldn't let
+it through. A scope or identity without a rate is not limited;
+RATE_LIMITS = {} turns limiting off.
+
+Budgets are sliding-window counters in the RATE_LIMIT_CACHE_ALIAS cache:
+one counter for the current fixed window and one for the previous, which
+is weighted by how much of it the sliding window still covers. That is
+two small keys per client however fast it calls. Counters move with
+cache.incr, so processes sharing a cache (Redis, memcached) can't admit
+more than the budget between them; with the default local-memory cache
+each worker process keeps its own budgets. Refused requests are refunded,
+so a client that waits for Retry-After gets in.
+"""
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.exceptions import Throttled
+from rest_framework.throttling import BaseThrottle
+
+
+DEFAULT_SEARCH_COST = 5
+
+DURATIONS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def get_cache():
+    return caches[getattr(settings, 'RATE_LIMIT_CACHE_ALIAS', 'default')]
+
+
+def get_rates(scope):
+    return getattr(settings, 'RATE_LIMITS', {}).get(scope) or {}
+
+
+def parse_rate(rate):
+    """
+    '120/min' -> (120, 60): requests allowed and the window in seconds
+    """
+    count, period = rate.split('/')
+    return int(count), DURATIONS[period[0]]
+
+
+def _keys(scope, ident, period, now):
+    window = int(now // period)
+    prefix = f'ratelimit:{scope}:{ident}:{period}'
+    return f'{prefix}:{window}', f'{prefix}:{window - 1}', now % period / period
+
+
+def _wait(previous, current, cost, limit, period, elapsed):
+    """
+    Seconds until `cost` more tokens fit, if nothing else is spent meanwhile
+    """
+    room = limit - cost
+    if current <= room and previous:
+        # Once the sliding window has moved far enough past the previous one
+        return (1 - (room - current) / previous - elapsed) * period
+    # After this window has become the previous one and slid partly away
+    return (1 - elapsed + (1 - room / current if current else 0)) * period
+
+
+def _incr(cache, key, cost, timeout):
+    try:
+        return cache.incr(key, cost)
+    except ValueError:
+        # First request of the window
+        if cache.add(key, cost, timeout):
+            return cost
+        return cache.incr(key, cost)
+
+
+async def _aincr(cache, key, cost, timeout):
+    try:
+        return await cache.aincr(key, cost)
+    except ValueError:
+        if await cache.aadd(key, cost, timeout):
+            return cost
+        return await cache.aincr(key, cost)
+
+
+def consume(scope, ident, cost, rate, now):
+    """
+    Spend `cost` tokens of `ident`'s budget; returns 0 if allowed, else the seconds to wait
+    """
+    limit, period = parse_rate(rate)
+    current_key, previous_key, elapsed = _keys(scope, ident, period, now)
+    cache = get_cache()
+    current = _incr(cache, current_key, cost, period * 2)
+    previous = cache.get(previous_key, 0)
+    if previous * (1 - elapsed) + current <= limit:
+        return 0
+    cache.decr(current_key, cost)
+    return _wait(previous, current - cost, cost, limit, period, elapsed)
+
+
+async def aconsume(scope, ident, cost, rate, now):
+    limit, period = parse_rate(rate)
+    current_key, previous_key, elapsed = _keys(scope, ident, period, now)
+    cache = get_cache()
+    current = await _aincr(cache, current_key, cost, period * 2)
+    previous = await cache.aget(previous_key, 0)
+    if previous * (1 - elapsed) + current <= limit:
+        return 0
+    await cache.adecr(current_key, cost)
+    return _wait(previous, current - cost, cost, limit, period, elapsed)
+
+
+def refund(scope, ident, cost, rate, now):
+    _, period = parse_rate(rate)
+    current_key, _, _ = _keys(scope, ident, period, now)
+    try:
+        get_cache().decr(current_key, cost)
+    except ValueError:
+        pass
+
+
+async def arefund(scope, ident, cost, rate, now):
+    _, period = parse_rate(rate)
+    current_key, _, _ = _keys(scope, ident, period, now)
+    try:
+        await get_cache().adecr(current_key, cost)
+    except ValueError:
+        pass
+
+
+class RateLimitThrottle(BaseThrottle):
+    """
+    Per-user and per-IP budgets of RATE_LIMITS[scope]
+    """
+    scope = None
+    timer = time.time
+
+    def get_cost(self, request):
+        return 1
+
+    def get_budgets(self, request):
+        """
+        (scope key, identity, rate) for each budget the request spends from
+        """
+        rates = get_rates(self.scope)
+        identities = [('ip', self.get_ident(request))]
+        if request.user and request.user.is_authenticated:
+            identities.insert(0, ('user', request.user.pk))
+        return [
+            (f'{self.scope}:{kind}', ident, rates[kind])
+            for kind, ident in identities if rates.get(kind)
+        ]
+
+    def check_cost(self, cost, budgets):
+        """
+        Raise Throttled for a request that costs more than one of its budgets holds
+        """
+        for _, _, rate in budgets:
+            limit, _ = parse_rate(rate)
+            if cost > limit:
+                raise Throttled(detail=f'This request costs {cost} tokens, more than the {limit} its rate allows.')
+
+    def allow_request(self, request, view):
+        self.wait_seconds = 0
+        budgets = self.get_budgets(request)
+        if not budgets:
+            return True
+        cost = self.get_cost(request)
+        self.check_cost(cost, budgets)
+        now = self.timer()
+        spent = []
+        for scope, ident, rate in budgets:
+            wait = consume(scope, ident, cost, rate, now)
+            if wait:
+                self.wait_seconds = wait
+                # What the other budgets took for a request that won't run
+                for spent_scope, spent_ident, spent_rate in spent:
+                    refund(spent_scope, spent_ident, cost, spent_rate, now)
+                return False
+            spent.append((scope, ident, rate))
+        return True
+
+    async def aallow_request(self, request, view):
+        self.wait_seconds = 0
+        budgets = self.get_budgets(request)
+        if not budgets:
+            return True
+        cost = self.get_cost(request)
+        self.check_cost(cost, budgets)
+        now = self.timer()
+        spent = []
+        for scope, ident, rate in budgets:
+            wait = await aconsume(scope, ident, cost, rate, now)
+            if wait:
+                self.wait_seconds = wait
+                # What the other budgets took for a request that won't run
+                for spent_scope, spent_ident, spent_rate in spent:
+                    await arefund(spent_scope, spent_ident, cost, spent_rate, now)
+                return False
+            spent.append((scope, ident, rate))
+        return True
+
+    def wait(self):
+        # Whole seconds, as Retry-After carries them; never 0, which would drop the header
+        return max(1, math.ceil(self.wait_seconds))
+
+
+class CatalogueRateThrottle(RateLimitThrottle):
+    """
+    Catalogue list endpoints; a search costs RATE_LIMIT_SEARCH_COST tokens
+    """
+    scope = 'catalogue'
+
+    def get_cost(self, request):
+        if request.query_params.get('search'):
+            return getattr(settings, 'RATE_LIMIT_SEARCH_COST', DEFAULT_SEARCH_COST)
+        return 1
+
+
+class ApplyRateThrottle(RateLimitThrottle):
+    """
+    Application submissions (POST only); a bulk submission costs one token per item
+    """
+    scope = 'apply'
+
+    def get_budgets(self, request):
+        if request.method != 'POST':
+            return []
+        return super().get_budgets(request)
+
+    def get_cost(self, request):
+        items = request.data.get('items') if hasattr(request.data, 'get') else None
+        return max(1, len(items)) if isinstance(items, list) else 1
+
+
+class LoginRateThrottle(RateLimitThrottle):
+    """
+    Token requests (POST only), which check passwords
+    """
+    scope = 'login'
+
+    def get_budgets(self, request):
+        if request.method != 'POST':
+            return []
+        return super().get_budgets(request)
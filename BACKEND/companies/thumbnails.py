@@ -0,0 +1,146 @@
+# companies/thumbnails.py
+"""
+Logo thumbnails for the list endpoints
+
+A company logo is stored as uploaded, often a large image, and every row of
+the internship and application lists carried its URL. From each logo this
+module renders a LOGO_THUMBNAIL_SIZE square thumbnail: the logo fitted
+inside and centred on a transparent (PNG) or white (JPEG) canvas. It also
+renders a WebP copy of it. Both go into the public content-addressed
+storage with the logos (public_blob_storage in storage.py), so a
+derivative's URL changes whenever its bytes do and can be cached as
+immutable (see MEDIA_URL in settings.py).
+
+When a company's logo changes, prepare() points logo_thumbnail at the logo
+itself, so the lists show something until the derivatives exist.
+signals.py then queues the 'logos.derive' job: run_jobs' worker pool
+renders and stores the derivatives, then saves them on the company. The listing rows follow
+through the usual company signals. The lists serialize logo_thumbnail as
+company_logo and logo_webp as company_logo_webp. `manage.py derive_logos`
+renders the logos that have no derivatives yet on a process pool.
+"""
+import io
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from . import jobs
+from .models import Company
+from .storage import public_blob_storage
+
+
+DEFAULT_SIZE = 128
+JPEG_QUALITY = 85
+WEBP_QUALITY = 80
+
+
+def thumbnail_size():
+    return getattr(settings, 'LOGO_THUMBNAIL_SIZE', DEFAULT_SIZE)
+
+
+def needs_derivatives(company):
+    return bool(company.logo.name) and company.logo_derived_from != company.logo.name
+
+
+def prepare(company, using=None, update_fields=None):
+    """
+    Before a save: keep the stored derivatives of an unchanged logo, or show a new logo itself until they exist
+    """
+    if update_fields is not None:
+        return
+    stored = None
+    if not company._state.adding:
+        stored = Company.objects.using(using).filter(pk=company.pk).values(
+            'logo', 'logo_thumbnail', 'logo_webp', 'logo_derived_from'
+        ).first()
+    if stored and (stored['logo'] or '') == (company.logo.name or ''):
+        # This instance may have been loaded before the job saved them
+        company.logo_thumbnail = stored['logo_thumbnail']
+        company.logo_webp = stored['logo_webp']
+        company.logo_derived_from = stored['logo_derived_from']
+    else:
+        company.logo_thumbnail = company.logo_webp = None
+        company.logo_derived_from = ''
+    if not company.logo_thumbnail:
+        company.logo_thumbnail = company.logo.name or None
+
+
+def enqueue(companies, using=None):
+    """
+    Queue a 'logos.derive' job per company whose logo has no derivatives
+    """
+    queued = [
+        ('logos.derive', {'company_id': company.pk, 'logo': company.logo.name},
+         f'logos.derive:{company.pk}:{company.logo.name}')
+        for company in companies if needs_derivatives(company)
+    ]
+    if queued:
+        jobs.enqueue_many(queued, using=using)
+
+
+def render(source, size):
+    """
+    {'thumbnail': (bytes, extension), 'webp': (bytes, extension)} for an image file path or file object
+
+    Pure PIL work, no database, so derive_logos can run it in other processes.
+    """
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        transparent = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+        image = image.convert('RGBA' if transparent else 'RGB')
+    image.thumbnail((size, size), Image.Resampling.LANCZOS)
+    canvas = Image.new(image.mode, (size, size), (255, 255, 255, 0) if transparent else (255, 255, 255))
+    canvas.paste(image, ((size - image.width) // 2, (size - image.height) // 2))
+
+    thumbnail = io.BytesIO()
+    if transparent:
+        canvas.save(thumbnail, 'PNG', optimize=True)
+    else:
+        canvas.save(thumbnail, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    webp = io.BytesIO()
+    canvas.save(webp, 'WEBP', quality=WEBP_QUALITY, method=4)
+    return {
+        'thumbnail': (thumbnail.getvalue(), '.png' if transparent else '.jpg'),
+        'webp': (webp.getvalue(), '.webp'),
+    }
+
+
+def store(rendered):
+    """
+    Save rendered derivatives as blobs; {'thumbnail': name, 'webp': name}
+    """
+    return {
+        variant: public_blob_storage.save(f'logo{extension}', ContentFile(content))
+        for variant, (content, extension) in rendered.items()
+    }
+
+
+def apply(company_id, logo, names):
+    """
+    Save the derivatives of `logo` on the company, unless its logo has changed since
+
+    A save rather than an update, so the signals count the blob references
+    and refresh the listing rows and the catalogue cache.
+    """
+    with transaction.atomic():
+        company = Company.objects.select_for_update().filter(pk=company_id).first()
+        if company is None or company.logo.name != logo:
+            return False
+        company.logo_thumbnail = names['thumbnail']
+        company.logo_webp = names['webp']
+        company.logo_derived_from = logo
+        company.save(update_fields=['logo_thumbnail', 'logo_webp', 'logo_derived_from', 'updated_at'])
+    return True
+
+
+@jobs.task('logos.derive', max_attempts=3)
+def derive(company_id, logo):
+    company = Company.objects.filter(pk=company_id).first()
+    if company is None or company.logo.name != logo or company.logo_derived_from == logo:
+        # Deleted, replaced (that logo queued its own job) or already done
+        return
+    with company.logo.open('rb') as source:
+        rendered = render(source, thumbnail_size())
+    apply(company_id, logo, store(rendered))
@@ -0,0 +1,322 @@
+# companies/tokens.py
+"""
+Signed bearer tokens and a cache of the users they name
+
+With only SessionAuthentication, every API call read the session row and
+then the User, and most views' `hasattr(request.user, 'student')` loaded
+the profile: two or three queries before the view did any work.
+
+issue() makes a JWT-style token (base64url header.payload.signature) for
+a user, signed with HMAC-SHA256 under AUTH_TOKEN_SECRET (default
+SECRET_KEY). It carries the user id, the role ('student', 'company' or
+'institution' for staff), a stamp of the password and an expiry
+AUTH_TOKEN_TTL_SECONDS away. Clients send it as `Authorization: Bearer
+<token>` and TokenAuthentication checks it locally, without a token table.
+
+The user and its student and company profiles are read in one query and
+kept in `principals`, an in-process LRU of AUTH_PRINCIPAL_CACHE_SIZE
+users, for AUTH_PRINCIPAL_CACHE_SECONDS (0 turns it off). Every request
+gets new model instances built from the cached values, with the profiles
+already attached, so on a cache hit authentication and the views' role
+checks run no queries. signals.py drops a user from this process's cache
+when the user or a profile is saved or deleted; other processes serve
+the old values until they expire. A token stops working when the user is
+deactivated, when its role changes, or when the password changes, as
+sessions do.
+"""
+import base64
+import json
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import router, transaction
+from django.utils.crypto import constant_time_compare, salted_hmac
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+
+from students.models import Student
+
+from .models import Company
+
+
+DEFAULT_TOKEN_TTL = 15 * 60
+DEFAULT_CACHE_SECONDS = 30
+DEFAULT_CACHE_SIZE = 10000
+
+KEY_SALT = 'companies.tokens'
+KEYWORD = 'Bearer'
+
+# Profiles loaded with the user: (reverse accessor, model)
+PROFILES = [('student', Student), ('company', Company)]
+
+# Hit/miss counters for benchmarks and diagnostics
+stats = Counter()
+
+
+class InvalidToken(Exception):
+    pass
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def _json(data):
+    return _b64encode(json.dumps(data, separators=(',', ':')).encode())
+
+
+# Only tokens with exactly this header are accepted, so no other algorithm can be asked for
+HEADER = _json({'alg': 'HS256', 'typ': 'JWT'})
+
+
+def token_lifetime():
+    return getattr(settings, 'AUTH_TOKEN_TTL_SECONDS', DEFAULT_TOKEN_TTL)
+
+
+def _signature(signing_input):
+    secret = getattr(settings, 'AUTH_TOKEN_SECRET', None) or settings.SECRET_KEY
+    return _b64encode(salted_hmac(KEY_SALT, signing_input, secret=secret, algorithm='sha256').digest())
+
+
+def role_of(user):
+    if hasattr(user, 'student'):
+        return 'student'
+    if hasattr(user, 'company'):
+        return 'company'
+    if user.is_staff:
+        return 'institution'
+    return None
+
+
+def _password_stamp(user):
+    # Changes with the password, so older tokens stop working
+    return user.get_session_auth_hash()[:16]
+
+
+def issue(user, lifetime=None):
+    """
+    A signed token for `user`, valid for `lifetime` seconds (default AUTH_TOKEN_TTL_SECONDS)
+    """
+    now = int(time.time())
+    payload = _json({
+        'sub': user.pk,
+        'role': role_of(user),
+        'pwd': _password_stamp(user),
+        'iat': now,
+        'exp': now + (token_lifetime() if lifetime is None else lifetime),
+    })
+    return f'{HEADER}.{payload}.{_signature(f"{HEADER}.{payload}")}'
+
+
+def decode(token):
+    """
+    The claims of a token this server signed and that hasn't expired; raises InvalidToken
+    """
+    parts = token.split('.')
+    if len(parts) != 3:
+        raise InvalidToken('Malformed token.')
+    header, payload, signature = parts
+    if header != HEADER:
+        raise InvalidToken('Unsupported token header.')
+    if not constant_time_compare(signature, _signature(f'{header}.{payload}')):
+        raise InvalidToken('Invalid token signature.')
+    try:
+        claims = json.loads(_b64decode(payload))
+    except ValueError:
+        raise InvalidToken('Malformed token.')
+    if not isinstance(claims, dict) or not isinstance(claims.get('sub'), int) \
+            or not isinstance(claims.get('exp'), int):
+        raise InvalidToken('Malformed token.')
+    if claims['exp'] <= time.time():
+        raise InvalidToken('Token has expired.')
+    return claims
+
+
+class PrincipalCache:
+    """
+    Thread-safe LRU of user snapshots, each kept for AUTH_PRINCIPAL_CACHE_SECONDS
+
+    put() is given the generation read before the snapshot was loaded, and
+    drops the snapshot if a user has been forgotten since: it may predate
+    that change.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = 0
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] <= now:
+                stats['misses'] += 1
+                return None
+            self._entries.move_to_end(user_id)
+            stats['hits'] += 1
+            return entry[1]
+
+    def put(self, user_id, snapshot, generation):
+        seconds = getattr(settings, 'AUTH_PRINCIPAL_CACHE_SECONDS', DEFAULT_CACHE_SECONDS)
+        if seconds <= 0:
+            return
+        size = getattr(settings, 'AUTH_PRINCIPAL_CACHE_SIZE', DEFAULT_CACHE_SIZE)
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[user_id] = (time.monotonic() + seconds, snapshot)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > size:
+                self._entries.popitem(last=False)
+
+    def forget(self, user_id):
+        with self._lock:
+            self.generation += 1
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+
+principals = PrincipalCache()
+
+
+def forget(user_id, using=None):
+    """
+    Drop a user from this process's cache, now and when the change commits
+
+    Until then, other requests still read the committed values and may cache them again.
+    """
+    principals.forget(user_id)
+    transaction.on_commit(lambda: principals.forget(user_id), using=using)
+
+
+def _columns():
+    columns = [field.name for field in User._meta.concrete_fields]
+    for accessor, model in PROFILES:
+        columns += [f'{accessor}__{field.name}' for field in model._meta.concrete_fields]
+    return columns
+
+
+def _snapshot(row):
+    """
+    (user values, [profile values or None]) from a _columns() row
+    """
+    start = len(User._meta.concrete_fields)
+    user_values, profiles = row[:start], []
+    for _, model in PROFILES:
+        end = start + len(model._meta.concrete_fields)
+        values = row[start:end]
+        # Left-joined: a missing profile is a row of NULLs, primary key included
+        profiles.append(values if values[0] is not None else None)
+        start = end
+    return user_values, profiles
+
+
+def _build(snapshot):
+    """
+    Fresh User and profile instances for a snapshot, the profiles cached on the user as select_related would
+    """
+    user_values, profiles = snapshot
+    db = router.db_for_read(User)
+    user = User.from_db(db, [field.attname for field in User._meta.concrete_fields], user_values)
+    for (accessor, model), values in zip(PROFILES, profiles):
+        if values is None:
+            getattr(User, accessor).related.set_cached_value(user, None)
+        else:
+            profile = model.from_db(db, [field.attname for field in model._meta.concrete_fields], values)
+            setattr(user, accessor, profile)
+    return user
+
+
+def get_user(user_id):
+    """
+    User `user_id` with its profiles attached, from the cache when it can; None if there is none
+    """
+    snapshot = principals.get(user_id)
+    if snapshot is None:
+        generation = principals.generation
+        row = User.objects.filter(pk=user_id).values_list(*_columns()).first()
+        if row is None:
+            return None
+        snapshot = _snapshot(row)
+        principals.put(user_id, snapshot, generation)
+    return _build(snapshot)
+
+
+async def aget_user(user_id):
+    snapshot = principals.get(user_id)
+    if snapshot is None:
+        generation = principals.generation
+        row = await User.objects.filter(pk=user_id).values_list(*_columns()).afirst()
+        if row is None:
+            return None
+        snapshot = _snapshot(row)
+        principals.put(user_id, snapshot, generation)
+    return _build(snapshot)
+
+
+def _check(user, claims):
+    if user is None or not user.is_active:
+        raise InvalidToken('User inactive or deleted.')
+    if claims.get('role') != role_of(user) or not constant_time_compare(
+        claims.get('pwd') or '', _password_stamp(user)
+    ):
+        raise InvalidToken('Token is no longer valid.')
+    return user, claims
+
+
+def authenticate_token(token):
+    """
+    (user, claims) for a bearer token; raises InvalidToken
+    """
+    claims = decode(token)
+    return _check(get_user(claims['sub']), claims)
+
+
+async def aauthenticate_token(token):
+    claims = decode(token)
+    return _check(await aget_user(claims['sub']), claims)
+
+
+def bearer_token(request):
+    """
+    The token of an `Authorization: Bearer` header, or None without one
+    """
+    parts = get_authorization_header(request).split()
+    if not parts or parts[0].lower() != KEYWORD.lower().encode():
+        return None
+    if len(parts) != 2:
+        raise InvalidToken('Invalid Authorization header.')
+    try:
+        return parts[1].decode('ascii')
+    except UnicodeError:
+        raise InvalidToken('Invalid Authorization header.')
+
+
+class TokenAuthentication(BaseAuthentication):
+    """
+    Bearer tokens from issue(); request.auth is their claims
+    """
+
+    def authenticate(self, request):
+        try:
+            token = bearer_token(request)
+            if token is None:
+                return None
+            return authenticate_token(token)
+        except InvalidToken as exc:
+            raise AuthenticationFailed(str(exc))
+
+    def authenticate_header(self, request):
+        return KEYWORD
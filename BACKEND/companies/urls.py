@@ -1,7 +1,10 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
+    # Bearer tokens
+    path('auth/token/', views.auth_token, name='auth-token'),
+
     # Company endpoints
     path('companies/', views.company_list, name='company-list'),
     path('companies/<int:pk>/', views.company_detail, name='company-detail'),
@@ -10,4 +13,39 @@ urlpatterns = [
     path('internships/', views.internship_list, name='internship-list'),
     path('internships/<int:pk>/', views.internship_detail, name='internship-detail'),
     path('internships/by-company/', views.internship_by_company, name='internship-by-company'),
+
+    # Application endpoints
+    path('applications/', views.application_list_create, name='application-list-create'),
+    path('applications/<int:pk>/', views.application_detail, name='application-detail'),
+    path('applications/<int:pk>/withdraw/', views.application_withdraw, name='application-withdraw'),
+    path('applications/pending/', views.application_pending, name='application-pending'),
+    path('applications/accepted/', views.application_accepted, name='application-accepted'),
+    path('applications/statistics/', views.application_statistics, name='application-statistics'),
+    path('applications/bulk/', views.application_bulk_create, name='application-bulk-create'),
+    path('applications/bulk-status/', views.application_bulk_status, name='application-bulk-status'),
+    path('applications/export/<str:export_format>/', views.application_export, name='application-export'),
+    path('applications/<int:pk>/resume/', views.application_resume, name='application-resume'),
+
+    # Resumes (content-addressed storage)
+    path('resume/', views.resume, name='resume'),
+
+    # Recommendations
+    path('recommendations/', views.recommendation_list, name='recommendation-list'),
+
+    # Placement engine
+    path('placements/run/', views.placement_run, name='placement-run'),
+
+    # Analytics (read from the rollup tables)
+    path('analytics/placements/', views.analytics_placements, name='analytics-placements'),
+    path('analytics/internships/', views.analytics_internships, name='analytics-internships'),
+    path('analytics/trends/', views.analytics_trends, name='analytics-trends'),
+
+    # Request profiling metrics (Prometheus)
+    path('metrics/', views.metrics, name='metrics'),
+
+    # Async catalogue endpoints, for ASGI deployments
+    path('async/companies/', async_views.company_list, name='async-company-list'),
+    path('async/companies/<int:pk>/', async_views.company_detail, name='async-company-detail'),
+    path('async/internships/', async_views.internship_list, name='async-internship-list'),
+    path('async/internships/<int:pk>/', async_views.internship_detail, name='async-internship-detail'),
 ]
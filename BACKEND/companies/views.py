@@ -1,20 +1,32 @@
 # companies/views.py
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes, throttle_classes
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 from rest_framework import status
 from django.shortcuts import get_object_or_404
 from django.core.paginator import Paginator
-from .models import Company, Internship
-from .serializers import CompanySerializer, InternshipListSerializer, InternshipDetailSerializer
+from django.utils import timezone
+from .models import Company, Internship, InternshipListing
+from .serializers import CompanySerializer, InternshipListingSerializer, InternshipDetailSerializer
+from . import counters
+from .cache import cache_response, internship_scope
+from . import search as search_index
+from .pagination import CursorError, is_cursor_request, paginate_by_cursor
+from .planner import plan_queryset
+from .routers import read_from_replica
+from .throttling import ApplyRateThrottle, CatalogueRateThrottle
+from . import fastpath
+from .fastpath import FastJSONRenderer
 
 
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def company_list(request):
+# DRF's default renderers, with JSON through orjson when FAST_SERIALIZERS is on
+LIST_RENDERERS = [FastJSONRenderer, BrowsableAPIRenderer]
+
+
+def filter_companies(request):
     """
-    Get list of all approved companies
-    Supports search by name, industry, or description
+    Approved companies matching the company_list query parameters
     """
     companies = Company.objects.filter(is_approved=True)
     
@@ -31,26 +43,84 @@ def company_list(request):
     
     # Ordering
     ordering = request.query_params.get('ordering', '-created_at')
-    companies = companies.order_by(ordering)
+    return companies.order_by(ordering)
+
+
+def filter_internships(request):
+    """
+    Listings (open internships) matching the internship_list query parameters
+    """
+    # Postings expire at their deadline even before the sweeper deactivates them
+    internships = InternshipListing.objects.filter(application_deadline__gte=timezone.localdate())
+    
+    # Filter by placement type
+    placement_type = request.query_params.get('placement_type', None)
+    if placement_type:
+        internships = internships.filter(placement_type=placement_type)
     
-    # Pagination
+    # Filter by company
+    company_id = request.query_params.get('company', None)
+    if company_id:
+        internships = internships.filter(company_id=company_id)
+    
+    # Filter by location
+    location = request.query_params.get('location', None)
+    if location:
+        internships = internships.filter(location__icontains=location)
+    
+    # Search functionality (ranked by relevance unless an ordering is given)
+    search = request.query_params.get('search', None)
+    default_ordering = 'application_deadline'
+    if search:
+        internships = search_index.search(internships, search)
+        default_ordering = 'search_rank'
+
+    # Ordering
+    ordering = request.query_params.get('ordering', default_ordering)
+    return internships.order_by(ordering)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@throttle_classes([CatalogueRateThrottle])
+@renderer_classes(LIST_RENDERERS)
+@cache_response
+@read_from_replica
+def company_list(request):
+    """
+    Get list of all approved companies
+    Supports search by name, industry, or description
+    """
+    companies = filter_companies(request)
+    
+    # Pagination (keyset mode with ?cursor=, page numbers otherwise)
+    if is_cursor_request(request):
+        try:
+            page, next_cursor = paginate_by_cursor(companies, request)
+        except CursorError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = CompanySerializer(page, many=True)
+        return Response({'next_cursor': next_cursor, 'results': serializer.data})
+
     page_number = request.query_params.get('page', 1)
     page_size = request.query_params.get('page_size', 10)
     paginator = Paginator(companies, page_size)
     page_obj = paginator.get_page(page_number)
     
-    serializer = CompanySerializer(page_obj, many=True)
+    results = fastpath.serialize(CompanySerializer, page_obj.object_list)
     
     return Response({
         'count': paginator.count,
         'total_pages': paginator.num_pages,
         'current_page': page_obj.number,
-        'results': serializer.data
+        'results': results
     })
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cache_response
+@read_from_replica
 def company_detail(request, pk):
     """
     Get details of a specific company
@@ -62,72 +132,51 @@ def company_detail(request, pk):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@throttle_classes([CatalogueRateThrottle])
+@renderer_classes(LIST_RENDERERS)
+@cache_response
+@read_from_replica
 def internship_list(request):
     """
     Get list of all active internships/attachments
     Supports filtering and searching
     """
-    internships = Internship.objects.filter(
-        is_active=True, 
-        company__is_approved=True
-    ).select_related('company')
-    
-    # Filter by placement type
-    placement_type = request.query_params.get('placement_type', None)
-    if placement_type:
-        internships = internships.filter(placement_type=placement_type)
-    
-    # Filter by company
-    company_id = request.query_params.get('company', None)
-    if company_id:
-        internships = internships.filter(company_id=company_id)
-    
-    # Filter by location
-    location = request.query_params.get('location', None)
-    if location:
-        internships = internships.filter(location__icontains=location)
-    
-    # Search functionality
-    search = request.query_params.get('search', None)
-    if search:
-        internships = internships.filter(
-            title__icontains=search
-        ) | internships.filter(
-            description__icontains=search
-        ) | internships.filter(
-            requirements__icontains=search
-        ) | internships.filter(
-            company__company_name__icontains=search
-        )
-    
-    # Ordering
-    ordering = request.query_params.get('ordering', 'application_deadline')
-    internships = internships.order_by(ordering)
-    
-    # Pagination
+    internships = filter_internships(request)
+    
+    # Pagination (keyset mode with ?cursor=, page numbers otherwise)
+    if is_cursor_request(request):
+        try:
+            page, next_cursor = paginate_by_cursor(internships, request)
+        except CursorError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = InternshipListingSerializer(page, many=True)
+        return Response({'next_cursor': next_cursor, 'results': serializer.data})
+
     page_number = request.query_params.get('page', 1)
     page_size = request.query_params.get('page_size', 10)
     paginator = Paginator(internships, page_size)
     page_obj = paginator.get_page(page_number)
     
-    serializer = InternshipListSerializer(page_obj, many=True)
+    results = fastpath.serialize(InternshipListingSerializer, page_obj.object_list)
     
     return Response({
         'count': paginator.count,
         'total_pages': paginator.num_pages,
         'current_page': page_obj.number,
-        'results': serializer.data
+        'results': results
     })
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cache_response(scopes=lambda request, pk: [internship_scope(pk)])
+@read_from_replica
 def internship_detail(request, pk):
     """
     Get detailed information about a specific internship
     """
     internship = get_object_or_404(
-        Internship, 
+        plan_queryset(Internship.objects.all(), InternshipDetailSerializer),
         pk=pk, 
         is_active=True, 
         company__is_approved=True
@@ -138,6 +187,8 @@ def internship_detail(request, pk):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cache_response
+@read_from_replica
 def internship_by_company(request):
     """
     Get internships filtered by company
@@ -150,18 +201,17 @@ def internship_by_company(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    internships = Internship.objects.filter(
+    internships = InternshipListing.objects.filter(
         company_id=company_id,
-        is_active=True,
-        company__is_approved=True
-    )
+        application_deadline__gte=timezone.localdate()
+    ).order_by('application_deadline')
     
-    serializer = InternshipListSerializer(internships, many=True)
+    serializer = InternshipListingSerializer(internships, many=True)
     return Response(serializer.data)
 
 
 # applications/views.py
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes, throttle_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
@@ -174,10 +224,16 @@ from .serializers import (
     ApplicationListSerializer,
     ApplicationDetailSerializer
 )
+from .bulk import BatchSerializer, submit_applications, transition_applications
+from . import export, matching
+from django.core.exceptions import ValidationError
+from django.http import StreamingHttpResponse
 
 
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
+@throttle_classes([ApplyRateThrottle])
+@renderer_classes(LIST_RENDERERS)
 def application_list_create(request):
     """
     GET: List all applications for the current student
@@ -193,7 +249,10 @@ def application_list_create(request):
     student = request.user.student
     
     if request.method == 'GET':
-        applications = Application.objects.filter(student=student)
+        applications = plan_queryset(
+            Application.objects.filter(student=student),
+            ApplicationListSerializer
+        )
         
         # Filter by status
         status_filter = request.query_params.get('status', None)
@@ -210,19 +269,27 @@ def application_list_create(request):
         # Ordering
         applications = applications.order_by('-applied_at')
         
-        # Pagination
+        # Pagination (keyset mode with ?cursor=, page numbers otherwise)
+        if is_cursor_request(request):
+            try:
+                page, next_cursor = paginate_by_cursor(applications, request)
+            except CursorError as exc:
+                return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+            serializer = ApplicationListSerializer(page, many=True)
+            return Response({'next_cursor': next_cursor, 'results': serializer.data})
+
         page_number = request.query_params.get('page', 1)
         page_size = request.query_params.get('page_size', 10)
         paginator = Paginator(applications, page_size)
         page_obj = paginator.get_page(page_number)
         
-        serializer = ApplicationListSerializer(page_obj, many=True)
+        results = fastpath.serialize(ApplicationListSerializer, page_obj.object_list)
         
         return Response({
             'count': paginator.count,
             'total_pages': paginator.num_pages,
             'current_page': page_obj.number,
-            'results': serializer.data
+            'results': results
         })
     
     elif request.method == 'POST':
@@ -233,6 +300,10 @@ def application_list_create(request):
         
         if serializer.is_valid():
             application = serializer.save()
+            application = plan_queryset(
+                Application.objects.all(),
+                ApplicationDetailSerializer
+            ).get(pk=application.pk)
             response_serializer = ApplicationDetailSerializer(application)
             
             return Response({
@@ -256,7 +327,7 @@ def application_detail(request, pk):
         )
     
     application = get_object_or_404(
-        Application,
+        plan_queryset(Application.objects.all(), ApplicationDetailSerializer),
         pk=pk,
         student=request.user.student
     )
@@ -277,10 +348,10 @@ def application_pending(request):
             status=status.HTTP_403_FORBIDDEN
         )
     
-    applications = Application.objects.filter(
+    applications = plan_queryset(Application.objects.filter(
         student=request.user.student,
         status='pending'
-    ).order_by('-applied_at')
+    ), ApplicationListSerializer).order_by('-applied_at')
     
     serializer = ApplicationListSerializer(applications, many=True)
     return Response(serializer.data)
@@ -298,10 +369,10 @@ def application_accepted(request):
             status=status.HTTP_403_FORBIDDEN
         )
     
-    applications = Application.objects.filter(
+    applications = plan_queryset(Application.objects.filter(
         student=request.user.student,
         status='accepted'
-    ).order_by('-updated_at')
+    ), ApplicationListSerializer).order_by('-updated_at')
     
     serializer = ApplicationListSerializer(applications, many=True)
     return Response(serializer.data)
@@ -319,16 +390,8 @@ def application_statistics(request):
             status=status.HTTP_403_FORBIDDEN
         )
     
-    applications = Application.objects.filter(student=request.user.student)
-    
-    stats = {
-        'total': applications.count(),
-        'pending': applications.filter(status='pending').count(),
-        'under_review': applications.filter(status='under_review').count(),
-        'accepted': applications.filter(status='accepted').count(),
-        'rejected': applications.filter(status='rejected').count(),
-        'withdrawn': applications.filter(status='withdrawn').count(),
-    }
+    # One row from the denormalized counter table
+    stats = counters.student_counts(request.user.student)
     
     return Response(stats)
 
@@ -346,7 +409,7 @@ def application_withdraw(request, pk):
         )
     
     application = get_object_or_404(
-        Application,
+        plan_queryset(Application.objects.all(), ApplicationDetailSerializer),
         pk=pk,
         student=request.user.student
     )
@@ -365,4 +428,398 @@ def application_withdraw(request, pk):
     return Response({
         'message': 'Application withdrawn successfully',
         'application': serializer.data
-    })
\ No newline at end of file
+    })
+
+
+def _batch_response(results):
+    succeeded = sum(1 for result in results if result['ok'])
+    return Response({
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded,
+        'results': results
+    })
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@throttle_classes([ApplyRateThrottle])
+def application_bulk_create(request):
+    """
+    Submit applications to many internships at once
+    Body: {"items": [{"internship": <id>, "cover_letter": "..."}, ...]}
+    """
+    if not hasattr(request.user, 'student'):
+        return Response(
+            {'error': 'Only students can access applications'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    batch = BatchSerializer(data=request.data)
+    if not batch.is_valid():
+        return Response(batch.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    results = submit_applications(request.user.student, batch.validated_data['items'])
+    return _batch_response(results)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def application_bulk_status(request):
+    """
+    Move many applications to under_review, accepted or rejected
+    Body: {"items": [{"id": <id>, "status": "accepted", "company_feedback": "..."}, ...]}
+    Staff may update any application, companies only those for their internships
+    """
+    if not (request.user.is_staff or hasattr(request.user, 'company')):
+        return Response(
+            {'error': 'Only companies and administrators can review applications'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    batch = BatchSerializer(data=request.data)
+    if not batch.is_valid():
+        return Response(batch.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    results = transition_applications(request.user, batch.validated_data['items'])
+    return _batch_response(results)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def placement_run(request):
+    """
+    Run the placement engine over all open applications (staff only)
+    Body: {"dry_run": true, "reject_unmatched": false}
+    """
+    if not request.user.is_staff:
+        return Response(
+            {'error': 'Only administrators can run placements'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    options = matching.PlacementRunSerializer(data=request.data)
+    if not options.is_valid():
+        return Response(options.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        summary = matching.run_placement(**options.validated_data)
+    except counters.PositionsFilled as exc:
+        return Response(
+            {'error': f'{exc}; positions changed during the run, nothing was written'},
+            status=status.HTTP_409_CONFLICT
+        )
+    
+    return Response(summary)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def application_export(request, export_format):
+    """
+    Stream the application roster as CSV or NDJSON (staff only)
+    Filters: institution, company, status (comma-separated), applied_after, applied_before
+    """
+    if not request.user.is_staff:
+        return Response(
+            {'error': 'Only administrators can export applications'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    if export_format not in export.FORMATS:
+        return Response(
+            {'error': f'Unsupported format; use one of: {", ".join(export.FORMATS)}'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    try:
+        applications = export.filter_applications(request.query_params)
+    except ValidationError as exc:
+        return Response({'error': exc.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+    
+    response = StreamingHttpResponse(
+        export.stream(applications, export_format),
+        content_type=export.FORMATS[export_format]
+    )
+    filename = f'applications-{timezone.now():%Y%m%d}.{export_format}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+# analytics views
+from . import analytics
+from .serializers import (
+    InternshipFunnelSerializer,
+    MarketTrendRollupSerializer,
+    PlacementRollupSerializer
+)
+
+
+def _analytics_page(request, queryset, serializer_class):
+    page_number = request.query_params.get('page', 1)
+    page_size = request.query_params.get('page_size', 50)
+    paginator = Paginator(plan_queryset(queryset, serializer_class), page_size)
+    page_obj = paginator.get_page(page_number)
+    
+    serializer = serializer_class(page_obj, many=True)
+    
+    return Response({
+        'refreshed_at': analytics.last_refreshed(),
+        'count': paginator.count,
+        'total_pages': paginator.num_pages,
+        'current_page': page_obj.number,
+        'results': serializer.data
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def analytics_placements(request):
+    """
+    Placement rate by institution, course and year of study (staff only)
+    Filters: institution, course, year_of_study
+    """
+    if not request.user.is_staff:
+        return Response(
+            {'error': 'Only administrators can view placement analytics'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    try:
+        rollups = analytics.filter_placements(request.query_params)
+    except ValidationError as exc:
+        return Response({'error': exc.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return _analytics_page(request, rollups, PlacementRollupSerializer)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def analytics_internships(request):
+    """
+    Application funnel per internship: a company sees its own, staff see all
+    Filters: company (staff), is_active
+    """
+    if request.user.is_staff:
+        internships = Internship.objects.all()
+    elif hasattr(request.user, 'company'):
+        internships = Internship.objects.filter(company=request.user.company)
+    else:
+        return Response(
+            {'error': 'Only companies and administrators can view internship analytics'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    try:
+        internships = analytics.filter_funnels(request.query_params, internships)
+    except ValidationError as exc:
+        return Response({'error': exc.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return _analytics_page(request, internships, InternshipFunnelSerializer)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def analytics_trends(request):
+    """
+    Monthly applications by industry and location (staff only)
+    Filters: industry, location, month_from, month_to (YYYY-MM)
+    """
+    if not request.user.is_staff:
+        return Response(
+            {'error': 'Only administrators can view market trends'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    try:
+        rollups = analytics.filter_trends(request.query_params)
+    except ValidationError as exc:
+        return Response({'error': exc.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return _analytics_page(request, rollups, MarketTrendRollupSerializer)
+
+
+# metrics view
+from django.http import HttpResponse
+from . import expiry, profiling
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def metrics(request):
+    """
+    Per-view request metrics (when REQUEST_PROFILING is on) and expiry sweep
+    totals in the Prometheus text format (staff only)
+    """
+    if not request.user.is_staff:
+        return Response(
+            {'error': 'Only administrators can view metrics'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    text = profiling.metrics_text() + expiry.metrics_text()
+    return HttpResponse(text, content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# recommendation views
+from students.models import Student
+from . import recommendations
+
+MAX_RECOMMENDATIONS = 100
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@throttle_classes([CatalogueRateThrottle])
+def recommendation_list(request):
+    """
+    Open internships ranked for the current student (staff: ?student=<id>)
+    Params: limit (default 20, at most 100)
+    """
+    if request.user.is_staff and request.query_params.get('student'):
+        student = get_object_or_404(Student, pk=request.query_params['student'])
+    elif hasattr(request.user, 'student'):
+        student = request.user.student
+    else:
+        return Response(
+            {'error': 'Only students can view recommendations'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    try:
+        limit = min(max(int(request.query_params.get('limit', 20)), 1), MAX_RECOMMENDATIONS)
+    except ValueError:
+        return Response({'error': 'limit must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    ranked = recommendations.recommend(student, k=limit)
+    results = InternshipListingSerializer([listing for listing, _ in ranked], many=True).data
+    for row, (_, score) in zip(results, ranked):
+        row['score'] = round(score, 4)
+    
+    return Response({'count': len(results), 'results': results})
+
+
+# resume views
+import os
+from django.conf import settings
+from . import blobs
+
+RESUME_EXTENSIONS = {'.pdf', '.doc', '.docx'}
+
+
+def _resume_filename(student):
+    return f'resume-{student.student_id}{os.path.splitext(student.resume.name or "")[1]}'
+
+
+@api_view(['GET', 'POST', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def resume(request):
+    """
+    GET: Download the current student's resume (Range requests supported)
+    POST: Upload a resume (multipart field "resume": PDF or Word, at most RESUME_MAX_BYTES)
+    DELETE: Remove the resume
+    """
+    if not hasattr(request.user, 'student'):
+        return Response(
+            {'error': 'Only students have resumes'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    student = request.user.student
+    
+    if request.method == 'GET':
+        return blobs.serve(request, student.resume, filename=_resume_filename(student))
+    
+    if request.method == 'DELETE':
+        student.resume = None
+        student.save(update_fields=['resume', 'updated_at'])
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    
+    upload = request.FILES.get('resume')
+    if upload is None:
+        return Response({'error': 'Attach the file as "resume"'}, status=status.HTTP_400_BAD_REQUEST)
+    if os.path.splitext(upload.name)[1].lower() not in RESUME_EXTENSIONS:
+        return Response(
+            {'error': f'Resumes must be one of: {", ".join(sorted(RESUME_EXTENSIONS))}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    max_bytes = getattr(settings, 'RESUME_MAX_BYTES', 5 * 1024 * 1024)
+    if upload.size > max_bytes:
+        return Response(
+            {'error': f'Resumes can be at most {max_bytes // 1024} KB'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    student.resume.save(upload.name, upload, save=False)
+    student.save(update_fields=['resume', 'updated_at'])
+    return Response({'resume': student.resume.name, 'size': upload.size}, status=status.HTTP_201_CREATED)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def application_resume(request, pk):
+    """
+    Download the resume of an application's student: for the student, the internship's company and staff
+    """
+    application = get_object_or_404(
+        Application.objects.select_related('student', 'internship__company'), pk=pk
+    )
+    allowed = (
+        request.user.is_staff
+        or application.student.user_id == request.user.pk
+        or application.internship.company.user_id == request.user.pk
+    )
+    if not allowed:
+        return Response(
+            {'error': 'You do not have permission to view this resume'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    student = application.student
+    return blobs.serve(request, student.resume, filename=_resume_filename(student))
+
+
+# token views
+from django.contrib.auth import authenticate
+from rest_framework.permissions import AllowAny
+from . import tokens
+from .throttling import LoginRateThrottle
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@throttle_classes([LoginRateThrottle])
+def auth_token(request):
+    """
+    Issue a bearer token for {"username", "password"}, or a fresh one for an authenticated caller
+    """
+    if 'username' in request.data:
+        user = authenticate(
+            request, username=request.data.get('username'), password=request.data.get('password')
+        )
+        if user is None:
+            return Response(
+                {'error': 'Invalid username or password'},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+    elif request.user.is_authenticated:
+        user = request.user
+    else:
+        return Response(
+            {'error': 'username and password are required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    role = tokens.role_of(user)
+    if role is None:
+        return Response(
+            {'error': 'Only students, companies and institution staff can have tokens'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    return Response({
+        'token': tokens.issue(user),
+        'token_type': tokens.KEYWORD,
+        'expires_in': tokens.token_lifetime(),
+        'user_id': user.pk,
+        'role': role,
+    })
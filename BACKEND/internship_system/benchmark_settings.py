@@ -0,0 +1,11 @@
+# internship_system/benchmark_settings.py
+"""
+Settings for the servers `manage.py benchmark_asgi` starts
+
+The project's settings without rate limits, so the load test measures
+throughput rather than the budgets. Never deploy with these.
+"""
+from .settings import *  # noqa: F401,F403
+
+
+RATE_LIMITS = {}
@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 
 from pathlib import Path
 
+from .database import databases
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -49,6 +51,8 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    # First, so its timings cover the whole stack; inert unless REQUEST_PROFILING is on
+    'companies.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -63,6 +67,9 @@ MIDDLEWARE = [
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
+        # Bearer tokens from /api/auth/token/; a request without a session cookie
+        # costs SessionAuthentication no queries (see companies/tokens.py)
+        'companies.tokens.TokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -83,9 +90,77 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Response cache for the public catalogue endpoints (see companies/cache.py)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    }
+}
+
+CATALOGUE_CACHE_ALIAS = 'default'
+CATALOGUE_CACHE_TIMEOUT = 300
+
+# Per-user and per-IP budgets for the search and apply endpoints (see
+# companies/throttling.py); {} disables rate limiting. Use a cache shared by
+# all workers (Redis, memcached) for the budgets to hold across processes.
+RATE_LIMITS = {
+    'catalogue': {'user': '300/min', 'ip': '600/min'},
+    'apply': {'user': '20/min', 'ip': '60/min'},
+    'login': {'ip': '10/min'},
+}
+# Tokens a catalogue ?search= request spends, against 1 for other requests
+RATE_LIMIT_SEARCH_COST = 5
+RATE_LIMIT_CACHE_ALIAS = 'default'
+
+# Build list responses from values() rows and render them with orjson when it
+# is installed (see companies/fastpath.py)
+FAST_SERIALIZERS = False
+
+# Per-request SQL / serializer / render timings in Server-Timing headers and
+# /api/metrics/ (see companies/profiling.py)
+REQUEST_PROFILING = False
+REQUEST_PROFILING_DUPLICATE_THRESHOLD = 5
+
+# Internship expiry sweeper (see companies/expiry.py). With an interval (in
+# seconds) each web server process also sweeps from a background thread;
+# otherwise run `manage.py sweep_internships` from cron.
+EXPIRY_SWEEP_INTERVAL = None
+# Move inactive internships this many days past their deadline to the archive tables (None: never)
+EXPIRY_ARCHIVE_AFTER_DAYS = None
+
+# Seconds succeeded background jobs are kept before run_jobs deletes them
+# (see companies/jobs.py)
+JOBS_RETENTION_SECONDS = 7 * 24 * 3600
+
+# How often each process picks up changed internships into its in-memory
+# recommendation index (see companies/recommendations.py)
+RECOMMENDATIONS_REFRESH_SECONDS = 10
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Files are stored content-addressed (see companies/storage.py): resumes under
+# MEDIA_ROOT/blobs/, company logos and their thumbnails under MEDIA_ROOT/public/.
+# `manage.py collect_blobs` removes unreferenced ones. A blob's name is the hash
+# of its bytes, so the web server can serve MEDIA_URL + 'public/' with
+# `Cache-Control: public, max-age=31536000, immutable`. Never serve
+# MEDIA_URL + 'blobs/' publicly: resumes are only sent by the download views.
+RESUME_MAX_BYTES = 5 * 1024 * 1024
+# Let the web server send downloads: an nginx `internal` location aliasing
+# MEDIA_ROOT, e.g. '/protected-media/'. None: Django streams them.
+BLOB_ACCEL_REDIRECT = None
+# Edge of the square logo thumbnails the list endpoints show (see companies/thumbnails.py)
+LOGO_THUMBNAIL_SIZE = 128
+
+# Bearer tokens (see companies/tokens.py): their lifetime, and how long each
+# process keeps the users they name (0: no cache) and how many
+AUTH_TOKEN_TTL_SECONDS = 15 * 60
+AUTH_PRINCIPAL_CACHE_SECONDS = 30
+AUTH_PRINCIPAL_CACHE_SIZE = 10000
+
 
 
 ROOT_URLCONF = 'internship_system.urls'
@@ -111,12 +186,15 @@ WSGI_APPLICATION = 'internship_system.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
-}
+# DATABASE_URL, DATABASE_REPLICA_URLS and the DB_* connection variables
+# (see internship_system/database.py); SQLite's db.sqlite3 without them
+DATABASES = databases(BASE_DIR)
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+# The catalogue views read from DATABASE_REPLICAS (see companies/routers.py)
+DATABASE_ROUTERS = ['companies.routers.ReplicaRouter']
+# For this long after a catalogue write its views read the primary instead;
+# set it above the replicas' usual lag
+DATABASE_REPLICA_LAG_SECONDS = 5
 
 
 # Password validation
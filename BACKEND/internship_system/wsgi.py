@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'internship_system.settings')
 
 application = get_wsgi_application()
+
+# Only server processes import this module, so management commands never start the thread
+from companies.expiry import start_sweeper  # noqa: E402
+
+start_sweeper()
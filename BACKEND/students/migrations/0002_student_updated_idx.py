@@ -0,0 +1,20 @@
+# Generated by Django 6.0.1 on 2026-10-18 08:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('institution', '0001_initial'),
+        ('students', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['updated_at'], name='student_updated_idx'),
+        ),
+    ]
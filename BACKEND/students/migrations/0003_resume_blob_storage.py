@@ -0,0 +1,19 @@
+# Generated by Django 6.0.1 on 2026-10-18 09:04
+
+import companies.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0002_student_updated_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='student',
+            name='resume',
+            field=models.FileField(blank=True, null=True, storage=companies.storage.get_blob_storage, upload_to='resumes/'),
+        ),
+    ]
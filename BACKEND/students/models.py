@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import User
 
+from companies.storage import get_blob_storage
+
 
 class Student(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
@@ -12,10 +14,16 @@ class Student(models.Model):
     institution = models.ForeignKey('institution.Institution', on_delete=models.CASCADE)
     course = models.CharField(max_length=200)
     year_of_study = models.IntegerField()
-    resume = models.FileField(upload_to='resumes/', null=True, blank=True)
+    resume = models.FileField(upload_to='resumes/', storage=get_blob_storage, null=True, blank=True)
     is_approved = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # companies.analytics.refresh: students changed since the watermark
+            models.Index(fields=['updated_at'], name='student_updated_idx'),
+        ]
+
     def __str__(self):
         return f"{self.first_name} {self.last_name} - {self.student_id}"